@@ -3,29 +3,80 @@ Discord Bot - Hlavní soubor
 Modulární struktura s cogs pro snadnou správu funkcí.
 Používá Discord Slash Commands (/) pro moderní uživatelské rozhraní.
 """
+# Profiler se zakládá před ostatními importy - měří i import discord.py
+from utils.startup_profiler import StartupProfiler
+startup = StartupProfiler()
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 import logging
 import os
 import asyncio
+import faulthandler
+import math
+import signal
+import sys
+import time
+import tracemalloc
+from contextvars import ContextVar
+from typing import Optional
 from config import (
-    DISCORD_TOKEN, LOG_LEVEL, LOG_FORMAT, LOG_FILE
+    DISCORD_TOKEN, LOG_LEVEL, LOG_FORMAT, LOG_FILE,
+    LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL,
+    FLIGHT_RECORDER_FILE, FLIGHT_RECORDER_SIZE, COMMAND_HASH_FILE, HANDOVER_DRAIN_TIMEOUT,
+    HEARTBEAT_INTERVAL, LAG_PROBE_INTERVAL, TRACEMALLOC_FRAMES, TRACEMALLOC_TOP
 )
+from utils.command_sync import CommandHashStore, command_tree_hash
+from utils.flight_recorder import FlightRecorder, KIND_EVENT, KIND_HANDLER, KIND_ERROR, KIND_MARK, recorder_path
+from utils.log_queue import setup_queue_logging
+from utils.manager_ipc import ManagerClient
+from utils.resource_monitor import write_tracemalloc_report
 
 # Vytvoření složky pro logy
 os.makedirs('logs', exist_ok=True)
 
-# Nastavení logování
-logging.basicConfig(
+# Nastavení logování - handlery jen plní frontu, na disk a do terminálu zapisuje samostatné vlákno
+log_listener = setup_queue_logging(
     level=getattr(logging, LOG_LEVEL),
-    format=LOG_FORMAT,
+    fmt=LOG_FORMAT,
     handlers=[
         logging.FileHandler(LOG_FILE, encoding='utf-8'),
         logging.StreamHandler()
-    ]
+    ],
+    maxsize=LOG_QUEUE_SIZE,
+    batch_size=LOG_BATCH_SIZE,
+    flush_interval=LOG_FLUSH_INTERVAL
 )
 logger = logging.getLogger('discord_bot')
+startup.mark('imports')
+
+# Čitelné názvy fází startu pro report
+STARTUP_PHASES = {
+    'imports': 'Import modulů',
+    'extensions': 'Načtení rozšíření',
+    'login': 'Přihlášení (login)',
+    'setup_hook': 'setup_hook (owner, sync)',
+    'connect': 'Gateway READY',
+    'ready': 'Chunking serverů → on_ready',
+    'guild_available': 'Serverů při startu',
+}
+
+# Události které zpracovává i proces v pohotovosti - udržují cache a hlásí připravenost.
+# Ostatní se zahodí (cache discord.py se aktualizuje i tak) - indexy postavené v pohotovosti
+# se proto po aktivaci přestaví v listeneru on_standby_end.
+STANDBY_EVENTS = frozenset({
+    'connect', 'disconnect', 'ready', 'resumed',
+    'guild_available', 'guild_unavailable', 'guild_join', 'guild_remove',
+})
+
+# Tasky discord.py které zpracovávají událost nebo interakci - při předávce se čeká na jejich doběhnutí
+INFLIGHT_TASK_PREFIXES = (
+    'discord.py: ', 'CommandTree-invoker', 'discord-ui-view-dispatch', 'discord-ui-modal-dispatch',
+)
+
+# Rozšíření které se právě načítá - add_cog podle něj připíše čas setupu
+loading_extension: ContextVar[str] = ContextVar('loading_extension', default='')
 
 # Nastavení intentů (oprávnění) pro bota
 intents = discord.Intents.default()
@@ -34,24 +85,320 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
+
+def event_ids(obj) -> tuple:
+    """(guild_id, channel_id, user_id) z argumentu události - jen levné getattr, bez výjimek"""
+    guild_id = getattr(obj, 'guild_id', None)
+    if guild_id is None:
+        guild_id = getattr(getattr(obj, 'guild', None), 'id', None)
+    channel_id = getattr(obj, 'channel_id', None)
+    if channel_id is None:
+        channel_id = getattr(getattr(obj, 'channel', None), 'id', None)
+    user = getattr(obj, 'author', None) or getattr(obj, 'user', None)
+    user_id = getattr(user, 'id', None)
+    return guild_id or 0, channel_id or 0, user_id or 0
+
+
+class RecordingBot(commands.Bot):
+    """
+    Bot který zapisuje každou rozeslanou událost a doběhnutý handler do flight recorderu.
+    Po pádu z něj Manager vypíše posledních několik tisíc událostí.
+    
+    Pod Managerem umí předávku při daily restartu: nový proces se připojí v pohotovosti
+    (standby - udržuje cache, ale události ani interakce nezpracovává), a jakmile je READY,
+    Manager ho aktivuje a starý proces dokončí rozpracované interakce a skončí.
+    """
+    
+    def __init__(
+        self,
+        *args,
+        recorder: FlightRecorder,
+        profiler: StartupProfiler,
+        manager: Optional[ManagerClient] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.recorder = recorder
+        self.profiler = profiler
+        self.setup_times = {}  # rozšíření -> sekundy strávené v add_cog (včetně cog_load)
+        self.manager = manager
+        self.standby = bool(manager and manager.standby)
+        # Práce na pozadí (obnova operací apod.) čeká na wait_until_ready - v pohotovosti
+        # až do chvíle kdy starý proces skončí, aby se operace nezpracovávaly dvakrát
+        self.primary = asyncio.Event()
+        if not self.standby:
+            self.primary.set()
+        # Počítadla pro heartbeat (od startu procesu)
+        self.event_count = 0
+        self.handler_count = 0
+        self.error_count = 0
+        self.heartbeat_task: Optional[asyncio.Task] = None
+        self.tracemalloc_baseline: Optional[tracemalloc.Snapshot] = None
+    
+    def dispatch(self, event_name: str, /, *args, **kwargs):
+        if self.standby and event_name not in STANDBY_EVENTS:
+            return
+        self.event_count += 1
+        detail = ""
+        ids = (0, 0, 0)
+        if args:
+            try:
+                ids = event_ids(args[0])
+                if event_name == 'interaction' and args[0].data:
+                    detail = args[0].data.get('name') or args[0].data.get('custom_id') or ""
+            except Exception:
+                pass
+        self.recorder.record(KIND_EVENT, event_name, detail, *ids)
+        if not self.profiler.finished:
+            self.profile_event(event_name)
+        super().dispatch(event_name, *args, **kwargs)
+    
+    def profile_event(self, event_name: str):
+        """Fáze startu z událostí gatewaye - 'connect' = READY přijato, 'ready' = po chunkingu serverů"""
+        if event_name == 'guild_available':
+            self.profiler.count('guild_available')
+        elif event_name == 'connect':
+            self.profiler.mark('connect')
+        elif event_name == 'ready':
+            self.profiler.mark('ready')
+            for line in self.profiler.report(STARTUP_PHASES):
+                logger.info(line)
+            self.profiler.finish()
+    
+    async def add_cog(self, cog, /, **kwargs):
+        started = time.perf_counter()
+        try:
+            await super().add_cog(cog, **kwargs)
+        finally:
+            extension = loading_extension.get()
+            if extension:
+                self.setup_times[extension] = self.setup_times.get(extension, 0.0) + time.perf_counter() - started
+    
+    async def _run_event(self, coro, event_name: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            self.handler_count += 1
+            self.recorder.record(
+                KIND_HANDLER, event_name, getattr(coro, '__qualname__', ''),
+                duration_ms=(time.perf_counter() - started) * 1000
+            )
+    
+    async def wait_until_ready(self):
+        await super().wait_until_ready()
+        await self.primary.wait()
+    
+    async def setup_hook(self):
+        """Jednou za proces po přihlášení, ještě před připojením ke gateway"""
+        self.profiler.mark('login')
+        # Slash commands a view se spouští přímo z parseru INTERACTION_CREATE, ne přes dispatch -
+        # v pohotovosti se proto interakce zahazují už tady (odpoví na ně aktivní proces)
+        parsers = self._connection.parsers
+        parse_interaction = parsers['INTERACTION_CREATE']
+        parsers['INTERACTION_CREATE'] = lambda data: None if self.standby else parse_interaction(data)
+        
+        # Nastav owner_id pokud ještě není
+        if not self.owner_id:
+            app_info = await self.application_info()
+            self.owner_id = app_info.owner.id
+            logger.info(f"👑 Owner ID nastaven: {self.owner_id}")
+        
+        await sync_command_tree(self)
+        self.profiler.mark('setup_hook')
+    
+    # ====================
+    # PŘEDÁVKA (MANAGER)
+    # ====================
+    
+    async def connect_manager(self):
+        """Připojí se ke kanálu Manageru a začne posílat heartbeat"""
+        if not await self.manager.connect(self.on_manager_message):
+            return
+        self.heartbeat_task = asyncio.create_task(self.heartbeat_loop())
+        if self.standby:
+            logger.info("⏸️ Spuštěno v pohotovosti - čekám na aktivaci Managerem")
+    
+    async def heartbeat_loop(self):
+        """
+        Každých HEARTBEAT_INTERVAL sekund pošle Manageru stav. Zpoždění event loopu se měří
+        častým krátkým spánkem - o kolik se probuzení opozdilo, tolik loop nestíhal.
+        Zablokovaný loop heartbeat nepošle vůbec a Manager bota restartuje.
+        """
+        loop = asyncio.get_running_loop()
+        max_lag = 0.0
+        next_report = loop.time() + HEARTBEAT_INTERVAL
+        while True:
+            expected = loop.time() + LAG_PROBE_INTERVAL
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            max_lag = max(max_lag, loop.time() - expected)
+            if loop.time() < next_report:
+                continue
+            latency = self.latency
+            await self.manager.send(
+                'heartbeat',
+                lag_ms=round(max_lag * 1000, 1),
+                latency_ms=round(latency * 1000, 1) if math.isfinite(latency) else None,
+                events=self.event_count,
+                handlers=self.handler_count,
+                errors=self.error_count,
+                guilds=len(self.guilds),
+                standby=self.standby
+            )
+            max_lag = 0.0
+            next_report = loop.time() + HEARTBEAT_INTERVAL
+    
+    async def on_manager_message(self, message: dict):
+        """
+        Příkazy od Manageru: activate (převzít provoz), primary (starý proces skončil), drain (předat provoz),
+        tracemalloc_start / tracemalloc_dump (hledání úniku paměti)
+        """
+        message_type = message.get('type')
+        if message_type == 'activate':
+            self.standby = False
+            await self.manager.send('active')
+            logger.info("🔀 Proces aktivován - zpracovávám události")
+            # Změny členů a rolí z doby pohotovosti se do vlastních indexů cogů nedostaly
+            self.dispatch('standby_end')
+        elif message_type == 'primary':
+            self.primary.set()
+        elif message_type == 'drain':
+            self.standby = True
+            await self.manager.send('draining')
+            logger.info("🔀 Předávám provoz novému procesu - dokončuji rozpracované interakce")
+            remaining = await self.wait_inflight(HANDOVER_DRAIN_TIMEOUT)
+            if remaining:
+                logger.warning(f"⚠️ {remaining} rozpracovaných handlerů nedoběhlo do {HANDOVER_DRAIN_TIMEOUT} s")
+            await self.manager.send('drained', remaining=remaining)
+            # Ukončení v samostatném tasku - close() ruší i čtení zpráv od Manageru, ve kterém běžíme
+            asyncio.create_task(self.close())
+        elif message_type == 'tracemalloc_start':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self.tracemalloc_baseline = tracemalloc.take_snapshot()
+                logger.info("🔬 tracemalloc zapnut (Manager hlásí růst paměti)")
+        elif message_type == 'tracemalloc_dump':
+            path = None
+            if tracemalloc.is_tracing():
+                path = os.path.join('logs', f"tracemalloc_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+                write_tracemalloc_report(tracemalloc.take_snapshot(), self.tracemalloc_baseline, path, TRACEMALLOC_TOP)
+                logger.info(f"🔬 Report tracemalloc uložen do {path}")
+            await self.manager.send('tracemalloc_dumped', path=path)
+    
+    async def wait_inflight(self, timeout: float) -> int:
+        """
+        Počká až doběhnou handlery událostí a interakcí.
+        
+        Returns:
+            Počet handlerů které po timeoutu ještě běží
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            busy = sum(
+                1 for task in asyncio.all_tasks()
+                if not task.done() and task.get_name().startswith(INFLIGHT_TASK_PREFIXES)
+            )
+            if not busy or loop.time() >= deadline:
+                return busy
+            await asyncio.sleep(0.1)
+    
+    async def close(self):
+        await super().close()
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+        if self.manager is not None:
+            await self.manager.close()
+    
+    async def on_error(self, event_method: str, /, *args, **kwargs):
+        error = sys.exc_info()[1]
+        self.error_count += 1
+        self.recorder.record(KIND_ERROR, event_method, type(error).__name__ if error else "", status=1)
+        await super().on_error(event_method, *args, **kwargs)
+
+
+async def sync_command_tree(bot: commands.Bot):
+    """
+    Synchronizuje slash commands (globální i serverové) jen pokud se změnil jejich hash.
+    Sync je silně rate-limitovaný - při běžném restartu se tak vůbec nevolá.
+    """
+    store = CommandHashStore(COMMAND_HASH_FILE)
+    guild_ids = list(getattr(bot.tree, '_guild_commands', {}))
+    for guild in [None, *(discord.Object(id=guild_id) for guild_id in guild_ids)]:
+        scope = f"guild {guild.id}" if guild else "global"
+        payloads = []
+        for command in bot.tree.get_commands(guild=guild):
+            try:
+                payloads.append(command.to_dict(bot.tree))
+            except TypeError:  # discord.py < 2.4
+                payloads.append(command.to_dict())
+        digest = command_tree_hash(payloads)
+        key = f"{bot.application_id}:{scope}"
+        if store.get(key) == digest:
+            logger.info(f"✅ Slash commands ({scope}) beze změny - sync přeskočen")
+            continue
+        try:
+            logger.info(f"🔄 Synchronizuji slash commands ({scope})...")
+            synced = await bot.tree.sync(guild=guild)
+            store.set(key, digest)
+            logger.info(f"✅ Synchronizováno {len(synced)} slash command(ů) ({scope})")
+        except Exception as e:
+            logger.error(f"❌ Chyba při synchronizaci slash commands ({scope}): {e}")
+
+
+# Kanál s Managerem (None pokud bot běží samostatně)
+manager = ManagerClient.from_env(os.environ)
+
+# Flight recorder - kruhový buffer posledních událostí (po pádu ho vypíše Manager), soubor pro každou instanci
+recorder = FlightRecorder(
+    recorder_path(FLIGHT_RECORDER_FILE, manager.instance if manager else None), FLIGHT_RECORDER_SIZE
+)
+
 # Vytvoření instance bota s slash commands podporou
 # command_prefix není potřeba pro slash commands, ale ponecháme pro kompatibilitu
-bot = commands.Bot(command_prefix="!", intents=intents)  # Prefix ignorován pro slash commands
+# Status se posílá už v IDENTIFY - platí i po reconnectu bez change_presence
+bot = RecordingBot(
+    command_prefix="!",  # Prefix ignorován pro slash commands
+    intents=intents,
+    recorder=recorder,
+    profiler=startup,
+    manager=manager,
+    activity=discord.Activity(type=discord.ActivityType.watching, name="slash commands 🎯")
+)
 
 
 # ====================
 # NAČÍTÁNÍ COGŮ
 # ====================
 
+async def load_extension_timed(name: str, kind: str):
+    """
+    Načte jedno rozšíření a zapíše jeho čas do profileru.
+    Import (exec_module) je synchronní, setup se měří v add_cog - import = celkem - setup.
+    """
+    loading_extension.set(name)
+    started = time.perf_counter()
+    error = None
+    try:
+        await bot.load_extension(name)
+        logger.info(f"✅ Načten {kind}: {name}")
+    except Exception as e:
+        error = str(e)
+        logger.error(f"❌ Chyba při načítání {kind}u {name}: {e}")
+    startup.extension(name, time.perf_counter() - started, bot.setup_times.get(name, 0.0), error)
+
+
 async def load_extensions():
     """
-    Načte všechny moduly (cogs a events)
+    Načte všechny moduly (cogs a events) souběžně.
+    Rozšíření na sobě nezávisí - čekání v setup/cog_load (DB, soubory) se tak překrývá.
     """
     # Cogs - příkazy a komplexní funkce
     cogs_to_load = [
         'cogs.help_system',
         'cogs.basic_commands',
         'cogs.thread_manager',
+        'cogs.search',
     ]
     
     # Events - event handlery
@@ -59,21 +406,12 @@ async def load_extensions():
         'events.message_logging',
     ]
     
-    # Načtení cogů
-    for cog in cogs_to_load:
-        try:
-            await bot.load_extension(cog)
-            logger.info(f"✅ Načten cog: {cog}")
-        except Exception as e:
-            logger.error(f"❌ Chyba při načítání cogu {cog}: {e}")
-    
-    # Načtení event handlerů
-    for event in events_to_load:
-        try:
-            await bot.load_extension(event)
-            logger.info(f"✅ Načten event handler: {event}")
-        except Exception as e:
-            logger.error(f"❌ Chyba při načítání event handleru {event}: {e}")
+    # Každé načtení běží ve vlastním tasku (a tedy vlastním kontextu pro loading_extension)
+    await asyncio.gather(
+        *(load_extension_timed(cog, 'cog') for cog in cogs_to_load),
+        *(load_extension_timed(event, 'event handler') for event in events_to_load)
+    )
+    startup.mark('extensions')
 
 
 # ====================
@@ -83,33 +421,13 @@ async def load_extensions():
 @bot.event
 async def on_ready():
     """
-    Spustí se když se bot úspěšně připojí k Discordu.
-    Synchronizuje slash commands s Discordem.
+    Spustí se když se bot úspěšně připojí k Discordu - i po každém reconnectu gatewaye.
+    Jednorázová práce (owner, sync příkazů) proto běží v setup_hook, status je už v IDENTIFY.
     """
     logger.info(f'✅ Bot {bot.user.name} (ID: {bot.user.id}) je připojený!')
     logger.info(f'📊 Připojen na {len(bot.guilds)} serverů')
-    
-    # Nastav owner_id pokud ještě není
-    if not bot.owner_id:
-        app_info = await bot.application_info()
-        bot.owner_id = app_info.owner.id
-        logger.info(f"👑 Owner ID nastaven: {bot.owner_id}")
-    
-    # Synchronizuj slash commands s Discordem
-    try:
-        logger.info("🔄 Synchronizuji slash commands...")
-        synced = await bot.tree.sync()
-        logger.info(f"✅ Synchronizováno {len(synced)} slash command(ů)")
-    except Exception as e:
-        logger.error(f"❌ Chyba při synchronizaci slash commands: {e}")
-    
-    # Nastavení statusu bota
-    await bot.change_presence(
-        activity=discord.Activity(
-            type=discord.ActivityType.watching,
-            name="slash commands 🎯"
-        )
-    )
+    if bot.manager is not None:
+        await bot.manager.send('ready', standby=bot.standby, startup_s=round(startup.elapsed(), 2))
 
 
 # ====================
@@ -139,15 +457,31 @@ async def main():
     Hlavní funkce pro spuštění bota s načtením cogů.
     """
     async with bot:
+        if bot.manager is not None:
+            await bot.connect_manager()
         await load_extensions()
         await bot.start(DISCORD_TOKEN)
 
 
 if __name__ == "__main__":
+    exit_code = 0
     try:
         logger.info("🚀 Spouštím bota...")
+        recorder.record(KIND_MARK, 'startup')
+        # SIGUSR1 vypíše zásobníky všech vláken na stderr i při zablokovaném event loopu
+        # (Manager ho pošle před ukončením zamrzlého bota, výpis skončí v logs/crash_*.txt)
+        if hasattr(signal, 'SIGUSR1'):
+            faulthandler.register(signal.SIGUSR1, all_threads=True)
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("⚠️ Bot byl zastaven uživatelem")
     except Exception as e:
         logger.critical(f"❌ Kritická chyba při spouštění bota: {e}")
+        # Nenulový kód - Manager to pozná jako pád (restart s odstupem, výpis flight recorderu)
+        exit_code = 1
+    finally:
+        recorder.record(KIND_MARK, 'shutdown')
+        recorder.close()
+        # Dopíše záznamy které zůstaly ve frontě
+        log_listener.stop()
+    sys.exit(exit_code)
@@ -1,13 +1,78 @@
 """
 Bot Manager - Automatický restart při pádu a daily restart
 Spouští Discord bota a sleduje jeho běh.
+Na ukončení bota reaguje okamžitě (čeká na proces, nepolluje), restartuje s exponenciálním
+odstupem a při opakovaných pádech v krátké době restartování na čas pozastaví.
+Daily restart je předávka bez výpadku: nový proces naběhne v pohotovosti a převezme provoz
+až když je READY. Bot posílá heartbeat - zamrzlý bot se restartuje i když proces běží.
+Watchdog zdrojů sleduje RSS, CPU a otevřené soubory bota a restartuje ho při překročení
+limitů nebo trendu růstu.
 """
+import asyncio
+import glob
+import random
+import secrets
+import signal
 import subprocess
-import time
 import sys
 import logging
+from collections import deque
 from datetime import datetime, timedelta
+from typing import List, Optional
 import os
+from utils.flight_recorder import format_dump, recorder_path
+from utils.manager_ipc import ManagerServer
+from utils.output_pump import OutputPump
+from utils.resource_monitor import ResourceSeries, proc_available, read_sample
+
+FLIGHT_RECORDER_FILE = 'logs/flight_recorder.bin'  # Stejná cesta jako FLIGHT_RECORDER_FILE v config.py (+ _<instance>)
+CRASH_LOG_TAIL = 20  # Kolik posledních událostí a řádků výstupu se vypíše přímo do manager.log
+
+# Předávka při daily restartu
+HANDOVER_ENABLED = True  # False = daily restart ukončí bota a spustí nový (výpadek login + READY)
+HANDOVER_READY_TIMEOUT = 300  # Jak dlouho (s) se čeká na READY nového procesu (včetně chunkingu)
+HANDOVER_SWITCH_TIMEOUT = 5  # Jak dlouho (s) se čeká na potvrzení drain/activate
+HANDOVER_EXIT_TIMEOUT = 60  # Jak dlouho (s) má starý proces na dokončení interakcí a ukončení
+
+# Heartbeat - detekce zamrzlého bota
+HEALTH_CHECK_INTERVAL = 5  # Jak často (s) se kontroluje heartbeat
+HEARTBEAT_TIMEOUT = 30  # Po kolika sekundách bez heartbeatu je bot zamrzlý
+HEARTBEAT_STARTUP_TIMEOUT = 180  # Do kdy (s od spuštění) musí přijít první heartbeat
+LAG_LIMIT_MS = 10000  # Zpoždění event loopu nad které je heartbeat "pomalý"
+LAG_LIMIT_COUNT = 3  # Kolik pomalých heartbeatů po sobě = zamrzlý bot
+STACK_DUMP_WAIT = 1.0  # Jak dlouho (s) se po SIGUSR1 čeká na výpis zásobníků
+
+# Watchdog zdrojů (jen Linux - čte /proc)
+RESOURCE_SAMPLE_INTERVAL = 30  # Jak často (s) se čte vzorek
+RESOURCE_WINDOW = 6 * 3600  # Délka časové řady pro trend (s)
+RESOURCE_WARMUP = 900  # Prvních N sekund po startu se nesleduje (plnění cache, chunking)
+SLOPE_MIN_SPAN = 2 * 3600  # Trend se vyhodnocuje až z řady alespoň této délky (s)
+RSS_LIMIT_MB = 1024  # Tvrdý limit paměti
+RSS_SLOPE_LIMIT = 20.0  # Růst paměti (MB/h) přes celou řadu
+FD_LIMIT = 800  # Tvrdý limit otevřených souborů a socketů
+FD_SLOPE_LIMIT = 50.0  # Růst počtu otevřených souborů (za hodinu)
+CPU_LIMIT_PERCENT = 95  # Průměrné vytížení CPU (% jednoho jádra)...
+CPU_WINDOW = 600  # ...po tuto dobu (s) - typicky zacyklený handler
+TRACEMALLOC_ON_GROWTH = True  # Při polovičním trendu paměti zapne v botovi tracemalloc, před restartem uloží report
+TRACEMALLOC_DUMP_TIMEOUT = 60  # Jak dlouho (s) se čeká na report tracemalloc
+
+# Výstup bota (stdout/stderr)
+BOT_OUTPUT_FILE = 'logs/bot_output.log'  # Rotované soubory: bot_output-<čas>.log.gz
+BOT_OUTPUT_MAX_MB = 16  # Velikost souboru po které se rotuje
+BOT_OUTPUT_BACKUPS = 5  # Kolik rotovaných souborů se ponechá
+BOT_OUTPUT_TAIL_KB = 64  # Kolik posledního výstupu se drží v paměti pro výpis po pádu
+PUMP_DRAIN_TIMEOUT = 5  # Jak dlouho (s) se po ukončení bota čeká na dočtení rour
+
+# Restart po pádu
+RESTART_BACKOFF_BASE = 1.0  # První restart po pádu za ~1 s, každý další pád v řadě 2× déle
+RESTART_BACKOFF_MAX = 300.0  # Nejdelší odstup mezi restarty (s)
+STABLE_UPTIME = 600  # Po kolika sekundách běhu se bot považuje za stabilní (odstup se vynuluje)
+CRASH_LOOP_LIMIT = 5  # Tolik pádů během CRASH_LOOP_WINDOW = crash loop
+CRASH_LOOP_WINDOW = 600  # Okno pro počítání pádů (s)
+CRASH_LOOP_PAUSE = 1800  # Jak dlouho (s) se při crash loopu nerestartuje
+STOP_TIMEOUT = 10  # Kolik sekund má bot na ukončení po terminate() než se zabije
+SHUTDOWN_CHECK_INTERVAL = 1.0  # Jak často se kontroluje .shutdown_signal (s)
+STATUS_LOG_INTERVAL = 1800  # Informační log o běhu bota (s)
 
 # Nastavení logování
 logging.basicConfig(
@@ -30,63 +95,324 @@ class BotManager:
         self.restart_count = 0
         self.daily_restart_hour = 4  # Restart ve 4:00 ráno
         self.daily_restart_minute = 0
+        # S watchdogem zdrojů (Linux) jen restart když je potřeba, bez /proc zůstává daily restart jako prevence
+        self.daily_restart_enabled = not proc_available()
+        self.consecutive_crashes = 0  # Pády v řadě bez stabilního běhu - určují odstup
+        self.crash_times = deque()  # Časy pádů v okně CRASH_LOOP_WINDOW
+        self.shutdown_requested = None  # asyncio.Event, založí se v běžící smyčce
+        self.output = OutputPump(
+            BOT_OUTPUT_FILE, BOT_OUTPUT_TAIL_KB * 1024, BOT_OUTPUT_MAX_MB * 1024 * 1024, BOT_OUTPUT_BACKUPS
+        )
+        self.pumps = []  # Tasky čtoucí stdout/stderr běžícího bota
+        self.ipc = ManagerServer(on_message=self.on_bot_message)  # Lokální kanál s botem (předávka, heartbeat)
+        self.instance = None  # ID instance běžícího bota v kanálu
+        self.heartbeats = {}  # instance -> (čas přijetí, poslední heartbeat)
+        self.started_at = 0.0  # Čas event loopu kdy aktuální proces začal běžet
+        self.slow_heartbeats = 0  # Pomalé heartbeaty aktuálního procesu po sobě
+        self.hang_reason = None  # Důvod ukončení zamrzlého bota
+        self.resources = ResourceSeries(RESOURCE_WINDOW)  # Vzorky zdrojů aktuálního procesu
+        self.last_sample = None
+        self.tracing = False  # tracemalloc v aktuálním procesu zapnut
+        self.restart_requested = None  # asyncio.Event - plánovaný restart kvůli zdrojům
+        self.handing_over = False  # Probíhá předávka - zdroje starého procesu se nevzorkují
+        self.restart_reason = None
+    
+    async def spawn_process(self, standby: bool = False):
+        """
+        Spustí proces bota a začne číst jeho výstup.
         
-    def start_bot(self):
-        """Spustí Discord bota"""
-        if self.process:
-            logger.info("⏹️ Ukončujem starý proces bota...")
-            self.process.terminate()
-            try:
-                self.process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
-                logger.warning("⚠️ Proces neodpovídá, nuceně ukončuji...")
-                self.process.kill()
-        
-        logger.info("🚀 Spouštím Discord bota...")
-        
+        Returns:
+            Tuple (proces, tasky čtoucí výstup, ID instance)
+        """
         # Aktivace venv a spuštění bota
         if os.name == 'nt':  # Windows
             python_path = os.path.join('venv', 'Scripts', 'python.exe')
         else:  # Linux/Mac
             python_path = os.path.join('venv', 'bin', 'python')
         
-        self.process = subprocess.Popen(
-            [python_path, 'bot.py'],
+        instance = secrets.token_hex(4)
+        process = await asyncio.create_subprocess_exec(
+            python_path, 'bot.py',
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            cwd=os.getcwd()
+            cwd=os.getcwd(),
+            # Bez bufferování stdout - výstup přijde ve stejném pořadí jako stderr (traceback na konci)
+            env={**os.environ, 'PYTHONUNBUFFERED': '1', **self.ipc.env(instance, standby)}
         )
+        # Roury se čtou průběžně - jinak se po zaplnění (~64 KB) bot zasekne na zápisu logu
+        pumps = [
+            asyncio.create_task(self.output.pump(process.stdout)),
+            asyncio.create_task(self.output.pump(process.stderr)),
+        ]
+        return process, pumps, instance
+    
+    async def start_bot(self):
+        """Spustí Discord bota"""
+        await self.stop_bot()
+        
+        logger.info("🚀 Spouštím Discord bota...")
+        self.output.ring.clear()
+        self.process, self.pumps, self.instance = await self.spawn_process()
+        self.mark_started()
         
         self.last_restart = datetime.now()
         self.restart_count += 1
         
         logger.info(f"✅ Bot spuštěn (PID: {self.process.pid}, restart #{self.restart_count})")
     
+    async def stop_bot(self):
+        """Ukončí běžící proces bota (terminate, po STOP_TIMEOUT kill) a dočte jeho výstup"""
+        if self.is_bot_running():
+            logger.info("⏹️ Ukončuji proces bota...")
+            await self.terminate_process(self.process)
+        await self.drain_output(self.pumps)
+        self.pumps = []
+        if self.instance is not None:
+            self.forget_instance(self.instance)
+    
+    def mark_started(self):
+        """Nový aktuální proces - heartbeat se začne hlídat od teď"""
+        self.started_at = asyncio.get_running_loop().time()
+        self.slow_heartbeats = 0
+        self.hang_reason = None
+        self.resources.clear()
+        self.last_sample = None
+        self.tracing = False
+    
+    def forget_instance(self, instance: str):
+        """Zapomene ukončenou instanci včetně jejího flight recorderu"""
+        self.ipc.forget(instance)
+        self.heartbeats.pop(instance, None)
+        try:
+            os.remove(recorder_path(FLIGHT_RECORDER_FILE, instance))
+        except OSError:
+            pass
+    
+    @staticmethod
+    def read_recorder(instance: str) -> List[str]:
+        """Výpis flight recorderu instance (prázdný pokud soubor není)"""
+        return list(format_dump(recorder_path(FLIGHT_RECORDER_FILE, instance)))
+    
+    @staticmethod
+    def remove_stale_recorders():
+        """Smaže flight recordery instancí z předchozího běhu Manageru"""
+        base, ext = os.path.splitext(FLIGHT_RECORDER_FILE)
+        for path in glob.glob(f"{base}_*{ext}"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    async def terminate_process(process):
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Proces neodpovídá, nuceně ukončuji...")
+            process.kill()
+            await process.wait()
+    
+    @staticmethod
+    async def drain_output(pumps):
+        """Dočte zbytek výstupu ukončeného bota (roury drží otevřené i případné podprocesy - proto timeout)"""
+        if not pumps:
+            return
+        _, pending = await asyncio.wait(pumps, timeout=PUMP_DRAIN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+    
+    async def handover(self) -> bool:
+        """
+        Předávka bez výpadku: nový proces naběhne v pohotovosti (přihlášení, READY, chunking),
+        pak starý přestane přijímat události (drain), nový se aktivuje a starý dokončí
+        rozpracované interakce a skončí. Výpadek = jen mezi drain a activate.
+        
+        Returns:
+            False pokud předávku nelze provést (starý proces není připojený ke kanálu).
+            Při zrušené předávce (shutdown, pád starého procesu) True - zbytek řeší hlavní smyčka.
+        """
+        if not self.ipc.is_connected(self.instance):
+            logger.warning("⚠️ Bot není připojený ke kanálu Manageru - předávka není možná")
+            return False
+        
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        process, pumps, instance = await self.spawn_process(standby=True)
+        logger.info(f"🔀 Předávka: nový proces v pohotovosti (PID: {process.pid}), čekám na READY...")
+        
+        # Čekání může trvat minuty - přeruší ho i pád starého procesu nebo shutdown signal
+        ready = asyncio.create_task(self.ipc.wait_for(instance, 'ready', HANDOVER_READY_TIMEOUT))
+        died = asyncio.create_task(process.wait())
+        old_died = asyncio.create_task(self.process.wait())
+        shutdown = asyncio.create_task(self.shutdown_requested.wait())
+        await asyncio.wait({ready, died, old_died, shutdown}, return_when=asyncio.FIRST_COMPLETED)
+        for task in (died, old_died, shutdown):
+            task.cancel()
+        stopping = self.shutdown_requested.is_set()
+        old_exited = self.process.returncode is not None
+        if stopping or old_exited or not ready.done() or ready.result() is None:
+            ready.cancel()
+            if stopping:
+                logger.info("🛑 Předávka přerušena shutdown signalem")
+            elif old_exited:
+                # Pád starého procesu zpracuje hlavní smyčka (výpis jeho flight recorderu, restart)
+                logger.warning("⚠️ Předávka zrušena - starý proces skončil dřív než nový dosáhl READY")
+            else:
+                logger.error(
+                    f"❌ Předávka zrušena - nový proces nedosáhl READY "
+                    f"(exit code: {process.returncode}), běží dál starý proces"
+                )
+            if process.returncode is None:
+                await self.terminate_process(process)
+            await self.drain_output(pumps)
+            self.forget_instance(instance)
+            return True
+        ready_after = loop.time() - started
+        
+        # Přepnutí - starý proces přestane přijímat události, nový začne
+        old_process, old_pumps, old_instance = self.process, self.pumps, self.instance
+        switch_started = loop.time()
+        await self.ipc.send(old_instance, 'drain')
+        if await self.ipc.wait_for(old_instance, 'draining', HANDOVER_SWITCH_TIMEOUT) is None:
+            logger.warning("⚠️ Starý proces nepotvrdil drain - aktivuji nový i tak")
+        await self.ipc.send(instance, 'activate')
+        activated = await self.ipc.wait_for(instance, 'active', HANDOVER_SWITCH_TIMEOUT)
+        switch_ms = (loop.time() - switch_started) * 1000
+        
+        self.process, self.pumps, self.instance = process, pumps, instance
+        self.mark_started()
+        self.last_restart = datetime.now()
+        self.restart_count += 1
+        if activated is None:
+            logger.error("❌ Nový proces nepotvrdil aktivaci")
+        
+        # Starý proces dokončí rozpracované interakce a skončí sám (při shutdown signalu se nečeká)
+        old_exit = asyncio.create_task(old_process.wait())
+        shutdown = asyncio.create_task(self.shutdown_requested.wait())
+        await asyncio.wait({old_exit, shutdown}, timeout=HANDOVER_EXIT_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+        old_exit.cancel()
+        shutdown.cancel()
+        crashed = old_process.returncode not in (None, 0)
+        if old_process.returncode is None:
+            if not self.shutdown_requested.is_set():
+                logger.warning(f"⚠️ Starý proces (PID: {old_process.pid}) neskončil - ukončuji ho")
+            await self.terminate_process(old_process)
+        await self.drain_output(old_pumps)
+        if crashed:
+            logger.error(f"❌ Starý proces (PID: {old_process.pid}) spadl při dokončování (exit code: {old_process.returncode})")
+            self.write_crash_report(self.read_recorder(old_instance))
+        self.forget_instance(old_instance)
+        if self.shutdown_requested.is_set():
+            return True
+        # Teprve teď smí nový proces spustit práci na pozadí (obnova operací) - starý už nic nedělá
+        await self.ipc.send(instance, 'primary')
+        
+        logger.info(
+            f"✅ Předávka dokončena (PID: {old_process.pid} → {process.pid}, restart #{self.restart_count}): "
+            f"přepnutí {switch_ms:.0f} ms, READY za {ready_after:.1f} s, celkem {loop.time() - started:.1f} s"
+        )
+        return True
+    
     def is_bot_running(self):
         """Zkontroluje zda bot běží"""
         if not self.process:
             return False
         
-        return_code = self.process.poll()
-        return return_code is None
+        return self.process.returncode is None
     
-    def should_daily_restart(self):
-        """Zkontroluje zda je čas na daily restart"""
-        now = datetime.now()
-        
-        # Čas posledního daily restartu (dnes ve stanovenou hodinu)
-        restart_time_today = now.replace(
+    def next_daily_restart(self, now: datetime) -> datetime:
+        """Nejbližší čas daily restartu po `now`"""
+        restart_time = now.replace(
             hour=self.daily_restart_hour,
             minute=self.daily_restart_minute,
             second=0,
             microsecond=0
         )
+        if restart_time <= now:
+            restart_time += timedelta(days=1)
+        return restart_time
+    
+    async def daily_restart_timer(self):
+        """
+        Doběhne v čase daily restartu.
+        Spí po nejvýš hodinových úsecích a porovnává s hodinami systému -
+        přechod na letní čas ani uspání stroje termín neposune.
+        """
+        if not self.daily_restart_enabled:
+            await asyncio.Event().wait()
+        restart_time = self.next_daily_restart(datetime.now())
+        while True:
+            remaining = (restart_time - datetime.now()).total_seconds()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 3600))
+    
+    def restart_delay(self) -> float:
+        """
+        Odstup před restartem po pádu - exponenciální s náhodným rozptylem
+        (polovina až celý odstup), aby se restarty nesynchronizovaly s výpadkem Discordu.
+        """
+        delay = min(RESTART_BACKOFF_MAX, RESTART_BACKOFF_BASE * 2 ** (self.consecutive_crashes - 1))
+        return random.uniform(delay / 2, delay)
+    
+    def register_crash(self, uptime: float) -> bool:
+        """
+        Zapíše pád a zjistí zda jde o crash loop.
         
-        # Pokud jsme už prošli časem restartu dnes a poslední restart byl před tím
-        if now >= restart_time_today and self.last_restart < restart_time_today:
-            return True
+        Args:
+            uptime: Jak dlouho bot před pádem běžel (s)
+        
+        Returns:
+            True pokud bot padá příliš často (restartování se má pozastavit)
+        """
+        if uptime >= STABLE_UPTIME:
+            self.consecutive_crashes = 0
+        self.consecutive_crashes += 1
         
-        return False
+        now = asyncio.get_running_loop().time()
+        self.crash_times.append(now)
+        while self.crash_times and now - self.crash_times[0] > CRASH_LOOP_WINDOW:
+            self.crash_times.popleft()
+        return len(self.crash_times) >= CRASH_LOOP_LIMIT
+    
+    async def wait_for_shutdown(self, timeout: float) -> bool:
+        """Počká `timeout` sekund, předčasně skončí při shutdown signalu. Vrací True při shutdownu."""
+        try:
+            await asyncio.wait_for(self.shutdown_requested.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def write_crash_report(self, events: List[str]):
+        """
+        Uloží do logs/crash_*.txt poslední výstup spadlého bota a obsah jeho flight recorderu
+        (viz read_recorder). Konec obojího vypíše do manager.log.
+        """
+        output = self.output.tail()
+        if not events:
+            logger.warning("⚠️ Flight recorder není k dispozici")
+        if not output and not events:
+            return
+        crash_file = os.path.join('logs', f"crash_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        try:
+            with open(crash_file, 'w', encoding='utf-8') as f:
+                f.write(f"=== Výstup bota (posledních {len(output)} řádků) ===\n")
+                f.write("\n".join(output) + "\n")
+                if events:
+                    f.write("\n=== Flight recorder ===\n")
+                    f.write("\n".join(events) + "\n")
+        except OSError as e:
+            logger.error(f"Nepodařilo se uložit výpis po pádu: {e}")
+            return
+        if output:
+            logger.info(f"📄 Konec výstupu bota (celý v {crash_file}):")
+            for line in output[-CRASH_LOG_TAIL:]:
+                logger.info(f"    {line}")
+        if events:
+            logger.info(f"📼 Posledních {len(events) - 1} událostí uloženo do {crash_file}, konec výpisu:")
+            for line in events[-CRASH_LOG_TAIL:]:
+                logger.info(f"    {line}")
     
     def check_shutdown_signal(self):
         """Zkontroluje zda existuje signal file pro shutdown"""
@@ -101,71 +427,296 @@ class BotManager:
         except Exception as e:
             logger.error(f"Chyba při mazání shutdown signal: {e}")
     
-    def run(self):
-        """Hlavní smyčka manageru"""
-        logger.info("=" * 60)
-        logger.info("🎮 Bot Manager spuštěn")
-        logger.info(f"📅 Daily restart nastaven na: {self.daily_restart_hour:02d}:{self.daily_restart_minute:02d}")
-        logger.info("=" * 60)
+    async def watch_shutdown_signal(self):
+        """Nastaví shutdown_requested jakmile se objeví .shutdown_signal (zapisuje ho /shutdown_all)"""
+        while not self.check_shutdown_signal():
+            await asyncio.sleep(SHUTDOWN_CHECK_INTERVAL)
+        self.shutdown_requested.set()
+    
+    async def log_status(self):
+        """Informační log každých 30 minut"""
+        while True:
+            await asyncio.sleep(STATUS_LOG_INTERVAL)
+            if self.is_bot_running():
+                uptime = datetime.now() - self.last_restart
+                health = ""
+                if self.instance in self.heartbeats:
+                    health = ", " + self.format_heartbeat(self.heartbeats[self.instance][1])
+                resources = ""
+                if self.last_sample is not None:
+                    resources = f", RSS {self.last_sample.rss_mb:.0f} MB, souborů {self.last_sample.fds}"
+                logger.info(f"✅ Bot běží: {str(uptime).split('.')[0]} (PID: {self.process.pid}{resources}{health})")
+    
+    # ====================
+    # HEARTBEAT
+    # ====================
+    
+    async def on_bot_message(self, instance: str, message: dict):
+        """Zprávy od bota (předávku řeší handover() přes wait_for, tady jen heartbeat)"""
+        if message.get('type') != 'heartbeat':
+            return
+        self.heartbeats[instance] = (asyncio.get_running_loop().time(), message)
+        if instance == self.instance:
+            if (message.get('lag_ms') or 0) > LAG_LIMIT_MS:
+                self.slow_heartbeats += 1
+            else:
+                self.slow_heartbeats = 0
+    
+    @staticmethod
+    def format_heartbeat(message: dict) -> str:
+        latency = message.get('latency_ms')
+        return (
+            f"zpoždění loopu {message.get('lag_ms')} ms, "
+            f"latence {f'{latency:.0f} ms' if latency is not None else '?'}, "
+            f"událostí {message.get('events')}, handlerů {message.get('handlers')}, chyb {message.get('errors')}"
+        )
+    
+    def check_health(self, now: float) -> Optional[str]:
+        """Důvod proč je aktuální bot zamrzlý (None = v pořádku)"""
+        last = self.heartbeats.get(self.instance)
+        if last is None:
+            if now - self.started_at > HEARTBEAT_STARTUP_TIMEOUT:
+                return f"žádný heartbeat {now - self.started_at:.0f} s od spuštění"
+            return None
+        if now - last[0] > HEARTBEAT_TIMEOUT:
+            return f"heartbeat chybí {now - last[0]:.0f} s"
+        if self.slow_heartbeats >= LAG_LIMIT_COUNT:
+            return f"zpoždění event loopu {last[1].get('lag_ms')} ms v {self.slow_heartbeats} heartbeatech po sobě"
+        return None
+    
+    async def watch_health(self):
+        """Restartuje bota který běží, ale neposílá heartbeat nebo má zahlcený event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            if not self.is_bot_running() or self.hang_reason is not None:
+                continue
+            reason = self.check_health(loop.time())
+            if reason is not None:
+                await self.kill_hung(reason)
+    
+    async def kill_hung(self, reason: str):
+        """Vyžádá výpis zásobníků (končí ve výstupu bota → crash report) a ukončí proces"""
+        self.hang_reason = reason
+        logger.error(f"🧊 Bot zamrzl ({reason}) - ukládám zásobníky a restartuji")
+        if self.instance in self.heartbeats:
+            logger.info(f"    Poslední heartbeat: {self.format_heartbeat(self.heartbeats[self.instance][1])}")
+        process = self.process
+        if hasattr(signal, 'SIGUSR1'):
+            try:
+                process.send_signal(signal.SIGUSR1)
+                await asyncio.sleep(STACK_DUMP_WAIT)
+            except ProcessLookupError:
+                return
+        else:
+            logger.warning("⚠️ Výpis zásobníků není na této platformě dostupný")
+        if process.returncode is None:
+            await self.terminate_process(process)
+    
+    # ====================
+    # WATCHDOG ZDROJŮ
+    # ====================
+    
+    def check_resources(self, sample) -> Optional[str]:
+        """Důvod pro restart podle limitů a trendů (None = v pořádku)"""
+        if sample.rss_mb > RSS_LIMIT_MB:
+            return f"RSS {sample.rss_mb:.0f} MB > {RSS_LIMIT_MB} MB"
+        if sample.fds > FD_LIMIT:
+            return f"{sample.fds} otevřených souborů > {FD_LIMIT}"
+        cpu = self.resources.cpu_percent(CPU_WINDOW)
+        if cpu is not None and cpu > CPU_LIMIT_PERCENT:
+            return f"CPU {cpu:.0f} % po dobu {CPU_WINDOW // 60} min"
+        if self.resources.span() < SLOPE_MIN_SPAN:
+            return None
+        hours = self.resources.span() / 3600
+        rss_slope = self.resources.slope('rss_mb')
+        if rss_slope is not None and rss_slope > RSS_SLOPE_LIMIT:
+            return f"paměť roste {rss_slope:.1f} MB/h (posledních {hours:.1f} h, RSS {sample.rss_mb:.0f} MB)"
+        fd_slope = self.resources.slope('fds')
+        if fd_slope is not None and fd_slope > FD_SLOPE_LIMIT:
+            return f"otevřené soubory rostou {fd_slope:.0f}/h (posledních {hours:.1f} h, nyní {sample.fds})"
+        return None
+    
+    async def maybe_start_tracemalloc(self):
+        """Při polovičním trendu paměti zapne v botovi tracemalloc - před restartem pak bude report kde paměť roste"""
+        if not TRACEMALLOC_ON_GROWTH or self.tracing or self.resources.span() < SLOPE_MIN_SPAN / 2:
+            return
+        rss_slope = self.resources.slope('rss_mb')
+        if rss_slope is not None and rss_slope > RSS_SLOPE_LIMIT / 2:
+            if await self.ipc.send(self.instance, 'tracemalloc_start'):
+                self.tracing = True
+                # Režie tracemalloc se v RSS projeví skokem, který by trend započítal jako růst - řada začne znovu
+                self.resources.clear()
+                logger.warning(f"📈 Paměť bota roste {rss_slope:.1f} MB/h - zapínám tracemalloc")
+    
+    async def watch_resources(self):
+        """Vzorkuje zdroje bota a při překročení limitu nebo trendu naplánuje restart"""
+        if not proc_available():
+            logger.info("ℹ️ /proc není k dispozici - watchdog zdrojů vypnut")
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(RESOURCE_SAMPLE_INTERVAL)
+            # Během předávky je starý proces pořád nad limitem - další restart by předal i nový proces
+            if not self.is_bot_running() or self.restart_requested.is_set() or self.handing_over:
+                continue
+            sample = read_sample(self.process.pid)
+            if sample is None:
+                continue
+            self.last_sample = sample
+            if loop.time() - self.started_at < RESOURCE_WARMUP:
+                continue
+            self.resources.add(sample)
+            await self.maybe_start_tracemalloc()
+            reason = self.check_resources(sample)
+            if reason is not None and not self.handing_over:
+                await self.request_resource_restart(reason)
+    
+    async def request_resource_restart(self, reason: str):
+        """Uloží report tracemalloc (pokud běží) a předá restart hlavní smyčce"""
+        logger.warning(f"♻️ Watchdog zdrojů: {reason}")
+        if self.tracing:
+            await self.ipc.send(self.instance, 'tracemalloc_dump')
+            reply = await self.ipc.wait_for(self.instance, 'tracemalloc_dumped', TRACEMALLOC_DUMP_TIMEOUT)
+            if reply and reply.get('path'):
+                logger.info(f"🔬 Report alokací bota: {reply['path']}")
+            else:
+                logger.warning("⚠️ Report tracemalloc se nepodařilo získat")
+        self.restart_reason = reason
+        self.restart_requested.set()
+    
+    async def handle_exit(self) -> bool:
+        """
+        Zpracuje ukončení bota a počká na čas restartu.
         
-        # Vyčisti starý shutdown signal pokud existuje
-        self.clear_shutdown_signal()
+        Returns:
+            False pokud má Manager skončit (shutdown signal)
+        """
+        await self.drain_output(self.pumps)
+        self.pumps = []
+        # Flight recorder ukončeného procesu se přečte dřív než ho forget_instance smaže
+        events = self.read_recorder(self.instance)
+        self.forget_instance(self.instance)
+        return_code = self.process.returncode
+        uptime = (datetime.now() - self.last_restart).total_seconds()
+        
+        # /shutdown_all zapíše signal těsně před ukončením bota - nečeká se na další kontrolu
+        if self.check_shutdown_signal():
+            self.shutdown_requested.set()
+            return False
+        
+        if self.hang_reason is not None:
+            logger.error(f"❌ Zamrzlý bot ukončen ({self.hang_reason}, běžel {uptime:.0f} s)")
+        elif return_code == 0:
+            # Čisté ukončení (/shutdown) - restart hned, nepočítá se jako pád
+            logger.info("🔄 Bot byl vypnut příkazem - restartuji")
+            return True
+        else:
+            logger.error(f"❌ Bot spadl! (exit code: {return_code}, běžel {uptime:.0f} s)")
+        self.write_crash_report(events)
         
-        self.start_bot()
+        if self.register_crash(uptime):
+            logger.critical(
+                f"💥 Crash loop: {len(self.crash_times)} pádů za posledních {CRASH_LOOP_WINDOW // 60} minut - "
+                f"restartování pozastaveno na {CRASH_LOOP_PAUSE // 60} minut"
+            )
+            if await self.wait_for_shutdown(CRASH_LOOP_PAUSE):
+                return False
+            self.crash_times.clear()
+            self.consecutive_crashes = 0
+            return True
         
+        delay = self.restart_delay()
+        logger.info(f"🔄 Restartuji za {delay:.1f} sekund (pád #{self.consecutive_crashes} v řadě)...")
+        return not await self.wait_for_shutdown(delay)
+    
+    async def supervise(self):
+        """Hlavní smyčka - čeká na první z: ukončení bota, daily restart, restart kvůli zdrojům, shutdown signal"""
+        self.shutdown_requested = asyncio.Event()
+        self.restart_requested = asyncio.Event()
+        self.output.start()
+        self.remove_stale_recorders()
+        await self.ipc.start()
+        helpers = [
+            asyncio.create_task(self.watch_shutdown_signal()),
+            asyncio.create_task(self.log_status()),
+            asyncio.create_task(self.watch_health()),
+            asyncio.create_task(self.watch_resources()),
+        ]
+        daily = asyncio.create_task(self.daily_restart_timer())
+        planned = asyncio.create_task(self.restart_requested.wait())
+        shutdown = asyncio.create_task(self.shutdown_requested.wait())
         try:
+            await self.start_bot()
             while True:
-                time.sleep(30)  # Kontrola každých 30 sekund
+                exited = asyncio.create_task(self.process.wait())
+                await asyncio.wait({exited, daily, planned, shutdown}, return_when=asyncio.FIRST_COMPLETED)
                 
-                # Kontrola shutdown signalu
-                if self.check_shutdown_signal():
+                if shutdown.done():
+                    exited.cancel()
                     logger.info("🛑 Detekován shutdown signal - ukončuji Manager")
-                    self.clear_shutdown_signal()
-                    if self.process:
-                        self.process.terminate()
-                        try:
-                            self.process.wait(timeout=10)
-                        except subprocess.TimeoutExpired:
-                            self.process.kill()
-                    logger.info("✅ Manager ukončen")
                     break
                 
-                # Kontrola zda bot běží
-                if not self.is_bot_running():
-                    return_code = self.process.returncode
-                    logger.error(f"❌ Bot spadl! (exit code: {return_code})")
-                    logger.info("🔄 Restartuji za 5 sekund...")
-                    time.sleep(5)
-                    self.start_bot()
+                if exited.done():
+                    if not await self.handle_exit():
+                        logger.info("🛑 Detekován shutdown signal - ukončuji Manager")
+                        break
+                    # Restart kvůli zdrojům naplánovaný před pádem už není potřeba
+                    self.restart_requested.clear()
+                    if planned.done():
+                        planned = asyncio.create_task(self.restart_requested.wait())
+                    await self.start_bot()
                     continue
                 
-                # Kontrola daily restart
-                if self.should_daily_restart():
+                # Plánovaný restart (daily nebo watchdog zdrojů) - předávkou bez výpadku
+                exited.cancel()
+                if daily.done():
                     logger.info("🕐 Čas na denní restart!")
-                    self.start_bot()
-                    continue
-                
-                # Informační log každých 30 minut
-                uptime = datetime.now() - self.last_restart
-                if int(uptime.total_seconds()) % 1800 == 0:  # Každých 30 minut
-                    logger.info(f"✅ Bot běží: {uptime} (PID: {self.process.pid})")
+                    daily = asyncio.create_task(self.daily_restart_timer())
+                else:
+                    logger.info(f"♻️ Restart kvůli zdrojům: {self.restart_reason}")
+                self.consecutive_crashes = 0
+                self.handing_over = True
+                try:
+                    if not (HANDOVER_ENABLED and await self.handover()):
+                        await self.start_bot()
+                finally:
+                    self.handing_over = False
+                # Požadavek se maže až po předávce - týkal se předaného procesu, ne nového
+                self.restart_requested.clear()
+                if planned.done():
+                    planned = asyncio.create_task(self.restart_requested.wait())
+        finally:
+            for task in [*helpers, daily, planned, shutdown]:
+                task.cancel()
+            await self.stop_bot()
+            await self.ipc.close()
+            self.output.close()
+    
+    def run(self):
+        """Spuštění manageru"""
+        logger.info("=" * 60)
+        logger.info("🎮 Bot Manager spuštěn")
+        if self.daily_restart_enabled:
+            logger.info(f"📅 Daily restart nastaven na: {self.daily_restart_hour:02d}:{self.daily_restart_minute:02d}")
+        else:
+            logger.info("📅 Daily restart vypnut - restart jen při pádu, zamrznutí nebo podle watchdogu zdrojů")
+        logger.info("=" * 60)
+        
+        # Vyčisti starý shutdown signal pokud existuje
+        self.clear_shutdown_signal()
+        
+        try:
+            asyncio.run(self.supervise())
+            self.clear_shutdown_signal()
+            logger.info("✅ Manager ukončen")
         
         except KeyboardInterrupt:
+            # supervise() při zrušení bota ukončí sama
             logger.info("⚠️ Manager ukončen uživatelem (Ctrl+C)")
-            if self.process:
-                logger.info("⏹️ Ukončuji bota...")
-                self.process.terminate()
-                try:
-                    self.process.wait(timeout=10)
-                    logger.info("✅ Bot ukončen")
-                except subprocess.TimeoutExpired:
-                    logger.warning("⚠️ Nucené ukončení...")
-                    self.process.kill()
         
         except Exception as e:
             logger.critical(f"💥 Kritická chyba v manageru: {e}", exc_info=True)
-            if self.process:
-                self.process.terminate()
             sys.exit(1)
 
 
@@ -7,11 +7,125 @@ from discord import app_commands
 from discord.ext import commands
 from datetime import datetime
 import logging
-from config import HELP_CHANNEL_ID, ADMIN_NOTIFICATION_CHANNEL_ID, SUPPORT_ROLES
+from typing import Dict, List, Set
+from config import (
+    HELP_CHANNEL_ID, ADMIN_NOTIFICATION_CHANNEL_ID, SUPPORT_ROLES,
+    THREAD_ADD_CONCURRENCY, SUPPORT_ROLE_MENTION_ADD
+)
+from utils.rate_limit import RateLimitedRunner
 
 logger = logging.getLogger('discord_bot')
 
 
+class SupportStaffIndex:
+    """
+    Index support členů udržovaný v paměti pro každý server.
+    Postaví se jednou z member cache a dál se aktualizuje inkrementálně
+    z gateway eventů, takže ticket jen přečte hotovou množinu.
+    """
+    
+    def __init__(self, support_roles: List[str]):
+        self.support_roles = support_roles
+        self._role_ids: Dict[int, Set[int]] = {}    # guild_id -> ID support rolí
+        self._member_ids: Dict[int, Set[int]] = {}  # guild_id -> ID support členů
+    
+    def is_support_role(self, role: discord.Role) -> bool:
+        """Zjistí zda role odpovídá SUPPORT_ROLES (podle jména nebo ID)"""
+        return role.name in self.support_roles or str(role.id) in self.support_roles
+    
+    def _qualifies(self, member: discord.Member) -> bool:
+        """Zjistí zda má člen patřit do support týmu"""
+        if member.bot:
+            return False
+        if member.guild_permissions.administrator:
+            return True
+        return self.has_support_role(member)
+    
+    def has_support_role(self, member: discord.Member) -> bool:
+        """Zjistí zda má člen některou ze support rolí"""
+        role_ids = self._role_ids.get(member.guild.id, ())
+        return any(role.id in role_ids for role in member.roles)
+    
+    def build(self, guild: discord.Guild):
+        """Postaví index pro server jedním průchodem přes member cache"""
+        self._role_ids[guild.id] = {role.id for role in guild.roles if self.is_support_role(role)}
+        self._member_ids[guild.id] = {member.id for member in guild.members if self._qualifies(member)}
+        logger.info(
+            f"Support index pro {guild.name}: {len(self._member_ids[guild.id])} členů, "
+            f"{len(self._role_ids[guild.id])} rolí"
+        )
+    
+    def forget_guild(self, guild_id: int):
+        """Zahodí index serveru (bot ze serveru odešel)"""
+        self._role_ids.pop(guild_id, None)
+        self._member_ids.pop(guild_id, None)
+    
+    def update_member(self, member: discord.Member):
+        """Přepočítá jednoho člena po změně rolí nebo připojení"""
+        member_ids = self._member_ids.get(member.guild.id)
+        if member_ids is None:
+            return
+        if self._qualifies(member):
+            member_ids.add(member.id)
+        else:
+            member_ids.discard(member.id)
+    
+    def remove_member(self, member: discord.Member):
+        """Odebere člena který opustil server"""
+        member_ids = self._member_ids.get(member.guild.id)
+        if member_ids is not None:
+            member_ids.discard(member.id)
+    
+    def update_role(self, role: discord.Role):
+        """Zpracuje vytvoření nebo změnu role (přejmenování, oprávnění)"""
+        role_ids = self._role_ids.get(role.guild.id)
+        if role_ids is None:
+            return
+        if self.is_support_role(role):
+            role_ids.add(role.id)
+        else:
+            role_ids.discard(role.id)
+        # Přepočítej jen držitele role a stávající support členy
+        for member in role.members:
+            self.update_member(member)
+        self._recheck_indexed(role.guild)
+    
+    def remove_role(self, role: discord.Role):
+        """Zpracuje smazání role"""
+        role_ids = self._role_ids.get(role.guild.id)
+        if role_ids is None:
+            return
+        role_ids.discard(role.id)
+        # Role už je členům odebraná - stačí projít stávající support členy
+        self._recheck_indexed(role.guild)
+    
+    def _recheck_indexed(self, guild: discord.Guild):
+        """Přepočítá všechny členy aktuálně vedené v indexu"""
+        for member_id in list(self._member_ids.get(guild.id, ())):
+            member = guild.get_member(member_id)
+            if member is None:
+                self._member_ids[guild.id].discard(member_id)
+            else:
+                self.update_member(member)
+    
+    def get_members(self, guild: discord.Guild) -> List[discord.Member]:
+        """Vrátí support členy serveru v O(počet support členů)"""
+        if guild.id not in self._member_ids:
+            self.build(guild)
+        members = []
+        for member_id in self._member_ids[guild.id]:
+            member = guild.get_member(member_id)
+            if member:
+                members.append(member)
+        return members
+    
+    def get_roles(self, guild: discord.Guild) -> List[discord.Role]:
+        """Vrátí support role serveru"""
+        if guild.id not in self._role_ids:
+            self.build(guild)
+        return [role for role in map(guild.get_role, self._role_ids[guild.id]) if role]
+
+
 class ProblemModal(discord.ui.Modal, title="Nahlásit problém"):
     """
     Formulář pro zadání problému.
@@ -33,9 +147,11 @@ class ProblemModal(discord.ui.Modal, title="Nahlásit problém"):
         required=True
     )
     
-    def __init__(self, bot):
+    def __init__(self, bot, support_index: SupportStaffIndex, member_runner: RateLimitedRunner):
         super().__init__()
         self.bot = bot
+        self.support_index = support_index
+        self.member_runner = member_runner
     
     async def on_submit(self, interaction: discord.Interaction):
         """
@@ -87,30 +203,30 @@ class ProblemModal(discord.ui.Modal, title="Nahlásit problém"):
                 auto_archive_duration=10080  # 7 dní
             )
             
-            # Přidání všech členů s support rolí do vlákna
+            # Přidání všech členů s support rolí do vlákna (z předpočítaného indexu)
             guild = interaction.guild
-            added_members = []
+            support_members = self.support_index.get_members(guild)
+            members_to_add = support_members
+            
+            if SUPPORT_ROLE_MENTION_ADD:
+                support_roles = self.support_index.get_roles(guild)
+                if support_roles:
+                    # Zmínka role přidá všechny její držitele jednou zprávou
+                    await thread.send(
+                        " ".join(role.mention for role in support_roles),
+                        allowed_mentions=discord.AllowedMentions(everyone=False, users=False, roles=True)
+                    )
+                    members_to_add = [m for m in support_members if not self.support_index.has_support_role(m)]
+            
+            # Zbytek přidej souběžně s ohledem na rate limity
+            _, failed = await self.member_runner.map(thread.add_user, members_to_add)
+            failed_ids = set()
+            for member, error in failed:
+                failed_ids.add(member.id)
+                logger.warning(f"Nepodařilo se přidat {member.name} do vlákna: {error}")
             
-            for member in guild.members:
-                if member.bot:
-                    continue
-                
-                has_permission = False
-                if member.guild_permissions.administrator:
-                    has_permission = True
-                else:
-                    for role in member.roles:
-                        if role.name in SUPPORT_ROLES or str(role.id) in SUPPORT_ROLES:
-                            has_permission = True
-                            break
-                
-                if has_permission:
-                    try:
-                        await thread.add_user(member)
-                        added_members.append(member.mention)
-                        logger.info(f"Přidán {member.name} do vlákna problému")
-                    except Exception as e:
-                        logger.warning(f"Nepodařilo se přidat {member.name} do vlákna: {e}")
+            added_members = [m.mention for m in support_members if m.id not in failed_ids]
+            logger.info(f"Do vlákna problému přidáno {len(added_members)} support členů ({len(failed)} selhalo)")
             
             # Vytvoření embedu s citlivými informacemi
             problem_embed = discord.Embed(
@@ -281,9 +397,11 @@ class HelpButtonView(discord.ui.View):
     Persistentní - přežije restart bota.
     """
     
-    def __init__(self, bot):
+    def __init__(self, bot, support_index: SupportStaffIndex, member_runner: RateLimitedRunner):
         super().__init__(timeout=None)
         self.bot = bot
+        self.support_index = support_index
+        self.member_runner = member_runner
     
     @discord.ui.button(
         label="Mám problém",
@@ -293,7 +411,7 @@ class HelpButtonView(discord.ui.View):
     )
     async def help_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Callback když uživatel klikne na tlačítko"""
-        modal = ProblemModal(self.bot)
+        modal = ProblemModal(self.bot, self.support_index, self.member_runner)
         await interaction.response.send_modal(modal)
         logger.info(f"Uživatel {interaction.user.name} otevřel formulář pro problém")
 
@@ -303,10 +421,66 @@ class HelpSystem(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        self.support_index = SupportStaffIndex(SUPPORT_ROLES)
+        self.member_runner = RateLimitedRunner(concurrency=THREAD_ADD_CONCURRENCY)
         # Registrace persistentního view
-        self.bot.add_view(HelpButtonView(self.bot))
+        self.bot.add_view(HelpButtonView(self.bot, self.support_index, self.member_runner))
         logger.info("✅ Help System Cog načten - persistentní view registrováno")
     
+    async def cog_load(self):
+        """Při reloadu za běhu postav index hned (on_guild_available už nepřijde)"""
+        if self.bot.is_ready():
+            for guild in self.bot.guilds:
+                self.support_index.build(guild)
+    
+    # ====================
+    # UDRŽOVÁNÍ SUPPORT INDEXU
+    # ====================
+    
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild: discord.Guild):
+        self.support_index.build(guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        self.support_index.build(guild)
+    
+    @commands.Cog.listener()
+    async def on_standby_end(self):
+        # Index se stavěl v pohotovosti, kdy změny členů a rolí nechodily - přestaví se z aktuální cache
+        for guild in self.bot.guilds:
+            self.support_index.build(guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.support_index.forget_guild(guild.id)
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles:
+            self.support_index.update_member(after)
+    
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self.support_index.update_member(member)
+    
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self.support_index.remove_member(member)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        self.support_index.update_role(role)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name or before.permissions.administrator != after.permissions.administrator:
+            self.support_index.update_role(after)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.support_index.remove_role(role)
+    
     @app_commands.command(name='setup_help', description='[Admin] Vytvoří help tlačítko v aktuálním kanálu')
     @app_commands.checks.has_permissions(administrator=True)
     async def setup_help(self, interaction: discord.Interaction):
@@ -323,7 +497,7 @@ class HelpSystem(commands.Cog):
         )
         embed.set_footer(text="Děkujeme za tvou trpělivost! 💙")
         
-        view = HelpButtonView(self.bot)
+        view = HelpButtonView(self.bot, self.support_index, self.member_runner)
         await interaction.channel.send(embed=embed, view=view)
         
         await interaction.response.send_message(
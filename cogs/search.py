@@ -0,0 +1,103 @@
+"""
+Search Cog
+Fulltextové vyhledávání v archivu zpráv (SQLite FTS5)
+"""
+import discord
+from discord import app_commands
+from discord.ext import commands
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional, Union
+from config import SEARCH_DB
+from utils.helpers import truncate_text
+from utils.search_store import open_reader, search_messages
+
+logger = logging.getLogger('discord_bot')
+
+SEARCH_RESULTS = 10  # Počet výsledků v embedu
+
+
+class Search(commands.Cog):
+    """Cog pro vyhledávání v archivu zpráv"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.conn: Optional[sqlite3.Connection] = None
+        # Jedno čtecí spojení - dotazy běží ve vlákně executoru jeden po druhém
+        self.lock = asyncio.Lock()
+        logger.info("✅ Search Cog načten")
+
+    async def cog_unload(self):
+        if self.conn is not None:
+            self.conn.close()
+
+    def get_connection(self) -> Optional[sqlite3.Connection]:
+        """Čtecí spojení se otevře až když archiv existuje (zakládá ho zapisovač)"""
+        if self.conn is None and os.path.exists(SEARCH_DB):
+            self.conn = open_reader(SEARCH_DB)
+        return self.conn
+
+    @app_commands.command(name='search', description='[Admin] Fulltextové hledání v archivu zpráv')
+    @app_commands.describe(
+        dotaz='Hledaná slova (slov* = začátek slova)',
+        kanal='Jen v tomto kanálu (včetně jeho vláken) nebo vlákně',
+        autor='Jen zprávy tohoto autora',
+        dni='Jen za posledních N dní'
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def search(
+        self,
+        interaction: discord.Interaction,
+        dotaz: str,
+        kanal: Optional[Union[discord.abc.GuildChannel, discord.Thread]] = None,
+        autor: Optional[discord.User] = None,
+        dni: Optional[app_commands.Range[int, 1, 3650]] = None
+    ):
+        """Vyhledá zprávy podle relevance s filtrem na kanál, autora a časové okno."""
+        conn = self.get_connection()
+        if conn is None:
+            await interaction.response.send_message("❌ Archiv zpráv je zatím prázdný.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        since = time.time() - dni * 86400 if dni else None
+        started = time.perf_counter()
+
+        try:
+            async with self.lock:
+                rows = await asyncio.to_thread(
+                    search_messages, conn, interaction.guild_id, dotaz,
+                    kanal.id if kanal else None, autor.id if autor else None, since, None, SEARCH_RESULTS
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Chyba při hledání v archivu: {e}")
+            await interaction.followup.send(f"❌ Chyba při hledání: {str(e)}", ephemeral=True)
+            return
+
+        elapsed = (time.perf_counter() - started) * 1000
+        embed = discord.Embed(
+            title=f"🔎 {truncate_text(dotaz, 200)}",
+            description=f"Nalezeno {len(rows)} zpráv ({elapsed:.0f} ms)" if rows else "Nic nenalezeno",
+            color=discord.Color.blue()
+        )
+        for row in rows:
+            author = interaction.guild.get_member(row['author_id'])
+            author_name = author.display_name if author else f"ID {row['author_id']}"
+            link = f"https://discord.com/channels/{interaction.guild_id}/{row['channel_id']}/{row['id']}"
+            deleted = " 🗑️ smazáno" if row['deleted_ts'] else ""
+            embed.add_field(
+                name=f"{author_name}{deleted}"[:256],
+                value=f"{truncate_text(row['snippet'], 900)}\n<#{row['channel_id']}> • <t:{int(row['ts'])}:R> • [Zpráva]({link})",
+                inline=False
+            )
+
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        logger.info(f"/search '{dotaz}' vyvolán uživatelem {interaction.user.name} ({len(rows)} výsledků)")
+
+
+async def setup(bot):
+    """Funkce pro načtení cog"""
+    await bot.add_cog(Search(bot))
@@ -5,68 +5,663 @@ Správa členů ve vláknech - hromadné odebírání podle výběru nebo rolí
 import discord
 from discord import app_commands
 from discord.ext import commands
+import asyncio
+import io
 import logging
-from typing import List
+import time
+import weakref
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from config import (
+    THREAD_REMOVE_CONCURRENCY, THREAD_MEMBER_CACHE_SIZE, THREAD_JOBS_DB,
+    ACTIVITY_DB, ACTIVITY_FLUSH_INTERVAL
+)
+from utils.activity_store import ActivityTracker
+from utils.job_store import JobStore, TARGET_DONE, TARGET_FAILED
+from utils.member_index import RoleIndex
+from utils.name_search import NameSearchIndex
+from utils.rate_limit import RateLimitedRunner
 
 logger = logging.getLogger('discord_bot')
 
+PROGRESS_INTERVAL = 2  # Minimální odstup (s) mezi úpravami progress embedu
+CHECKPOINT_BATCH = 50  # Po kolika výsledcích se průběh ukládá do JobStore
+EMBED_FIELD_LIMIT = 1024  # Discord limit délky hodnoty pole v embedu
+
+
+def format_name_list(names: List[str], limit: int = EMBED_FIELD_LIMIT) -> str:
+    """Vypíše jména odrážkami, kolik se jich vejde do pole embedu"""
+    lines = []
+    length = 0
+    for i, name in enumerate(names):
+        line = f"• {name}"
+        suffix = f"\n... a dalších {len(names) - i}"
+        if length + len(line) + 1 + len(suffix) > limit:
+            lines.append(suffix.strip())
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+class BulkRemovalJob:
+    """
+    Hromadné odebrání členů z vláken běžící na pozadí.
+    Cíle i průběh jsou uložené v JobStore, takže operace přežije restart bota.
+    Průběh se zapisuje do zprávy s menu přes bot token (interaction token po 15 minutách vyprší),
+    embed se upravuje nejvýš jednou za PROGRESS_INTERVAL sekund.
+    """
+    
+    def __init__(self, store: JobStore, job_id: int, guild: discord.Guild, threads: Dict[int, discord.Thread]):
+        job = store.get_job(job_id)
+        self.store = store
+        self.job_id = job_id
+        self.guild = guild
+        self.threads = threads
+        self.title = job['title']
+        self.author_name = job['author_name']
+        
+        counts = store.counts(job_id)
+        self.total = sum(counts.values())
+        self.removed_count = counts[TARGET_DONE]
+        self.failed_count = counts[TARGET_FAILED]
+        self._unsaved: List[Tuple[int, int, int, Optional[str]]] = []
+        self._unarchive_locks: Dict[int, asyncio.Lock] = {}
+        self._rearchive: Set[int] = set()  # Vlákna odarchivovaná kvůli odebrání
+        self.started_at = time.monotonic()
+    
+    @property
+    def processed(self) -> int:
+        return self.removed_count + self.failed_count
+    
+    def member_name(self, member_id: int) -> str:
+        """Jméno člena pro výpis (člen už nemusí být v cache)"""
+        member = self.guild.get_member(member_id)
+        return member.display_name if member else f"ID {member_id}"
+    
+    def target_name(self, thread_id: int, member_id: int) -> str:
+        """Jméno člena, u operací nad více vlákny i s názvem vlákna"""
+        name = self.member_name(member_id)
+        if len(self.threads) > 1:
+            thread = self.threads.get(thread_id)
+            name += f" ({thread.name if thread else thread_id})"
+        return name
+    
+    async def _remove(self, target: Tuple[int, int]):
+        thread_id, member_id = target
+        thread = self.threads.get(thread_id)
+        if thread is None:
+            raise LookupError("Vlákno nebylo nalezeno")
+        if thread.archived:
+            thread = await self._ensure_unarchived(thread)
+        await thread.remove_user(discord.Object(id=member_id))
+    
+    async def _ensure_unarchived(self, thread: discord.Thread) -> discord.Thread:
+        """Z archivovaného vlákna nejde odebírat - odarchivuje ho (jednou i při souběžných voláních)"""
+        lock = self._unarchive_locks.setdefault(thread.id, asyncio.Lock())
+        async with lock:
+            current = self.threads.get(thread.id, thread)
+            if not current.archived:
+                return current
+            current = await current.edit(archived=False)
+            self.threads[thread.id] = current
+            self._rearchive.add(thread.id)
+            return current
+    
+    async def _rearchive_threads(self):
+        """Vrátí do archivu vlákna která operace odarchivovala"""
+        for thread_id in self._rearchive:
+            thread = self.threads.get(thread_id)
+            if thread is None:
+                continue
+            try:
+                await thread.edit(archived=True)
+            except discord.HTTPException as e:
+                logger.warning(f"Vlákno {thread.name} se nepodařilo znovu archivovat: {e}")
+        self._rearchive.clear()
+    
+    def _on_done(self, target: Tuple[int, int], error: Exception):
+        thread_id, member_id = target
+        if error is None:
+            self.removed_count += 1
+            self._unsaved.append((thread_id, member_id, TARGET_DONE, None))
+        else:
+            self.failed_count += 1
+            self._unsaved.append((thread_id, member_id, TARGET_FAILED, str(error)))
+            logger.error(f"Chyba při odebírání {member_id} z vlákna {thread_id}: {error}")
+        if len(self._unsaved) >= CHECKPOINT_BATCH:
+            self.checkpoint()
+    
+    def checkpoint(self):
+        """Uloží dosud neuložené výsledky jednou transakcí"""
+        results, self._unsaved = self._unsaved, []
+        self.store.checkpoint(self.job_id, results)
+    
+    async def run(self, runner: RateLimitedRunner, message: Optional[discord.abc.Messageable]):
+        """Zpracuje zbývající cíle a průběžně aktualizuje zprávu (None = bez zprávy o průběhu)"""
+        targets = self.store.pending_targets(self.job_id)
+        progress_task = asyncio.create_task(self._progress_loop(message)) if message is not None else None
+        try:
+            await runner.map(self._remove, targets, on_done=self._on_done)
+        finally:
+            if progress_task is not None:
+                progress_task.cancel()
+            self.checkpoint()
+        self.store.finish(self.job_id)
+        await self._rearchive_threads()
+        
+        if message is not None:
+            embed, file = self.build_result()
+            try:
+                await message.edit(embed=embed, attachments=[file] if file else [], view=None)
+            except discord.HTTPException as e:
+                logger.warning(f"Nepodařilo se upravit výsledek hromadného odebrání: {e}")
+        
+        logger.info(
+            f"Operace #{self.job_id} '{self.title}' dokončena (spustil {self.author_name}): "
+            f"odebráno {self.removed_count}, selhalo {self.failed_count}, {time.monotonic() - self.started_at:.1f}s"
+        )
+    
+    async def _progress_loop(self, message: discord.abc.Messageable):
+        last_processed = self.processed
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            if self.processed == last_processed:
+                continue
+            last_processed = self.processed
+            try:
+                await message.edit(embed=self.build_progress_embed())
+            except discord.HTTPException as e:
+                logger.warning(f"Nepodařilo se aktualizovat průběh odebírání: {e}")
+    
+    def build_progress_embed(self) -> discord.Embed:
+        """Embed s aktuálním průběhem"""
+        embed = discord.Embed(
+            title=f"⏳ {self.title}",
+            description=(
+                f"Zpracováno **{self.processed}/{self.total}**\n"
+                f"✅ Odebráno: {self.removed_count} • ❌ Selhalo: {self.failed_count}"
+            ),
+            color=discord.Color.blue()
+        )
+        embed.set_footer(
+            text=f"Operace #{self.job_id} • Běží {int(time.monotonic() - self.started_at)}s • Spustil: {self.author_name}"
+        )
+        return embed
+    
+    def build_result(self) -> Tuple[discord.Embed, Optional[discord.File]]:
+        """Výsledný embed a (pokud je co vypsat) soubor s kompletním seznamem"""
+        embed = discord.Embed(
+            title=f"✅ {self.title}",
+            color=discord.Color.green() if not self.failed_count else discord.Color.orange()
+        )
+        embed.set_footer(text=f"Operace #{self.job_id} • Spustil: {self.author_name}")
+        
+        done, failed = self.store.results(self.job_id)
+        removed_names = [self.target_name(thread_id, member_id) for thread_id, member_id in done]
+        failed_lines = [f"{self.target_name(thread_id, member_id)}: {error}" for thread_id, member_id, error in failed]
+        
+        if removed_names:
+            embed.add_field(
+                name=f"✅ Úspěšně odebráno ({len(removed_names)})",
+                value=format_name_list(removed_names),
+                inline=False
+            )
+        
+        if failed_lines:
+            embed.add_field(
+                name=f"❌ Selhalo ({len(failed_lines)})",
+                value=format_name_list(failed_lines),
+                inline=False
+            )
+        
+        if not removed_names and not failed_lines:
+            return embed, None
+        
+        report = "\n".join(
+            [f"Odebráno ({len(removed_names)}):"] + removed_names +
+            ["", f"Selhalo ({len(failed_lines)}):"] + failed_lines
+        )
+        file = discord.File(io.BytesIO(report.encode('utf-8')), filename=f"odebrani_{self.job_id}.txt")
+        return embed, file
+
+
+class ThreadMemberCache:
+    """
+    Cache ID členů vláken udržovaná z gateway eventů (THREAD_MEMBERS_UPDATE).
+    REST fetch_members() se volá jen při cache miss, nejdéle nepoužitá vlákna se zahazují.
+    """
+    
+    def __init__(self, max_threads: int):
+        self.max_threads = max_threads
+        self._members: OrderedDict[int, Set[int]] = OrderedDict()
+        self._versions: Dict[int, int] = {}  # thread_id -> verze při poslední změně
+        self._counter = 0
+    
+    def _touch(self, thread_id: int):
+        self._counter += 1
+        self._versions[thread_id] = self._counter
+    
+    def version(self, thread_id: int) -> int:
+        """Verze členů vlákna - mění se při každé změně (pro znovupoužití snímků)"""
+        return self._versions.get(thread_id, 0)
+    
+    def get(self, thread_id: int) -> Optional[Set[int]]:
+        """Vrátí ID členů vlákna z cache, nebo None při cache miss"""
+        member_ids = self._members.get(thread_id)
+        if member_ids is not None:
+            self._members.move_to_end(thread_id)
+        return member_ids
+    
+    def store(self, thread_id: int, member_ids: Set[int]):
+        self._members[thread_id] = member_ids
+        self._members.move_to_end(thread_id)
+        self._touch(thread_id)
+        while len(self._members) > self.max_threads:
+            evicted_id, _ = self._members.popitem(last=False)
+            self._versions.pop(evicted_id, None)
+    
+    def add(self, thread_id: int, member_id: int):
+        member_ids = self._members.get(thread_id)
+        if member_ids is not None:
+            member_ids.add(member_id)
+            self._touch(thread_id)
+    
+    def discard(self, thread_id: int, member_id: int):
+        member_ids = self._members.get(thread_id)
+        if member_ids is not None:
+            member_ids.discard(member_id)
+            self._touch(thread_id)
+    
+    def invalidate(self, thread_id: int):
+        self._members.pop(thread_id, None)
+        self._versions.pop(thread_id, None)
+    
+    def clear(self):
+        """Zahodí celou cache (nová gateway session - změny z výpadku nepřišly)"""
+        self._members.clear()
+        self._versions.clear()
+    
+    async def get_member_ids(self, thread: discord.Thread, store: bool = True) -> Set[int]:
+        """
+        Vrátí ID členů vlákna, při cache miss je jednou načte přes REST.
+        
+        Args:
+            thread: Vlákno
+            store: Uložit načtené členy do cache (hromadné načtení kanálu je neukládá -
+                vytlačilo by aktivní vlákna a archivovaná by zastarala, gateway pro ně změny neposílá)
+        """
+        member_ids = self.get(thread.id)
+        if member_ids is None:
+            logger.info(f"Načítám členy vlákna {thread.name} pomocí fetch_members()...")
+            thread_members = await thread.fetch_members()
+            member_ids = {tm.id for tm in thread_members}
+            if store:
+                self.store(thread.id, member_ids)
+        return member_ids
+
+
+class ThreadSnapshot:
+    """
+    Snímek členů vlákna sdílený všemi views (i více moderátorů nad stejným vláknem).
+    Drží jen ID v kompaktním poli, Member objekty se dohledávají až pro zobrazenou stránku.
+    """
+    
+    def __init__(self, thread: discord.Thread, member_ids: Iterable[int], version: int = 0):
+        self.source = thread  # Spravované vlákno (u ChannelSnapshot nadřazený kanál)
+        self.guild = thread.guild
+        self.threads: Dict[int, discord.Thread] = {thread.id: thread}
+        self.member_ids = array('Q', member_ids)
+        self.version = version
+        self._role_index = None
+        self._search_index = None
+    
+    def __len__(self) -> int:
+        return len(self.member_ids)
+    
+    @property
+    def label(self) -> str:
+        """Popis zdroje ve 2. pádě pro texty v embedech"""
+        return f"vlákna **{self.source.name}**"
+    
+    def resolve(self, member_ids: Iterable[int]) -> List[Tuple[int, Optional[discord.Member]]]:
+        """Dohledá Member objekty pro zobrazená ID (člen mezitím mohl server opustit)"""
+        guild = self.guild
+        return [(member_id, guild.get_member(member_id)) for member_id in member_ids]
+    
+    def removal_targets(self, member_ids: Iterable[int]) -> List[Tuple[int, int]]:
+        """Páry (thread_id, member_id) pro odebrání vybraných členů"""
+        return [(self.source.id, member_id) for member_id in member_ids]
+    
+    def inactive_targets(self, activity: ActivityTracker, since: float) -> List[Tuple[int, int]]:
+        """Páry (thread_id, member_id) členů kteří od daného času nepsali"""
+        active = activity.active_since(self.source.id, since)
+        return [(self.source.id, member_id) for member_id in self.member_ids if member_id not in active]
+    
+    def tracked_since(self, activity: ActivityTracker) -> Optional[int]:
+        """Od kdy je aktivita sledovaná ve všech vláknech snímku (None = někde vůbec)"""
+        values = [activity.tracked_since(thread_id) for thread_id in self.threads]
+        if not values or None in values:
+            return None
+        return max(values)
+    
+    @property
+    def search_index(self) -> NameSearchIndex:
+        """Vyhledávací index jmen, postavený jednou pro celý snímek"""
+        if self._search_index is None:
+            guild = self.guild
+            entries = []
+            for member_id in self.member_ids:
+                member = guild.get_member(member_id)
+                if member:
+                    entries.append((member_id, (member.display_name, member.name)))
+            self._search_index = NameSearchIndex(entries)
+        return self._search_index
+    
+    @property
+    def role_index(self) -> RoleIndex:
+        """Index role -> členové, postavený jedním průchodem a sdílený všemi views"""
+        if self._role_index is None:
+            guild = self.guild
+            memberships = []
+            for member_id in self.member_ids:
+                member = guild.get_member(member_id)
+                if member:
+                    memberships.append((member_id, [role.id for role in member.roles if not role.is_default()]))
+            self._role_index = RoleIndex(memberships)
+        return self._role_index
+    
+    def roles_in_thread(self) -> List[discord.Role]:
+        """Role které má alespoň jeden člen vlákna"""
+        roles = map(self.guild.get_role, self.role_index.role_ids())
+        return [role for role in roles if role]
+
+
+class ChannelSnapshot(ThreadSnapshot):
+    """
+    Snímek členů všech vláken jednoho kanálu (aktivních i archivovaných).
+    member_ids jsou unikátní členové napříč vlákny, výběr se rozkládá na páry (vlákno, člen).
+    """
+    
+    def __init__(self, channel: discord.abc.GuildChannel, threads: List[discord.Thread], memberships: Dict[int, Iterable[int]]):
+        self.memberships = {thread_id: array('Q', ids) for thread_id, ids in memberships.items()}
+        # dict.fromkeys zachová pořadí a odstraní duplicity
+        super().__init__(channel, dict.fromkeys(m for ids in self.memberships.values() for m in ids))
+        self.threads = {thread.id: thread for thread in threads if thread.id in memberships}
+    
+    @property
+    def label(self) -> str:
+        return f"všech vláken kanálu **{self.source.name}**"
+    
+    @property
+    def membership_count(self) -> int:
+        """Počet členství celkem (člen ve více vláknech se počítá vícekrát)"""
+        return sum(len(ids) for ids in self.memberships.values())
+    
+    def removal_targets(self, member_ids: Iterable[int]) -> List[Tuple[int, int]]:
+        selected = set(member_ids)
+        return [
+            (thread_id, member_id)
+            for thread_id, ids in self.memberships.items()
+            for member_id in ids if member_id in selected
+        ]
+    
+    def inactive_targets(self, activity: ActivityTracker, since: float) -> List[Tuple[int, int]]:
+        active = activity.active_in_threads(list(self.memberships), since)
+        return [
+            (thread_id, member_id)
+            for thread_id, ids in self.memberships.items()
+            for member_id in ids if member_id not in active.get(thread_id, ())
+        ]
+
 
 class ThreadManager(commands.Cog):
     """Cog pro správu členů ve vláknech"""
     
     def __init__(self, bot):
         self.bot = bot
+        self.removal_runner = RateLimitedRunner(concurrency=THREAD_REMOVE_CONCURRENCY)
+        self.jobs: Set[asyncio.Task] = set()
+        self.job_store = JobStore(THREAD_JOBS_DB)
+        self.running_jobs: Dict[int, BulkRemovalJob] = {}
+        self.activity = ActivityTracker(ACTIVITY_DB)
+        self.member_cache = ThreadMemberCache(THREAD_MEMBER_CACHE_SIZE)
+        # Snímky žijí jen dokud na ně odkazuje nějaké otevřené view
+        self.snapshots: weakref.WeakValueDictionary[int, ThreadSnapshot] = weakref.WeakValueDictionary()
         logger.info("✅ Thread Manager Cog načten")
     
+    def get_snapshot(self, thread: discord.Thread, member_ids: Set[int]) -> ThreadSnapshot:
+        """Vrátí sdílený snímek vlákna, nový jen pokud se členové od minula změnili"""
+        version = self.member_cache.version(thread.id)
+        snapshot = self.snapshots.get(thread.id)
+        if snapshot is None or snapshot.version != version:
+            guild = thread.guild
+            human_ids = []
+            for member_id in member_ids:
+                member = guild.get_member(member_id)
+                if member and not member.bot:
+                    human_ids.append(member_id)
+            snapshot = ThreadSnapshot(thread, human_ids, version)
+            self.snapshots[thread.id] = snapshot
+        return snapshot
+    
+    def create_removal_job(
+        self,
+        threads: Dict[int, discord.Thread],
+        targets: Iterable[Tuple[int, int]],
+        author: discord.Member,
+        title: str,
+        message: discord.Message
+    ) -> BulkRemovalJob:
+        """Uloží novou operaci odebrání (cíle jsou páry thread_id, member_id)"""
+        guild = message.guild
+        job_id = self.job_store.create_job(
+            'remove', guild.id, message.channel.id, author.id, author.display_name, title, targets, message.id
+        )
+        return BulkRemovalJob(self.job_store, job_id, guild, threads)
+    
+    def start_removal_job(self, job: BulkRemovalJob, message: Optional[discord.abc.Messageable]):
+        """Spustí hromadné odebrání na pozadí (drží referenci na task)"""
+        task = asyncio.create_task(self._run_job(job, message))
+        self.running_jobs[job.job_id] = job
+        self.jobs.add(task)
+        task.add_done_callback(self.jobs.discard)
+    
+    async def _run_job(self, job: BulkRemovalJob, message: Optional[discord.abc.Messageable]):
+        try:
+            await job.run(self.removal_runner, message)
+        except asyncio.CancelledError:
+            logger.info(f"Operace #{job.job_id} přerušena - pokračuje po dalším startu")
+        except Exception as e:
+            logger.error(f"Chyba v hromadné operaci #{job.job_id}: {e}", exc_info=True)
+        finally:
+            self.running_jobs.pop(job.job_id, None)
+    
+    async def cog_load(self):
+        # Obnova operací přerušených restartem (čeká na READY)
+        self.resume_task = asyncio.create_task(self.resume_jobs())
+        self.activity_flush_task = asyncio.create_task(self.flush_activity_loop())
+    
+    async def cog_unload(self):
+        self.resume_task.cancel()
+        self.activity_flush_task.cancel()
+        for task in self.jobs:
+            task.cancel()
+        # Přerušené operace si v finally uloží checkpoint
+        await asyncio.gather(*self.jobs, return_exceptions=True)
+        self.job_store.close()
+        self.activity.close()
+    
+    async def flush_activity_loop(self):
+        """Periodicky zapisuje aktivitu členů z paměti do databáze"""
+        while True:
+            await asyncio.sleep(ACTIVITY_FLUSH_INTERVAL)
+            try:
+                written = self.activity.flush()
+                if written:
+                    logger.debug(f"Aktivita ve vláknech uložena ({written} záznamů)")
+            except Exception as e:
+                logger.error(f"Chyba při ukládání aktivity ve vláknech: {e}", exc_info=True)
+    
+    async def resume_jobs(self):
+        """Navázání na nedokončené operace z JobStore"""
+        await self.bot.wait_until_ready()
+        for row in self.job_store.unfinished_jobs():
+            if row['id'] in self.running_jobs:
+                continue
+            try:
+                await self._resume_job(row)
+            except Exception as e:
+                logger.error(f"Nepodařilo se obnovit operaci #{row['id']}: {e}", exc_info=True)
+    
+    async def _resume_job(self, row):
+        guild = self.bot.get_guild(row['guild_id'])
+        if guild is None:
+            logger.warning(f"Operace #{row['id']}: server {row['guild_id']} není dostupný, ukončuji ji")
+            self.job_store.finish(row['id'])
+            return
+        
+        # Vlákna mohla být mezitím archivovaná - ty nejsou v cache a musí se načíst
+        threads = {}
+        for thread_id in {thread_id for thread_id, _ in self.job_store.pending_targets(row['id'])}:
+            thread = guild.get_thread(thread_id)
+            if thread is None:
+                try:
+                    thread = await guild.fetch_channel(thread_id)
+                except discord.HTTPException as e:
+                    logger.warning(f"Operace #{row['id']}: vlákno {thread_id} nelze načíst: {e}")
+                    continue
+            threads[thread_id] = thread
+        
+        channel = self.bot.get_channel(row['channel_id']) or threads.get(row['channel_id'])
+        if channel is None:
+            try:
+                channel = await self.bot.fetch_channel(row['channel_id'])
+            except discord.HTTPException as e:
+                # Kanál se zprávou o průběhu byl smazán - operace doběhne bez ní, jinak by se obnovovala donekonečna
+                logger.warning(f"Operace #{row['id']}: kanál {row['channel_id']} se zprávou o průběhu nelze načíst ({e}), pokračuji bez ní")
+        message = channel.get_partial_message(row['message_id']) if channel is not None else None
+        
+        job = BulkRemovalJob(self.job_store, row['id'], guild, threads)
+        logger.info(f"Obnovuji operaci #{job.job_id} '{job.title}' ({job.processed}/{job.total} hotovo)")
+        self.start_removal_job(job, message)
+    
+    # ====================
+    # UDRŽOVÁNÍ CACHE ČLENŮ VLÁKEN
+    # ====================
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Nová session (RESUME se nepovedl) - změny členů během výpadku se nedoručily
+        self.member_cache.clear()
+    
+    @commands.Cog.listener()
+    async def on_standby_end(self):
+        # V pohotovosti se eventy členů vláken zahazovaly
+        self.member_cache.clear()
+    
+    @commands.Cog.listener()
+    async def on_thread_member_join(self, member: discord.ThreadMember):
+        self.member_cache.add(member.thread_id, member.id)
+    
+    @commands.Cog.listener()
+    async def on_thread_member_remove(self, member: discord.ThreadMember):
+        self.member_cache.discard(member.thread_id, member.id)
+    
+    @commands.Cog.listener()
+    async def on_raw_thread_member_remove(self, payload: discord.RawThreadMembersUpdate):
+        # Pokrývá i členy které discord.py neměl v cache vlákna
+        for member_id in payload.data.get('removed_member_ids', []):
+            self.member_cache.discard(payload.thread_id, int(member_id))
+    
+    @commands.Cog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        # Pro archivovaná vlákna gateway změny členů neposílá
+        if after.archived:
+            self.member_cache.invalidate(after.id)
+    
+    @commands.Cog.listener()
+    async def on_thread_remove(self, thread: discord.Thread):
+        self.member_cache.invalidate(thread.id)
+    
+    @commands.Cog.listener()
+    async def on_thread_delete(self, thread: discord.Thread):
+        self.member_cache.invalidate(thread.id)
+    
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        self.member_cache.invalidate(payload.thread_id)
+        self.activity.forget_thread(payload.thread_id)
+    
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        # Jen zápis do slovníku - do databáze se ukládá dávkově
+        if isinstance(message.channel, discord.Thread) and not message.author.bot:
+            self.activity.record(message.channel.id, message.author.id, message.created_at.timestamp())
+    
     @app_commands.command(name='thread_manage', description='Správa členů vlákna - hromadné odebírání')
+    @app_commands.describe(kanal='Spravovat všechna vlákna tohoto kanálu/fóra (jinak aktuální vlákno)')
     @app_commands.checks.has_permissions(manage_threads=True)
-    async def thread_manage(self, interaction: discord.Interaction):
-        """Spustí správu členů aktuálního vlákna. Musí být vyvolán VE VLÁKNĚ!"""
+    async def thread_manage(
+        self,
+        interaction: discord.Interaction,
+        kanal: Optional[Union[discord.TextChannel, discord.ForumChannel]] = None
+    ):
+        """Spustí správu členů aktuálního vlákna, nebo všech vláken kanálu zadaného parametrem kanal."""
+        if kanal is not None:
+            # has_permissions kontroluje jen kanál kde byl příkaz vyvolán, ne cílový kanál
+            if not kanal.permissions_for(interaction.user).manage_threads:
+                await interaction.response.send_message(
+                    f"❌ Nemáš oprávnění Manage Threads v kanálu **{kanal.name}**!",
+                    ephemeral=True
+                )
+                return
+            if not kanal.permissions_for(interaction.guild.me).manage_threads:
+                await interaction.response.send_message(
+                    f"❌ Bot nemá oprávnění Manage Threads v kanálu **{kanal.name}**!",
+                    ephemeral=True
+                )
+                return
+            await self.manage_channel(interaction, kanal)
+            return
+        
         # Kontrola zda jsme ve vlákně
         if not isinstance(interaction.channel, discord.Thread):
             await interaction.response.send_message(
-                "❌ Tento příkaz funguje pouze ve vláknech!",
+                "❌ Tento příkaz funguje pouze ve vláknech! Pro všechna vlákna kanálu zadej parametr `kanal`.",
                 ephemeral=True
             )
             return
         
         thread = interaction.channel
         
-        await interaction.response.defer()  # Může trvat déle
+        # Při cache miss se členové načítají přes REST - může trvat déle
+        if self.member_cache.get(thread.id) is None:
+            await interaction.response.defer()
+        send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
         
-        # Získej VŠECHNY členy vlákna pomocí správného API
-        # thread.fetch_members() vrací seznam ThreadMember objektů
         try:
-            logger.info(f"Načítám členy vlákna {thread.name} pomocí fetch_members()...")
-            
-            # fetch_members() je async metoda která vrací LIST ThreadMember objektů
-            thread_members = await thread.fetch_members()
-            
-            # Převeď ThreadMember na Member objekty
-            members = []
-            for tm in thread_members:
-                # ThreadMember má atribut .id, získej plný Member z guild
-                member = thread.guild.get_member(tm.id)
-                if member and not member.bot:
-                    members.append(member)
+            member_ids = await self.member_cache.get_member_ids(thread)
+            snapshot = self.get_snapshot(thread, member_ids)
             
-            logger.info(f"Nalezeno {len(members)} členů ve vlákně {thread.name} (celkem {len(thread_members)} včetně botů)")
+            logger.info(f"Nalezeno {len(snapshot)} členů ve vlákně {thread.name} (celkem {len(member_ids)} včetně botů)")
             
         except Exception as e:
             logger.error(f"Chyba při načítání členů vlákna: {e}", exc_info=True)
-            await interaction.followup.send(f"❌ Chyba při načítání členů: {str(e)}")
+            await send(f"❌ Chyba při načítání členů: {str(e)}")
             return
         
-        if not members:
-            await interaction.followup.send("❌ Ve vlákně nejsou žádní členové (kromě botů)!")
+        if not len(snapshot):
+            await send("❌ Ve vlákně nejsou žádní členové (kromě botů)!")
             return
         
         # Vytvoř hlavní view s výběrem módu
-        view = ThreadManagerView(thread, members, interaction.user)
+        view = ThreadManagerView(self, snapshot, interaction.user)
         
         embed = discord.Embed(
             title="🧵 Správa vlákna",
-            description=f"**Vlákno:** {thread.name}\n**Členů:** {len(members)}",
+            description=f"**Vlákno:** {thread.name}\n**Členů:** {len(snapshot)}",
             color=discord.Color.blue()
         )
         embed.add_field(
@@ -74,23 +669,148 @@ class ThreadManager(commands.Cog):
             value=(
                 "• **Správa členů** - Vyber členy k odebrání\n"
                 "• **Podle rolí** - Odeber všechny s určitou rolí\n"
+                "• **Neaktivní** - Odeber ty kdo nepsali N dní\n"
                 "• **Info** - Zobraz detaily o vláku"
             ),
             inline=False
         )
         embed.set_footer(text=f"Vyvoláno uživatelem: {interaction.user.display_name}")
         
-        await interaction.followup.send(embed=embed, view=view)
+        await send(embed=embed, view=view)
         logger.info(f"/thread_manage vyvolán ve vlákně {thread.name} ({thread.id}) uživatelem {interaction.user.name}")
+    
+    async def collect_threads(self, channel: Union[discord.TextChannel, discord.ForumChannel]) -> List[discord.Thread]:
+        """Aktivní i archivovaná vlákna kanálu (bez duplicit)"""
+        threads = {thread.id: thread for thread in channel.threads}
+        async for thread in channel.archived_threads(limit=None):
+            threads.setdefault(thread.id, thread)
+        if isinstance(channel, discord.TextChannel):
+            try:
+                async for thread in channel.archived_threads(limit=None, private=True):
+                    threads.setdefault(thread.id, thread)
+            except discord.Forbidden:
+                logger.warning(f"Bez oprávnění k soukromým archivovaným vláknům kanálu {channel.name}")
+        return list(threads.values())
+    
+    async def manage_channel(
+        self,
+        interaction: discord.Interaction,
+        channel: Union[discord.TextChannel, discord.ForumChannel]
+    ):
+        """Správa členů napříč všemi vlákny kanálu"""
+        await interaction.response.defer()
+        started = time.monotonic()
+        
+        try:
+            threads = await self.collect_threads(channel)
+            fetched: Dict[int, Set[int]] = {}
+            
+            async def fetch_members(thread: discord.Thread):
+                fetched[thread.id] = await self.member_cache.get_member_ids(thread, store=False)
+            
+            # Členové vláken se načítají souběžně přes sdílený runner (stejný limit jako odebírání)
+            _, failed = await self.removal_runner.map(fetch_members, threads)
+        except Exception as e:
+            logger.error(f"Chyba při načítání vláken kanálu {channel.name}: {e}", exc_info=True)
+            await interaction.followup.send(f"❌ Chyba při načítání vláken: {str(e)}")
+            return
+        
+        guild = channel.guild
+        memberships = {}
+        for thread_id, member_ids in fetched.items():
+            human_ids = []
+            for member_id in member_ids:
+                member = guild.get_member(member_id)
+                if member and not member.bot:
+                    human_ids.append(member_id)
+            if human_ids:
+                memberships[thread_id] = human_ids
+        snapshot = ChannelSnapshot(channel, threads, memberships)
+        
+        logger.info(
+            f"Kanál {channel.name}: {len(threads)} vláken, {len(snapshot)} unikátních členů, "
+            f"{snapshot.membership_count} členství ({len(failed)} vláken selhalo, {time.monotonic() - started:.1f}s)"
+        )
+        
+        if not len(snapshot):
+            await interaction.followup.send(f"❌ Ve vláknech kanálu **{channel.name}** nejsou žádní členové (kromě botů)!")
+            return
+        
+        view = ThreadManagerView(self, snapshot, interaction.user)
+        
+        embed = discord.Embed(
+            title="🧵 Správa kanálu",
+            description=(
+                f"**Kanál:** {channel.name}\n"
+                f"**Vláken:** {len(threads)}\n"
+                f"**Unikátních členů:** {len(snapshot)}\n"
+                f"**Členství celkem:** {snapshot.membership_count}"
+            ),
+            color=discord.Color.blue()
+        )
+        if failed:
+            embed.add_field(
+                name="⚠️ Nenačteno",
+                value=format_name_list([thread.name for thread, _ in failed]),
+                inline=False
+            )
+        embed.add_field(
+            name="📋 Možnosti",
+            value=(
+                "• **Správa členů** - Vyber členy k odebrání ze všech vláken\n"
+                "• **Podle rolí** - Odeber všechny s určitou rolí\n"
+                "• **Neaktivní** - Odeber z každého vlákna ty kdo v něm nepsali N dní\n"
+                "• **Info** - Zobraz detaily o kanálu"
+            ),
+            inline=False
+        )
+        embed.set_footer(text=f"Vyvoláno uživatelem: {interaction.user.display_name}")
+        
+        await interaction.followup.send(embed=embed, view=view)
+        logger.info(f"/thread_manage vyvolán pro kanál {channel.name} ({channel.id}) uživatelem {interaction.user.name}")
+    
+    @app_commands.command(name='thread_jobs', description='Stav hromadných operací ve vláknech')
+    @app_commands.checks.has_permissions(manage_threads=True)
+    async def thread_jobs(self, interaction: discord.Interaction):
+        """Zobrazí běžící a čekající (přerušené) hromadné operace na tomto serveru."""
+        rows = [row for row in self.job_store.unfinished_jobs() if row['guild_id'] == interaction.guild_id]
+        
+        embed = discord.Embed(
+            title="🧵 Hromadné operace",
+            description="Žádné nedokončené operace" if not rows else f"Nedokončených operací: {len(rows)}",
+            color=discord.Color.blue()
+        )
+        
+        for row in rows[:25]:  # Discord limit polí v embedu
+            job = self.running_jobs.get(row['id'])
+            if job:
+                state = "▶️ Běží"
+                processed, failed, total = job.processed, job.failed_count, job.total
+            else:
+                state = "⏸️ Čeká na obnovení"
+                counts = self.job_store.counts(row['id'])
+                processed = counts[TARGET_DONE] + counts[TARGET_FAILED]
+                failed, total = counts[TARGET_FAILED], sum(counts.values())
+            embed.add_field(
+                name=f"#{row['id']} {row['title'][:200]}",
+                value=(
+                    f"{state} • <#{row['channel_id']}>\n"
+                    f"Zpracováno {processed}/{total} (❌ {failed})\n"
+                    f"Spustil {row['author_name']} <t:{int(row['created_at'])}:R>"
+                ),
+                inline=False
+            )
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
 class ThreadManagerView(discord.ui.View):
     """Hlavní view pro výběr módu správy"""
     
-    def __init__(self, thread: discord.Thread, members: List[discord.Member], author: discord.Member):
+    def __init__(self, manager: ThreadManager, snapshot: ThreadSnapshot, author: discord.Member):
         super().__init__(timeout=300)  # 5 minut timeout
-        self.thread = thread
-        self.members = members
+        self.manager = manager
+        self.snapshot = snapshot
         self.author = author
     
     @discord.ui.button(label="📋 Správa členů", style=discord.ButtonStyle.primary)
@@ -105,16 +825,16 @@ class ThreadManagerView(discord.ui.View):
             return
         
         # Vytvoř view s členy
-        view = MemberSelectorView(self.thread, self.members, self.author)
+        view = MemberSelectorView(self.manager, self.snapshot, self.author)
         
         embed = discord.Embed(
             title="📋 Výběr členů k odebrání",
-            description=f"Vyber členy které chceš odebrat z vlákna **{self.thread.name}**",
+            description=f"Vyber členy které chceš odebrat z {self.snapshot.label}",
             color=discord.Color.orange()
         )
         embed.add_field(
             name="📊 Statistiky",
-            value=f"Celkem členů: {len(self.members)}",
+            value=f"Celkem členů: {len(self.snapshot)}",
             inline=False
         )
         embed.set_footer(text="Vyber členy a klikni na 'Odebrat vybrané'")
@@ -131,12 +851,8 @@ class ThreadManagerView(discord.ui.View):
             )
             return
         
-        # Získej všechny role členů vlákna
-        roles_in_thread = set()
-        for member in self.members:
-            for role in member.roles:
-                if role.name != "@everyone":  # Ignoruj @everyone
-                    roles_in_thread.add(role)
+        # Získej všechny role členů vlákna (z indexu)
+        roles_in_thread = self.snapshot.roles_in_thread()
         
         if not roles_in_thread:
             await interaction.response.send_message(
@@ -146,19 +862,17 @@ class ThreadManagerView(discord.ui.View):
             return
         
         # Vytvoř view s výběrem rolí
-        view = RoleSelectorView(self.thread, self.members, list(roles_in_thread), self.author)
+        view = RoleSelectorView(self.manager, self.snapshot, roles_in_thread, self.author)
         
         embed = discord.Embed(
             title="🎭 Odebrání podle rolí",
-            description=f"Vyber role - všichni členové s těmito rolemi budou odebráni z vlákna **{self.thread.name}**",
+            description=f"Vyber role - všichni členové s těmito rolemi budou odebráni z {self.snapshot.label}",
             color=discord.Color.purple()
         )
         
         # Statistika rolí
-        role_stats = {}
-        for role in roles_in_thread:
-            count = sum(1 for m in self.members if role in m.roles)
-            role_stats[role.name] = count
+        role_index = self.snapshot.role_index
+        role_stats = {role.name: role_index.count(role.id) for role in roles_in_thread}
         
         stats_text = "\n".join([f"• {name}: {count} členů" for name, count in sorted(role_stats.items())])
         embed.add_field(
@@ -180,25 +894,25 @@ class ThreadManagerView(discord.ui.View):
             return
         
         embed = discord.Embed(
-            title=f"📊 Info o vlákně: {self.thread.name}",
+            title=f"📊 Info: {self.snapshot.source.name}",
             color=discord.Color.blue()
         )
         
         # Základní info
-        embed.add_field(name="🆔 ID", value=f"`{self.thread.id}`", inline=True)
-        embed.add_field(name="👥 Členů", value=str(len(self.members)), inline=True)
+        source = self.snapshot.source
+        embed.add_field(name="🆔 ID", value=f"`{source.id}`", inline=True)
+        embed.add_field(name="👥 Členů", value=str(len(self.snapshot)), inline=True)
         embed.add_field(
             name="📅 Vytvořeno",
-            value=f"<t:{int(self.thread.created_at.timestamp())}:R>",
+            value=f"<t:{int(source.created_at.timestamp())}:R>",
             inline=True
         )
+        if isinstance(self.snapshot, ChannelSnapshot):
+            embed.add_field(name="🧵 Vláken", value=str(len(self.snapshot.threads)), inline=True)
+            embed.add_field(name="🔗 Členství celkem", value=str(self.snapshot.membership_count), inline=True)
         
         # Role ve vlákně
-        roles_in_thread = set()
-        for member in self.members:
-            for role in member.roles:
-                if role.name != "@everyone":
-                    roles_in_thread.add(role.name)
+        roles_in_thread = [role.name for role in self.snapshot.roles_in_thread()]
         
         if roles_in_thread:
             embed.add_field(
@@ -208,9 +922,9 @@ class ThreadManagerView(discord.ui.View):
             )
         
         # Seznam členů (prvních 20)
-        member_list = [m.display_name for m in self.members[:20]]
-        if len(self.members) > 20:
-            member_list.append(f"... a dalších {len(self.members) - 20}")
+        member_list = [m.display_name if m else f"ID {mid}" for mid, m in self.snapshot.resolve(self.snapshot.member_ids[:20])]
+        if len(self.snapshot) > 20:
+            member_list.append(f"... a dalších {len(self.snapshot) - 20}")
         
         embed.add_field(
             name="👥 Členové",
@@ -219,21 +933,157 @@ class ThreadManagerView(discord.ui.View):
         )
         
         await interaction.response.edit_message(embed=embed, view=self)
+    
+    @discord.ui.button(label="💤 Neaktivní", style=discord.ButtonStyle.secondary)
+    async def inactive_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Odeber členy kteří ve vlákně dlouho nepsali"""
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message(
+                "❌ Pouze uživatel který vyvolal příkaz může používat toto menu!",
+                ephemeral=True
+            )
+            return
+        
+        await interaction.response.send_modal(InactiveDaysModal(self.manager, self.snapshot, self.author))
+
+
+class InactiveDaysModal(discord.ui.Modal, title="Odebrat neaktivní členy"):
+    """Formulář pro zadání počtu dní neaktivity"""
+    
+    days = discord.ui.TextInput(
+        label="Počet dní bez zprávy ve vlákně",
+        placeholder="např. 30",
+        max_length=4,
+        required=True
+    )
+    
+    def __init__(self, manager: ThreadManager, snapshot: ThreadSnapshot, author: discord.Member):
+        super().__init__()
+        self.manager = manager
+        self.snapshot = snapshot
+        self.author = author
+    
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            days = int(self.days.value)
+            if days <= 0:
+                raise ValueError
+        except ValueError:
+            await interaction.response.send_message("❌ Zadej kladný počet dní!", ephemeral=True)
+            return
+        
+        since = time.time() - days * 86400
+        targets = self.snapshot.inactive_targets(self.manager.activity, since)
+        inactive_ids = list(dict.fromkeys(member_id for _, member_id in targets))
+        
+        if not inactive_ids:
+            await interaction.response.send_message(f"✅ Všichni členové psali za posledních {days} dní!", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="💤 Neaktivní členové",
+            description=f"**{len(inactive_ids)}** z {len(self.snapshot)} členů {self.snapshot.label} nepsalo posledních {days} dní.",
+            color=discord.Color.orange()
+        )
+        
+        tracked_since = self.snapshot.tracked_since(self.manager.activity)
+        if tracked_since is None or tracked_since > since:
+            embed.add_field(
+                name="⚠️ Pozor",
+                value=(
+                    f"Aktivita se sleduje až od <t:{tracked_since}:R>."
+                    if tracked_since else "Aktivita se zde (nebo v některém vlákně) zatím nesleduje."
+                ) + " Členové bez záznamu se počítají jako neaktivní.",
+                inline=False
+            )
+        
+        names = [m.display_name if m else f"ID {mid}" for mid, m in self.snapshot.resolve(inactive_ids[:50])]
+        if len(inactive_ids) > 50:
+            names.append(f"... a dalších {len(inactive_ids) - 50}")
+        embed.add_field(name="👥 Budou odebráni", value=format_name_list(names), inline=False)
+        
+        view = InactiveRemovalView(self.manager, self.snapshot, targets, days, self.author)
+        await interaction.response.edit_message(embed=embed, view=view)
+
+
+class InactiveRemovalView(discord.ui.View):
+    """Potvrzení odebrání neaktivních členů"""
+    
+    def __init__(self, manager: ThreadManager, snapshot: ThreadSnapshot, targets: List[Tuple[int, int]], days: int, author: discord.Member):
+        super().__init__(timeout=300)
+        self.manager = manager
+        self.snapshot = snapshot
+        self.targets = targets
+        self.days = days
+        self.author = author
+    
+    @discord.ui.button(label="🗑️ Odebrat neaktivní", style=discord.ButtonStyle.danger)
+    async def remove_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message("❌ Pouze původní uživatel!", ephemeral=True)
+            return
+        
+        # Odeber členy na pozadí - průběh se zapisuje do této zprávy
+        job = self.manager.create_removal_job(
+            self.snapshot.threads,
+            self.targets,
+            self.author,
+            f"Odebráni neaktivní členové ({self.days} dní)",
+            interaction.message
+        )
+        await interaction.response.edit_message(embed=job.build_progress_embed(), view=None)
+        self.manager.start_removal_job(job, interaction.message)
+    
+    @discord.ui.button(label="❌ Zrušit", style=discord.ButtonStyle.secondary)
+    async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message("❌ Pouze původní uživatel!", ephemeral=True)
+            return
+        await interaction.response.edit_message(content="❌ Operace zrušena", embed=None, view=None)
 
 
 class MemberSelectorView(discord.ui.View):
     """View pro výběr členů k odebrání"""
     
-    def __init__(self, thread: discord.Thread, members: List[discord.Member], author: discord.Member):
+    def __init__(self, manager: ThreadManager, snapshot: ThreadSnapshot, author: discord.Member):
         super().__init__(timeout=300)
-        self.thread = thread
-        self.members = members
+        self.manager = manager
+        self.snapshot = snapshot
         self.author = author
+        self.member_ids = snapshot.member_ids  # Celý snímek, nebo výsledky hledání
+        self.search_query = None
         self.current_page = 0
         self.members_per_page = 25  # Discord limit pro select menu
         
         self.setup_select()
     
+    def apply_search(self, query: Optional[str]) -> int:
+        """Omezí seznam na výsledky hledání (None = zpět na všechny), vrátí počet výsledků"""
+        if query:
+            results = self.snapshot.search_index.search(query, limit=len(self.snapshot))
+            if not results:
+                return 0
+            self.member_ids = array('Q', results)
+        else:
+            self.member_ids = self.snapshot.member_ids
+        self.search_query = query
+        self.current_page = 0
+        self.selected_member_ids = []
+        self.setup_select()
+        return len(self.member_ids)
+    
+    @staticmethod
+    def member_option(member_id: int, member: Optional[discord.Member]) -> discord.SelectOption:
+        """Položka select menu pro člena (člen mezitím mohl opustit server)"""
+        if member is None:
+            return discord.SelectOption(label=f"ID {member_id}", description="Není na serveru", value=str(member_id), emoji="👤")
+        return discord.SelectOption(
+            label=member.display_name,
+            description=f"@{member.name}" + (f" • {len(member.roles)-1} rolí" if len(member.roles) > 1 else ""),
+            value=str(member_id),
+            emoji="👤"
+        )
+    
     def setup_select(self):
         """Nastav select menu s členy"""
         # Vyčisti staré komponenty
@@ -241,23 +1091,18 @@ class MemberSelectorView(discord.ui.View):
         
         # Vypočítej stránkování
         start_idx = self.current_page * self.members_per_page
-        end_idx = min(start_idx + self.members_per_page, len(self.members))
-        page_members = self.members[start_idx:end_idx]
+        end_idx = min(start_idx + self.members_per_page, len(self.member_ids))
+        page_members = self.snapshot.resolve(self.member_ids[start_idx:end_idx])  # Member objekty jen pro tuto stránku
         
         # Vytvoř select s členy
+        placeholder = f"Vyber členy k odebrání (stránka {self.current_page + 1})"
+        if self.search_query:
+            placeholder = f"Výsledky pro „{self.search_query[:40]}“ (stránka {self.current_page + 1})"
         select = discord.ui.Select(
-            placeholder=f"Vyber členy k odebrání (stránka {self.current_page + 1})",
+            placeholder=placeholder,
             min_values=0,
             max_values=len(page_members),
-            options=[
-                discord.SelectOption(
-                    label=member.display_name,
-                    description=f"@{member.name}" + (f" • {len(member.roles)-1} rolí" if len(member.roles) > 1 else ""),
-                    value=str(member.id),
-                    emoji="👤"
-                )
-                for member in page_members
-            ]
+            options=[self.member_option(member_id, member) for member_id, member in page_members]
         )
         
         async def select_callback(interaction: discord.Interaction):
@@ -276,7 +1121,7 @@ class MemberSelectorView(discord.ui.View):
         self.add_item(select)
         
         # Navigační tlačítka pokud je více stránek
-        total_pages = (len(self.members) + self.members_per_page - 1) // self.members_per_page
+        total_pages = (len(self.member_ids) + self.members_per_page - 1) // self.members_per_page
         
         if total_pages > 1:
             # Předchozí stránka
@@ -331,44 +1176,16 @@ class MemberSelectorView(discord.ui.View):
                 await interaction.response.send_message("❌ Nevybral jsi žádné členy!", ephemeral=True)
                 return
             
-            await interaction.response.defer()
-            
-            # Odeber vybrané členy
-            removed = []
-            failed = []
-            
-            for member_id in self.selected_member_ids:
-                member = self.thread.guild.get_member(member_id)
-                if member:
-                    try:
-                        await self.thread.remove_user(member)
-                        removed.append(member.display_name)
-                    except Exception as e:
-                        failed.append(f"{member.display_name}: {str(e)}")
-                        logger.error(f"Chyba při odebírání {member.name}: {e}")
-            
-            # Výsledný embed
-            result_embed = discord.Embed(
-                title="✅ Členové odebráni",
-                color=discord.Color.green() if not failed else discord.Color.orange()
+            # Odeber vybrané členy na pozadí - průběh se zapisuje do této zprávy
+            job = self.manager.create_removal_job(
+                self.snapshot.threads,
+                self.snapshot.removal_targets(self.selected_member_ids),
+                self.author,
+                "Členové odebráni",
+                interaction.message
             )
-            
-            if removed:
-                result_embed.add_field(
-                    name=f"✅ Úspěšně odebráno ({len(removed)})",
-                    value="\n".join([f"• {name}" for name in removed[:20]]),
-                    inline=False
-                )
-            
-            if failed:
-                result_embed.add_field(
-                    name=f"❌ Selhalo ({len(failed)})",
-                    value="\n".join([f"• {fail}" for fail in failed[:10]]),
-                    inline=False
-                )
-            
-            await interaction.edit_original_response(embed=result_embed, view=None)
-            logger.info(f"Odebráno {len(removed)} členů z vlákna {self.thread.name} uživatelem {self.author.name}")
+            await interaction.response.edit_message(embed=job.build_progress_embed(), view=None)
+            self.manager.start_removal_job(job, interaction.message)
         
         remove_button.callback = remove_callback
         self.add_item(remove_button)
@@ -388,15 +1205,61 @@ class MemberSelectorView(discord.ui.View):
         
         cancel_button.callback = cancel_callback
         self.add_item(cancel_button)
+        
+        # Hledání podle jména (nebo návrat ze hledání na všechny členy)
+        search_button = discord.ui.Button(
+            label="✖️ Zrušit hledání" if self.search_query else "🔍 Hledat",
+            style=discord.ButtonStyle.primary,
+            row=2 if total_pages > 1 else 1
+        )
+        
+        async def search_callback(interaction: discord.Interaction):
+            if interaction.user.id != self.author.id:
+                await interaction.response.send_message("❌ Pouze původní uživatel!", ephemeral=True)
+                return
+            if self.search_query:
+                self.apply_search(None)
+                await interaction.response.edit_message(view=self)
+                return
+            await interaction.response.send_modal(MemberSearchModal(self))
+        
+        search_button.callback = search_callback
+        self.add_item(search_button)
+
+
+class MemberSearchModal(discord.ui.Modal, title="Hledat člena"):
+    """Formulář pro hledání člena podle jména v MemberSelectorView"""
+    
+    query = discord.ui.TextInput(
+        label="Jméno nebo username",
+        placeholder="Začátek nebo část jména...",
+        max_length=100,
+        required=True
+    )
+    
+    def __init__(self, selector: MemberSelectorView):
+        super().__init__()
+        self.selector = selector
+    
+    async def on_submit(self, interaction: discord.Interaction):
+        found = self.selector.apply_search(self.query.value)
+        if not found:
+            await interaction.response.send_message(
+                f"❌ Žádný člen neodpovídá „{self.query.value}“",
+                ephemeral=True
+            )
+            return
+        await interaction.response.edit_message(view=self.selector)
 
 
 class RoleSelectorView(discord.ui.View):
     """View pro výběr rolí k odebrání"""
     
-    def __init__(self, thread: discord.Thread, members: List[discord.Member], roles: List[discord.Role], author: discord.Member):
+    def __init__(self, manager: ThreadManager, snapshot: ThreadSnapshot, roles: List[discord.Role], author: discord.Member):
         super().__init__(timeout=300)
-        self.thread = thread
-        self.members = members
+        self.manager = manager
+        self.snapshot = snapshot
+        role_index = snapshot.role_index
         self.roles = sorted(roles, key=lambda r: r.name)[:25]  # Max 25 pro Discord
         self.author = author
         
@@ -408,7 +1271,7 @@ class RoleSelectorView(discord.ui.View):
             options=[
                 discord.SelectOption(
                     label=role.name,
-                    description=f"{sum(1 for m in members if role in m.roles)} členů",
+                    description=f"{role_index.count(role.id)} členů",
                     value=str(role.id),
                     emoji="🎭"
                 )
@@ -443,13 +1306,9 @@ class RoleSelectorView(discord.ui.View):
             
             await interaction.response.defer()
             
-            # Najdi členy s vybranými rolemi
-            members_to_remove = []
-            selected_roles = [thread.guild.get_role(rid) for rid in self.selected_role_ids]
-            
-            for member in self.members:
-                if any(role in member.roles for role in selected_roles if role):
-                    members_to_remove.append(member)
+            # Najdi členy s vybranými rolemi (sjednocení z indexu)
+            selected_roles = [self.snapshot.guild.get_role(rid) for rid in self.selected_role_ids]
+            members_to_remove = self.snapshot.role_index.union(self.selected_role_ids)
             
             if not members_to_remove:
                 await interaction.edit_original_response(
@@ -459,47 +1318,17 @@ class RoleSelectorView(discord.ui.View):
                 )
                 return
             
-            # Odeber členy
-            removed = []
-            failed = []
-            
-            for member in members_to_remove:
-                try:
-                    await self.thread.remove_user(member)
-                    removed.append(member.display_name)
-                except Exception as e:
-                    failed.append(f"{member.display_name}: {str(e)}")
-                    logger.error(f"Chyba při odebírání {member.name}: {e}")
-            
-            # Výsledný embed
-            result_embed = discord.Embed(
-                title="✅ Členové odebráni podle rolí",
-                color=discord.Color.green() if not failed else discord.Color.orange()
+            # Odeber členy na pozadí - průběh se zapisuje do této zprávy
+            role_names = ", ".join(r.name for r in selected_roles if r)
+            job = self.manager.create_removal_job(
+                self.snapshot.threads,
+                self.snapshot.removal_targets(members_to_remove),
+                self.author,
+                f"Členové odebráni podle rolí ({role_names})",
+                interaction.message
             )
-            
-            role_names = [r.name for r in selected_roles if r]
-            result_embed.add_field(
-                name="🎭 Odebráno s rolemi",
-                value=", ".join(role_names),
-                inline=False
-            )
-            
-            if removed:
-                result_embed.add_field(
-                    name=f"✅ Úspěšně odebráno ({len(removed)})",
-                    value="\n".join([f"• {name}" for name in removed[:20]]),
-                    inline=False
-                )
-            
-            if failed:
-                result_embed.add_field(
-                    name=f"❌ Selhalo ({len(failed)})",
-                    value="\n".join([f"• {fail}" for fail in failed[:10]]),
-                    inline=False
-                )
-            
-            await interaction.edit_original_response(embed=result_embed, view=None)
-            logger.info(f"Odebráno {len(removed)} členů podle rolí z vlákna {self.thread.name}")
+            await interaction.edit_original_response(embed=job.build_progress_embed(), view=None)
+            self.manager.start_removal_job(job, interaction.message)
         
         remove_button.callback = remove_callback
         self.add_item(remove_button)
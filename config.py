@@ -21,10 +21,75 @@ ADMIN_NOTIFICATION_CHANNEL_ID = 1241069875238277203  # Nastavíš po vytvoření
 # Můžeš zadat jméno role nebo její ID
 SUPPORT_ROLES = ["Admin", "Support", "Zakladatel projektu"]  # Názvy rolí nebo ID
 
+# Kolik support členů se přidává do vlákna souběžně (REST volání)
+THREAD_ADD_CONCURRENCY = 5
+
+# Kolik členů se odebírá z vlákna souběžně při hromadném odebrání
+THREAD_REMOVE_CONCURRENCY = 5
+
+# Pro kolik vláken se drží cache členů (nejdéle nepoužitá se zahazují)
+THREAD_MEMBER_CACHE_SIZE = 500
+
+# SQLite databáze hromadných operací (průběh přežije restart bota)
+THREAD_JOBS_DB = 'data/thread_jobs.db'
+
+# Sledování aktivity členů ve vláknech (pro odebrání neaktivních)
+ACTIVITY_DB = 'data/activity.db'
+ACTIVITY_FLUSH_INTERVAL = 60  # Jak často (s) se aktivita zapisuje z paměti na disk
+
+# Přidat držitele support rolí najednou zmínkou role ve vlákně (jednotlivě se pak přidají jen administrátoři bez role)
+# Pozor: zmínka role pošle všem držitelům notifikaci
+SUPPORT_ROLE_MENTION_ADD = False
+
 # Logging nastavení
 LOG_LEVEL = 'INFO'
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 LOG_FILE = 'logs/bot.log'
+LOG_QUEUE_SIZE = 10000  # Max. záznamů čekajících na zápis (při zaplnění se zahazují nejstarší)
+LOG_BATCH_SIZE = 256  # Kolik záznamů zapisovací vlákno zapíše najednou
+LOG_FLUSH_INTERVAL = 0.5  # Nejdelší prodleva (s) mezi zápisy na disk
+
+# Archiv zpráv (JSONL segmenty, uzavřené se komprimují) - nahrazuje textové řádky zpráv v bot.log
+ARCHIVE_DIR = 'logs/archive'
+ARCHIVE_SEGMENT_MB = 64  # Velikost segmentu po které se rotuje
+ARCHIVE_SEGMENT_MAX_AGE = 86400  # Stáří segmentu (s) po kterém se rotuje
+ARCHIVE_COMPRESSION = 'gzip'  # 'gzip' nebo 'zstd' (menší a rychlejší, vyžaduje pip install zstandard)
+MESSAGE_TEXT_LOG = False  # Logovat zprávy/úpravy/mazání i jako text do bot.log
+
+# Fulltextový archiv zpráv pro /search (SQLite FTS5, zapisuje se po dávkách)
+SEARCH_DB = 'data/search.db'
+SEARCH_BATCH_SIZE = 500  # Max. zpráv v jedné transakci
+SEARCH_FLUSH_MS = 250  # Nejdelší prodleva (ms) než se dávka zapíše
+
+# Cache obsahu zpráv pro logování úprav a mazání starších zpráv (rozpočet v MB, ne počet zpráv)
+MESSAGE_CACHE_MB = 32
+MESSAGE_CACHE_TTL = 7 * 86400  # Po kolika sekundách bez použití se zpráva zahodí
+MESSAGE_CACHE_CONTENT_LIMIT = 2000  # Kolik znaků obsahu se drží
+MESSAGE_CACHE_SPILL_DB = 'data/message_cache.db'  # Kam se odkládají zprávy nad rozpočet (None = zahodit)
+MESSAGE_CACHE_SPILL_TTL = 30 * 86400  # Jak dlouho se odložené zprávy drží na disku
+MESSAGE_CACHE_FLUSH_INTERVAL = 60  # Jak často (s) se cache čistí a zapisuje na disk
+
+# Pravidla logování podle serveru/kanálu (log / skip / sample:N, sloučení opakovaných zpráv)
+# Soubor se při změně načte znovu za běhu, chybějící soubor = loguje se vše
+LOG_POLICY_FILE = 'log_policy.json'
+
+# Flight recorder - posledních N událostí v souboru mapovaném do paměti (Manager ho vypíše po pádu)
+FLIGHT_RECORDER_FILE = 'logs/flight_recorder.bin'  # Pod Managerem flight_recorder_<instance>.bin
+FLIGHT_RECORDER_SIZE = 4096  # Počet záznamů (128 B na záznam)
+
+# Hash naposledy synchronizovaných slash commands (smazání souboru vynutí sync při dalším startu)
+COMMAND_HASH_FILE = 'data/command_tree.json'
+
+# Předávka při daily restartu - jak dlouho (s) starý proces čeká na doběhnutí rozpracovaných interakcí
+HANDOVER_DRAIN_TIMEOUT = 30
+
+# Heartbeat pro Manager - stav event loopu (zpoždění, latence, počty handlerů)
+HEARTBEAT_INTERVAL = 5  # Jak často (s) bot posílá heartbeat
+LAG_PROBE_INTERVAL = 0.25  # Jak často (s) se měří zpoždění event loopu
+
+# tracemalloc na žádost Manageru (podezření na únik paměti) - report do logs/tracemalloc_*.txt
+TRACEMALLOC_FRAMES = 10  # Hloubka zaznamenaného zásobníku alokace
+TRACEMALLOC_TOP = 30  # Kolik míst s největším nárůstem report obsahuje
 
 # Validace tokenu
 if not DISCORD_TOKEN:
@@ -5,8 +5,23 @@ Event handlery pro sledování a logování zpráv, úprav, mazání atd.
 import discord
 from discord.ext import commands
 from datetime import datetime
+import asyncio
 import logging
+import time
+from typing import Optional, Tuple
+from config import (
+    ARCHIVE_DIR, ARCHIVE_SEGMENT_MB, ARCHIVE_SEGMENT_MAX_AGE, ARCHIVE_COMPRESSION, MESSAGE_TEXT_LOG,
+    SEARCH_DB, SEARCH_BATCH_SIZE, SEARCH_FLUSH_MS,
+    MESSAGE_CACHE_MB, MESSAGE_CACHE_TTL, MESSAGE_CACHE_CONTENT_LIMIT,
+    MESSAGE_CACHE_SPILL_DB, MESSAGE_CACHE_SPILL_TTL, MESSAGE_CACHE_FLUSH_INTERVAL,
+    LOG_POLICY_FILE
+)
+from utils.content_cache import MessageContentCache
 from utils.helpers import format_timestamp, truncate_text, get_user_display_name
+from utils.label_cache import LabelCache
+from utils.log_policy import LogPolicy, ACTION_SKIP, ACTION_SAMPLE
+from utils.message_archive import MessageArchive
+from utils.search_store import SearchIndexWriter
 
 logger = logging.getLogger('discord_bot')
 
@@ -16,8 +31,51 @@ class MessageLogging(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        self.archive = MessageArchive(
+            ARCHIVE_DIR,
+            max_bytes=ARCHIVE_SEGMENT_MB * 1024 * 1024,
+            max_age=ARCHIVE_SEGMENT_MAX_AGE,
+            compression=ARCHIVE_COMPRESSION
+        )
+        self.search_index = SearchIndexWriter(SEARCH_DB, batch_size=SEARCH_BATCH_SIZE, flush_ms=SEARCH_FLUSH_MS)
+        self.content_cache = MessageContentCache(
+            MESSAGE_CACHE_MB * 1024 * 1024,
+            ttl=MESSAGE_CACHE_TTL,
+            content_limit=MESSAGE_CACHE_CONTENT_LIMIT,
+            spill_path=MESSAGE_CACHE_SPILL_DB,
+            spill_ttl=MESSAGE_CACHE_SPILL_TTL
+        )
+        self.labels = LabelCache()
+        self.policy = LogPolicy(LOG_POLICY_FILE)
         logger.info("✅ Message Logging Cog načten")
     
+    async def cog_load(self):
+        self.archive.start()
+        self.search_index.start()
+        self.cache_maintenance_task = asyncio.create_task(self.cache_maintenance_loop())
+    
+    async def cog_unload(self):
+        self.cache_maintenance_task.cancel()
+        self.content_cache.close()
+        # Dopsání front a komprese posledního segmentu blokuje - mimo event loop
+        await self.bot.loop.run_in_executor(None, self.archive.close)
+        await self.bot.loop.run_in_executor(None, self.search_index.close)
+    
+    async def cache_maintenance_loop(self):
+        """Periodicky zahazuje prošlé záznamy cache obsahu a odkládá vyřazené na disk"""
+        while True:
+            await asyncio.sleep(MESSAGE_CACHE_FLUSH_INTERVAL)
+            try:
+                expired = self.content_cache.expire()
+                spilled = self.content_cache.flush()
+                cache = self.content_cache
+                logger.debug(
+                    f"Cache obsahu zpráv: {len(cache)} zpráv, {cache.size / 1024 / 1024:.1f} MB, "
+                    f"prošlo {expired}, odloženo {spilled}, zásahy {cache.hits}/{cache.hits + cache.misses}"
+                )
+            except Exception as e:
+                logger.error(f"Chyba při údržbě cache obsahu zpráv: {e}", exc_info=True)
+    
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """
@@ -28,53 +86,207 @@ class MessageLogging(commands.Cog):
         if message.author == self.bot.user:
             return
         
-        # Použití utility funkcí pro konzistentní formátování
-        timestamp = format_timestamp()
-        server = message.guild.name if message.guild else "DM"
-        channel = message.channel.name if hasattr(message.channel, 'name') else "DM"
-        author = get_user_display_name(message.author)
-        content = truncate_text(message.content, 100)
+        # Pravidla kanálu se vyhodnotí dřív než cokoliv jiného
+        self.policy.maybe_reload()
+        guild_id = message.guild.id if message.guild else None
+        if not self.policy.should_log(guild_id, message.channel.id, getattr(message.channel, 'parent_id', None)):
+            return
+        
+        timestamp = message.created_at.timestamp()
+        self.content_cache.put(
+            message.id, guild_id, message.channel.id, message.author.id, timestamp, message.content
+        )
+        duplicate, repeats = self.policy.dedup(message.channel.id, message.author.id, message.content, timestamp)
+        if duplicate:
+            return
+        
+        extra = {'repeated': repeats} if repeats else {}
+        self.archive.record(
+            'msg', timestamp, guild_id, message.channel.id, message.author.id, message.id,
+            content=message.content, attachments=len(message.attachments), **extra
+        )
+        if guild_id and message.content:
+            self.search_index.add(
+                message.id, guild_id, message.channel.id, getattr(message.channel, 'parent_id', None),
+                message.author.id, timestamp, message.content
+            )
+        if not MESSAGE_TEXT_LOG or not logger.isEnabledFor(logging.INFO):
+            return
         
-        # Logování zprávy
+        # Popisky z cache, text se skládá až když úroveň logu projde, řádek ve vlákně zapisovače
+        server, channel, author = self.resolve_labels(guild_id, message.channel.id, message.author.id)
+        if repeats:
+            logger.info(
+                "[%s] [%s] [#%s] %s: ↻ předchozí zpráva zopakována %d×",
+                format_timestamp(), server, channel, author, repeats
+            )
         logger.info(
-            f"[{timestamp}] [{server}] [#{channel}] {author}: {content}"
+            "[%s] [%s] [#%s] %s: %s",
+            format_timestamp(), server, channel, author, truncate_text(message.content, 100)
         )
     
     @commands.Cog.listener()
-    async def on_message_edit(self, before: discord.Message, after: discord.Message):
-        """Spustí se když někdo upraví zprávu"""
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        """
+        Spustí se když někdo upraví zprávu (i starou, kterou discord.py už nemá v cache).
+        Původní obsah se bere z cache obsahu zpráv.
+        """
+        data = payload.data
+        # Bez edited_timestamp nejde o úpravu textu (připnutí, rozbalení embedu odkazu)
+        if 'content' not in data or not data.get('edited_timestamp'):
+            return
+        parent_id = self.parent_id(payload.channel_id)
+        rule = self.policy.rule(payload.guild_id, payload.channel_id, parent_id)
+        if rule.action == ACTION_SKIP:
+            return
+        
+        cached = self.content_cache.get(payload.message_id)
+        # Ve vzorkovaných kanálech jen zprávy které byly zalogované (jsou v cache)
+        if cached is None and rule.action == ACTION_SAMPLE:
+            return
+        author_id = int(data['author']['id']) if 'author' in data else (cached.author_id if cached else None)
         # Ignoruj úpravy botových zpráv
-        if before.author == self.bot.user:
+        if author_id is None or author_id == self.bot.user.id:
             return
         
-        timestamp = format_timestamp()
-        server = before.guild.name if before.guild else "DM"
-        channel = before.channel.name if hasattr(before.channel, 'name') else "DM"
-        author = get_user_display_name(before.author)
+        if cached is not None:
+            before = cached.content
+        elif payload.cached_message is not None:
+            before = payload.cached_message.content
+        else:
+            before = None
+        after = data['content']
+        if before == after:
+            return  # Změnil se jen embed/připnutí, ne text
         
+        created_ts = discord.utils.snowflake_time(payload.message_id).timestamp()
+        edited_ts = discord.utils.parse_time(data['edited_timestamp']).timestamp()
+        self.content_cache.put(payload.message_id, payload.guild_id, payload.channel_id, author_id, created_ts, after)
+        # Fulltext se přepíše vždy - i bez známého původního obsahu a i na prázdný text
+        # (prázdný obsah vyřadí zprávu z výsledků), jinak by /search vracel text který už neexistuje
+        if payload.guild_id:
+            self.search_index.edit(
+                payload.message_id, payload.guild_id, payload.channel_id, parent_id, author_id, created_ts, after, edited_ts
+            )
+        if before is None:
+            # Původní obsah neznáme - nejde poznat jestli se text změnil, úprava se nezaloguje
+            return
+        
+        self.archive.record(
+            'edit', edited_ts, payload.guild_id, payload.channel_id, author_id, payload.message_id,
+            before=before, content=after
+        )
+        if not MESSAGE_TEXT_LOG or not logger.isEnabledFor(logging.INFO):
+            return
+        
+        server, channel, author = self.resolve_labels(payload.guild_id, payload.channel_id, author_id)
         logger.info(
-            f"[{timestamp}] [EDIT] [{server}] [#{channel}] {author}:\n"
-            f"  Před: {truncate_text(before.content, 100)}\n"
-            f"  Po:   {truncate_text(after.content, 100)}"
+            "[%s] [EDIT] [%s] [#%s] %s:\n  Před: %s\n  Po:   %s",
+            format_timestamp(), server, channel, author, truncate_text(before, 100), truncate_text(after, 100)
         )
     
     @commands.Cog.listener()
-    async def on_message_delete(self, message: discord.Message):
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
         """Spustí se když je zpráva smazána"""
+        self.log_delete(payload.message_id, payload.guild_id, payload.channel_id, payload.cached_message)
+    
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        """Spustí se při hromadném mazání (purge)"""
+        cached = {message.id: message for message in payload.cached_messages}
+        for message_id in payload.message_ids:
+            self.log_delete(message_id, payload.guild_id, payload.channel_id, cached.get(message_id))
+    
+    def log_delete(
+        self,
+        message_id: int,
+        guild_id: Optional[int],
+        channel_id: int,
+        cached_message: Optional[discord.Message]
+    ):
+        """Zaloguje smazanou zprávu s obsahem z cache (pokud ho známe)"""
+        rule = self.policy.rule(guild_id, channel_id, self.parent_id(channel_id))
+        if rule.action == ACTION_SKIP:
+            return
+        record = self.content_cache.pop(message_id)
+        if record is None and rule.action == ACTION_SAMPLE:
+            return
+        if record is not None:
+            author_id, content = record.author_id, record.content
+        elif cached_message is not None:
+            author_id, content = cached_message.author.id, cached_message.content
+        else:
+            author_id, content = None, None
+        
         # Ignoruj smazané zprávy bota
-        if message.author == self.bot.user:
+        if author_id == self.bot.user.id:
             return
         
-        timestamp = format_timestamp()
-        server = message.guild.name if message.guild else "DM"
-        channel = message.channel.name if hasattr(message.channel, 'name') else "DM"
-        author = get_user_display_name(message.author)
+        now = time.time()
+        self.archive.record('del', now, guild_id, channel_id, author_id, message_id, content=content)
+        if guild_id:
+            self.search_index.delete(message_id, now)
+        if not MESSAGE_TEXT_LOG or not logger.isEnabledFor(logging.WARNING):
+            return
         
+        server, channel, author = self.resolve_labels(guild_id, channel_id, author_id)
         logger.warning(
-            f"[{timestamp}] [DELETE] [{server}] [#{channel}] {author}: "
-            f"{truncate_text(message.content, 100)}"
+            "[%s] [DELETE] [%s] [#%s] %s: %s",
+            format_timestamp(), server, channel, author,
+            truncate_text(content, 100) if content is not None else '(obsah neznámý)'
         )
     
+    def parent_id(self, channel_id: int) -> Optional[int]:
+        """Nadřazený kanál vlákna (pravidla logování se dědí)"""
+        return getattr(self.bot.get_channel(channel_id), 'parent_id', None)
+    
+    # ====================
+    # POPISKY PRO TEXTOVÝ LOG
+    # ====================
+    
+    def resolve_labels(self, guild_id: Optional[int], channel_id: int, author_id: Optional[int]) -> Tuple[str, str, str]:
+        """Názvy serveru, kanálu a autora pro textový log (z cache popisků podle ID)"""
+        server = self.labels.get(('g', guild_id), lambda: self._guild_label(guild_id), "DM") if guild_id else "DM"
+        channel = self.labels.get(('c', channel_id), lambda: self._channel_label(channel_id), "DM")
+        if author_id is None:
+            author = "Neznámý autor"
+        else:
+            author = self.labels.get(('u', author_id), lambda: self._user_label(author_id), f"ID {author_id}")
+        return server, channel, author
+    
+    def _guild_label(self, guild_id: int) -> Optional[str]:
+        guild = self.bot.get_guild(guild_id)
+        return guild.name if guild else None
+    
+    def _channel_label(self, channel_id: int) -> Optional[str]:
+        channel = self.bot.get_channel(channel_id)
+        return channel.name if hasattr(channel, 'name') else None
+    
+    def _user_label(self, user_id: int) -> Optional[str]:
+        user = self.bot.get_user(user_id)
+        return get_user_display_name(user) if user else None
+    
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        self.labels.invalidate(('g', after.id))
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        self.labels.invalidate(('c', after.id))
+    
+    @commands.Cog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        self.labels.invalidate(('c', after.id))
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        self.labels.invalidate(('u', after.id))
+    
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        # Změna username přichází jako user update, ne member update
+        self.labels.invalidate(('u', after.id))
+    
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         """Spustí se když se nový člen připojí na server"""
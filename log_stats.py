@@ -0,0 +1,307 @@
+"""
+Log Stats - Analýza logů z příkazové řádky
+Prochází bot.log a archiv zpráv (logs/archive) proudově v konstantní paměti,
+velké soubory dělí na části a zpracovává paralelně na všech jádrech.
+
+Použití:
+    python log_stats.py                               # logs/bot.log + logs/archive
+    python log_stats.py logs/bot.log --top 20
+    python log_stats.py logs/archive --since 2025-11-01 --bucket day
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.message_archive import INDEX_SUFFIX, SEGMENT_PREFIX, SEGMENT_SUFFIX, load_indexes
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 64 * 1024 * 1024  # Velikost části nekomprimovaného souboru pro jeden proces
+
+# 2025-11-01 10:30:45,123 - discord_bot - INFO - zpráva
+LOG_LINE = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),\d+ - \S+ - (\w+) - (.*)$')
+# [2025-11-01 10:30:45] [EDIT] [Server] [#kanál] autor: obsah
+MESSAGE_LINE = re.compile(r'^\[[^\]]*\] (?:\[(EDIT|DELETE)\] )?\[(.*?)\] \[#(.*?)\] (.*?):(?: |$)')
+TICKET_OPEN = re.compile(r"^Nový soukromý problém vytvořen: '(.*)' od (\S+) \(ID: \d+\) \| Thread ID: (\d+)")
+TICKET_CLAIM = re.compile(r"^Problém '(.*)' převzat uživatelem (\S+)")
+
+TEXT_EVENTS = {None: 'msg', 'EDIT': 'edit', 'DELETE': 'del'}
+
+# Záznam po parsování: (čas 'YYYY-MM-DD HH:MM:SS', typ, kanál, autor, detail)
+Event = Tuple[str, str, str, str, Optional[str]]
+
+
+# ====================
+# ČTENÍ
+# ====================
+
+def read_lines(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """
+    Řádky souboru (i .gz/.zst), u nekomprimovaných jen ty které začínají v rozsahu [start, end).
+    """
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rt', encoding='utf-8', errors='replace') as f:
+            yield from f
+        return
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise SystemExit(f"❌ {path} je zstd - nainstaluj balíček zstandard")
+        with open(path, 'rb') as raw:
+            yield from io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw), encoding='utf-8', errors='replace')
+        return
+
+    with open(path, 'rb') as f:
+        if start > 0:
+            # Řádek patří části ve které začíná - rozpracovaný řádek přeskočíme
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                start += len(f.readline())
+        position = start
+        while end is None or position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode('utf-8', errors='replace')
+
+
+def parse_text_log(lines: Iterable[str]) -> Iterator[Event]:
+    """Události z bot.log (zprávy, úpravy, mazání, tickety help systému)"""
+    for line in lines:
+        match = LOG_LINE.match(line)
+        if not match:
+            continue  # Pokračovací řádky (úpravy, tracebacky)
+        timestamp, _level, message = match.groups()
+        if message.startswith('['):
+            msg = MESSAGE_LINE.match(message)
+            if msg:
+                kind, server, channel, author = msg.groups()
+                yield timestamp, TEXT_EVENTS[kind], f"{server}/#{channel}", author, None
+            continue
+        ticket = TICKET_OPEN.match(message)
+        if ticket:
+            title, author, thread_id = ticket.groups()
+            yield timestamp, 'ticket_open', thread_id, author, title
+            continue
+        ticket = TICKET_CLAIM.match(message)
+        if ticket:
+            title, author = ticket.groups()
+            yield timestamp, 'ticket_claim', '', author, title
+
+
+_second_labels: Dict[int, str] = {}
+
+
+def _format_ts(ts: float) -> str:
+    # Formát jako v bot.log, strftime jen jednou za sekundu (záznamy jdou po sobě)
+    second = int(ts)
+    label = _second_labels.get(second)
+    if label is None:
+        if len(_second_labels) > 4096:
+            _second_labels.clear()
+        label = _second_labels[second] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+    return label
+
+
+def parse_archive(lines: Iterable[str]) -> Iterator[Event]:
+    """Události ze segmentů archivu zpráv (JSONL)"""
+    for line in lines:
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        author = item.get('a')
+        yield _format_ts(item['t']), item['e'], str(item['c']), str(author) if author is not None else '?', None
+
+
+# ====================
+# AGREGACE
+# ====================
+
+class Stats:
+    """Počty, top-N a časové koše - mergeovatelné výsledky jednotlivých částí"""
+
+    def __init__(self, bucket: str):
+        self.bucket_len = 13 if bucket == 'hour' else 10  # 'YYYY-MM-DD HH' / 'YYYY-MM-DD'
+        self.events: Counter = Counter()
+        self.channels: Counter = Counter()
+        self.authors: Counter = Counter()
+        self.buckets: Counter = Counter()  # (koš, typ) -> počet
+        self.tickets: List[Event] = []
+        self.first: Optional[str] = None
+        self.last: Optional[str] = None
+
+    def add(self, events: Iterable[Event], since: Optional[str], until: Optional[str]):
+        bucket_len = self.bucket_len
+        for timestamp, kind, channel, author, detail in events:
+            if (since and timestamp < since) or (until and timestamp >= until):
+                continue
+            if kind.startswith('ticket_'):
+                self.tickets.append((timestamp, kind, channel, author, detail))
+                continue
+            self.events[kind] += 1
+            self.channels[channel] += 1
+            self.authors[author] += 1
+            self.buckets[(timestamp[:bucket_len], kind)] += 1
+            if self.first is None or timestamp < self.first:
+                self.first = timestamp
+            if self.last is None or timestamp > self.last:
+                self.last = timestamp
+
+    def merge(self, other: 'Stats'):
+        self.events.update(other.events)
+        self.channels.update(other.channels)
+        self.authors.update(other.authors)
+        self.buckets.update(other.buckets)
+        self.tickets.extend(other.tickets)
+        for timestamp in (other.first, other.last):
+            if timestamp is None:
+                continue
+            if self.first is None or timestamp < self.first:
+                self.first = timestamp
+            if self.last is None or timestamp > self.last:
+                self.last = timestamp
+
+
+def process_part(task: Tuple[str, str, int, Optional[int], str, Optional[str], Optional[str]]) -> Stats:
+    """Zpracuje jednu část souboru (běží v samostatném procesu)"""
+    path, kind, start, end, bucket, since, until = task
+    parser = parse_archive if kind == 'archive' else parse_text_log
+    stats = Stats(bucket)
+    stats.add(parser(read_lines(path, start, end)), since, until)
+    return stats
+
+
+def plan_tasks(paths: List[str], bucket: str, since: Optional[str], until: Optional[str], chunk_size: int) -> List[tuple]:
+    """Rozdělí vstupy na části - nekomprimované soubory po chunk_size, komprimované celé"""
+    tasks = []
+    for path, kind in discover_inputs(paths, since, until):
+        if path.endswith(('.gz', '.zst')):
+            tasks.append((path, kind, 0, None, bucket, since, until))
+            continue
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), chunk_size):
+            tasks.append((path, kind, start, min(start + chunk_size, size), bucket, since, until))
+    return tasks
+
+
+def _epoch(timestamp: Optional[str]) -> Optional[float]:
+    return datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').timestamp() if timestamp else None
+
+
+def discover_inputs(paths: List[str], since: Optional[str], until: Optional[str]) -> Iterator[Tuple[str, str]]:
+    """Soubory ke zpracování; u složky archivu jen segmenty které podle indexu zasahují do okna"""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path, 'archive' if '.jsonl' in path else 'text'
+            continue
+        since_ts, until_ts = _epoch(since), _epoch(until)
+        for index in load_indexes(path):
+            if since_ts is not None and index['end'] < since_ts:
+                continue
+            if until_ts is not None and index['start'] >= until_ts:
+                continue
+            yield os.path.join(path, index['segment']), 'archive'
+        # Otevřený (ještě nezkomprimovaný) segment nemá index
+        for name in sorted(os.listdir(path)):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX) and not name.endswith(INDEX_SUFFIX):
+                yield os.path.join(path, name), 'archive'
+
+
+# ====================
+# VÝSTUP
+# ====================
+
+def ticket_durations(tickets: List[Event]) -> List[Tuple[float, str, str, str]]:
+    """Páruje vytvoření a převzetí ticketu podle názvu (nejstarší otevřený s tímto názvem)"""
+    open_tickets: Dict[str, List[Tuple[str, str]]] = {}
+    durations = []
+    for timestamp, kind, _thread, author, title in sorted(tickets):
+        if kind == 'ticket_open':
+            open_tickets.setdefault(title, []).append((timestamp, author))
+        elif open_tickets.get(title):
+            opened, opener = open_tickets[title].pop(0)
+            seconds = (datetime.fromisoformat(timestamp) - datetime.fromisoformat(opened)).total_seconds()
+            durations.append((seconds, title, opener, author))
+    return sorted(durations, reverse=True)
+
+
+def format_duration(seconds: float) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {seconds:02d}s"
+
+
+def print_report(stats: Stats, top: int, elapsed: float, parts: int):
+    print(f"📊 Období: {stats.first or '-'} → {stats.last or '-'}  ({parts} částí, {elapsed:.1f}s)")
+    print()
+    print("Události:")
+    for kind, label in (('msg', 'Zprávy'), ('edit', 'Úpravy'), ('del', 'Smazání')):
+        print(f"  {label:<10} {stats.events.get(kind, 0):>10}")
+
+    print(f"\nNejaktivnější kanály (top {top}):")
+    for channel, count in stats.channels.most_common(top):
+        print(f"  {count:>10}  {channel}")
+
+    print(f"\nNejaktivnější autoři (top {top}):")
+    for author, count in stats.authors.most_common(top):
+        print(f"  {count:>10}  {author}")
+
+    print("\nČasové koše (zprávy / úpravy / smazání):")
+    buckets = sorted({bucket for bucket, _ in stats.buckets})
+    for bucket in buckets:
+        counts = [stats.buckets.get((bucket, kind), 0) for kind in ('msg', 'edit', 'del')]
+        print(f"  {bucket:<13}  {counts[0]:>8} {counts[1]:>8} {counts[2]:>8}")
+
+    durations = ticket_durations(stats.tickets)
+    if durations:
+        print(f"\nNejdéle čekající tickety na převzetí (top {top}):")
+        for seconds, title, opener, claimer in durations[:top]:
+            print(f"  {format_duration(seconds):>10}  '{title}' ({opener} → {claimer})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistiky z bot.log a archivu zpráv")
+    parser.add_argument('paths', nargs='*', default=['logs/bot.log', 'logs/archive'],
+                        help="Soubory logů / segmenty archivu / složka archivu")
+    parser.add_argument('--since', help="Od (YYYY-MM-DD nebo 'YYYY-MM-DD HH:MM:SS')")
+    parser.add_argument('--until', help="Do (bez tohoto okamžiku)")
+    parser.add_argument('--bucket', choices=('hour', 'day'), default='hour', help="Velikost časového koše")
+    parser.add_argument('--top', type=int, default=10, help="Kolik položek v žebříčcích")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Počet procesů")
+    parser.add_argument('--chunk-mb', type=int, default=CHUNK_SIZE // (1024 * 1024), help="Velikost části souboru v MB")
+    args = parser.parse_args()
+
+    since = f"{args.since} 00:00:00"[:19] if args.since else None
+    until = f"{args.until} 00:00:00"[:19] if args.until else None
+    paths = [path for path in args.paths if os.path.exists(path)]
+    if not paths:
+        raise SystemExit("❌ Žádný ze vstupů neexistuje")
+
+    started = time.perf_counter()
+    tasks = plan_tasks(paths, args.bucket, since, until, args.chunk_mb * 1024 * 1024)
+    stats = Stats(args.bucket)
+    if args.jobs > 1 and len(tasks) > 1:
+        with Pool(min(args.jobs, len(tasks))) as pool:
+            for part in pool.imap_unordered(process_part, tasks):
+                stats.merge(part)
+    else:
+        for task in tasks:
+            stats.merge(process_part(task))
+
+    print_report(stats, args.top, time.perf_counter() - started, len(tasks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Sledování aktivity členů ve vláknech
+Čas poslední zprávy (vlákno, člen) se drží v paměti a periodicky zapisuje do SQLite.
+"""
+import os
+import sqlite3
+from typing import Dict, List, Optional, Set
+
+QUERY_CHUNK = 500  # Max. počet ID v jednom IN (...) dotazu (limit proměnných SQLite)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activity (
+    thread_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    PRIMARY KEY (thread_id, member_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS thread_tracking (
+    thread_id INTEGER PRIMARY KEY,
+    since INTEGER NOT NULL
+);
+"""
+
+
+class ActivityTracker:
+    """
+    Poslední aktivita členů ve vláknech.
+    record() jen přepíše hodnotu ve slovníku, do databáze se zapisuje
+    dávkově přes flush() - jedna transakce za interval.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._pending: Dict[int, Dict[int, int]] = {}  # thread_id -> {member_id: unix čas}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def record(self, thread_id: int, member_id: int, timestamp: float):
+        """Zaznamená zprávu člena ve vlákně"""
+        self._pending.setdefault(thread_id, {})[member_id] = int(timestamp)
+
+    def flush(self) -> int:
+        """
+        Zapíše nasbírané záznamy do databáze.
+
+        Returns:
+            Počet zapsaných záznamů
+        """
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        rows = [
+            (thread_id, member_id, ts)
+            for thread_id, members in pending.items()
+            for member_id, ts in members.items()
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO activity (thread_id, member_id, last_ts) VALUES (?, ?, ?) "
+                "ON CONFLICT (thread_id, member_id) DO UPDATE SET last_ts = MAX(last_ts, excluded.last_ts)",
+                rows
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO thread_tracking (thread_id, since) VALUES (?, ?)",
+                ((thread_id, min(members.values())) for thread_id, members in pending.items())
+            )
+        return len(rows)
+
+    def active_since(self, thread_id: int, since: float) -> Set[int]:
+        """
+        Vrátí členy kteří ve vlákně psali od daného času (jeden dotaz přes primární klíč).
+
+        Args:
+            thread_id: ID vlákna
+            since: Unix čas
+
+        Returns:
+            Množina ID aktivních členů
+        """
+        active = {
+            row[0] for row in self.conn.execute(
+                "SELECT member_id FROM activity WHERE thread_id = ? AND last_ts >= ?",
+                (thread_id, int(since))
+            )
+        }
+        # Ještě nezapsané záznamy z paměti
+        active.update(
+            member_id for member_id, ts in self._pending.get(thread_id, {}).items() if ts >= since
+        )
+        return active
+
+    def active_in_threads(self, thread_ids: List[int], since: float) -> Dict[int, Set[int]]:
+        """
+        Vrátí aktivní členy pro více vláken najednou (dotazy po dávkách místo jednoho na vlákno).
+
+        Args:
+            thread_ids: ID vláken
+            since: Unix čas
+
+        Returns:
+            Slovník thread_id -> množina ID aktivních členů
+        """
+        active: Dict[int, Set[int]] = {}
+        for start in range(0, len(thread_ids), QUERY_CHUNK):
+            chunk = thread_ids[start:start + QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for thread_id, member_id in self.conn.execute(
+                f"SELECT thread_id, member_id FROM activity WHERE thread_id IN ({placeholders}) AND last_ts >= ?",
+                (*chunk, int(since))
+            ):
+                active.setdefault(thread_id, set()).add(member_id)
+        for thread_id in thread_ids:
+            pending = self._pending.get(thread_id)
+            if pending:
+                active.setdefault(thread_id, set()).update(
+                    member_id for member_id, ts in pending.items() if ts >= since
+                )
+        return active
+
+    def tracked_since(self, thread_id: int) -> Optional[int]:
+        """Od kdy se aktivita ve vlákně sleduje (unix čas), None pokud vůbec"""
+        row = self.conn.execute("SELECT since FROM thread_tracking WHERE thread_id = ?", (thread_id,)).fetchone()
+        if row:
+            return row[0]
+        pending = self._pending.get(thread_id)
+        return min(pending.values()) if pending else None
+
+    def forget_thread(self, thread_id: int):
+        """Smaže záznamy smazaného vlákna"""
+        self._pending.pop(thread_id, None)
+        with self.conn:
+            self.conn.execute("DELETE FROM activity WHERE thread_id = ?", (thread_id,))
+            self.conn.execute("DELETE FROM thread_tracking WHERE thread_id = ?", (thread_id,))
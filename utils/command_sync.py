@@ -0,0 +1,47 @@
+"""
+Hash stromu slash commandů pro synchronizaci jen při změně
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+
+def command_tree_hash(payloads: Iterable[Dict[str, Any]]) -> str:
+    """
+    Stabilní hash definic příkazů (nezávislý na pořadí registrace).
+
+    Args:
+        payloads: Definice příkazů tak jak se posílají Discordu
+
+    Returns:
+        SHA-256 hex
+    """
+    ordered = sorted(payloads, key=lambda payload: (payload.get('type', 1), payload['name']))
+    data = json.dumps(ordered, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class CommandHashStore:
+    """Naposledy synchronizované hashe (klíč = aplikace + server nebo global) v JSON souboru"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._hashes: Dict[str, str] = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._hashes = json.load(f)
+        except (OSError, ValueError):
+            self._hashes = {}
+
+    def get(self, key: str) -> Optional[str]:
+        return self._hashes.get(key)
+
+    def set(self, key: str, digest: str):
+        """Uloží hash a hned zapíše soubor (přes dočasný soubor, aby se nepoškodil)"""
+        self._hashes[key] = digest
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._hashes, f, indent=2)
+        os.replace(tmp, self.path)
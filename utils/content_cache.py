@@ -0,0 +1,227 @@
+"""
+Cache obsahu zpráv s paměťovým rozpočtem
+Drží kompaktní záznamy (ID autora/kanálu + zkrácený obsah) pro logování úprav a mazání
+i u zpráv které už discord.py ve své cache nemá. Vyřazené záznamy lze odkládat do SQLite,
+při ukončení se tam uloží i živé - další proces (restart, předávka) na ně naváže.
+"""
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set
+
+RECORD_OVERHEAD = 240  # Odhad bajtů na záznam mimo text (tuple, klíč, uzel OrderedDict)
+
+SPILL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content (
+    message_id INTEGER PRIMARY KEY,
+    guild_id INTEGER,
+    channel_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    created_ts REAL NOT NULL,
+    content TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_content_stored ON content (stored_at);
+"""
+
+
+class CachedMessage(NamedTuple):
+    guild_id: Optional[int]
+    channel_id: int
+    author_id: int
+    created_ts: float
+    content: str
+    stored_at: float
+
+
+class MessageContentCache:
+    """
+    LRU cache obsahu zpráv omezená velikostí v bajtech a stářím (TTL od posledního použití).
+    Každé použití obnoví stored_at a přesune záznam na konec, pořadí LRU je tak i pořadím stored_at.
+    ID serverů, kanálů a autorů se internují - tisíce zpráv sdílí jeden int objekt.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        content_limit: int = 2000,
+        spill_path: Optional[str] = None,
+        spill_ttl: float = 30 * 86400
+    ):
+        """
+        Args:
+            max_bytes: Paměťový rozpočet (odhad)
+            ttl: Po kolika sekundách bez použití se záznam zahodí
+            content_limit: Maximální uložená délka obsahu
+            spill_path: SQLite soubor pro záznamy vyřazené kvůli rozpočtu (None = vypnuto)
+            spill_ttl: Jak dlouho (s) se záznamy na disku drží
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.content_limit = content_limit
+        self.spill_ttl = spill_ttl
+        self._records: OrderedDict[int, CachedMessage] = OrderedDict()
+        self._ids: Dict[int, int] = {}
+        self._spill_pending: Dict[int, CachedMessage] = {}
+        self._spill_deleted: Set[int] = set()  # Smazané zprávy k odstranění z disku při flush()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = None
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path) or '.', exist_ok=True)
+            self.conn = sqlite3.connect(spill_path)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SPILL_SCHEMA)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def close(self):
+        if self.conn is not None:
+            # Živé záznamy se odloží na disk, aby je po restartu našel get()
+            cutoff = time.time() - self.ttl
+            for message_id, record in self._records.items():
+                if record.stored_at > cutoff:
+                    self._spill_pending[message_id] = record
+            self.flush()
+            self.conn.close()
+            self.conn = None
+
+    def _intern(self, value: Optional[int]) -> Optional[int]:
+        if value is None:
+            return None
+        return self._ids.setdefault(value, value)
+
+    @staticmethod
+    def _record_size(record: CachedMessage) -> int:
+        return RECORD_OVERHEAD + sys.getsizeof(record.content)
+
+    def put(self, message_id: int, guild_id: Optional[int], channel_id: int, author_id: int, created_ts: float, content: str):
+        """Uloží (nebo přepíše) obsah zprávy"""
+        self.discard(message_id)
+        if self.conn is not None:
+            # Starší verze mohla být odložená na disk - po vypršení v paměti by se vrátil původní text
+            self._spill_pending.pop(message_id, None)
+            self._spill_deleted.add(message_id)
+        record = CachedMessage(
+            self._intern(guild_id), self._intern(channel_id), self._intern(author_id),
+            created_ts, content[:self.content_limit], time.time()
+        )
+        self._records[message_id] = record
+        self.size += self._record_size(record)
+        self._evict()
+
+    def get(self, message_id: int) -> Optional[CachedMessage]:
+        """Vrátí záznam zprávy (z paměti, případně z disku)"""
+        record = self._records.get(message_id)
+        if record is not None:
+            if time.time() - record.stored_at > self.ttl:
+                self.discard(message_id)
+                record = None
+            else:
+                record = record._replace(stored_at=time.time())
+                self._records[message_id] = record
+                self._records.move_to_end(message_id)
+        if record is None:
+            record = self._spill_get(message_id)
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def pop(self, message_id: int) -> Optional[CachedMessage]:
+        """Vrátí a odstraní záznam (smazaná zpráva)"""
+        record = self.get(message_id)
+        self.discard(message_id)
+        if self.conn is not None:
+            self._spill_pending.pop(message_id, None)
+            self._spill_deleted.add(message_id)
+        return record
+
+    def discard(self, message_id: int):
+        record = self._records.pop(message_id, None)
+        if record is not None:
+            self.size -= self._record_size(record)
+
+    def _evict(self):
+        """Vyřadí nejdéle nepoužité záznamy nad rozpočet (s diskem je odloží)"""
+        while self.size > self.max_bytes and self._records:
+            message_id, record = self._records.popitem(last=False)
+            self.size -= self._record_size(record)
+            if self.conn is not None:
+                self._spill_pending[message_id] = record
+
+    def expire(self) -> int:
+        """
+        Zahodí záznamy nepoužité déle než TTL (jsou na začátku LRU pořadí, viz get()).
+
+        Returns:
+            Počet zahozených záznamů
+        """
+        cutoff = time.time() - self.ttl
+        expired = 0
+        while self._records:
+            message_id, record = next(iter(self._records.items()))
+            if record.stored_at > cutoff:
+                break
+            self.discard(message_id)
+            expired += 1
+        # Interní tabulka ID se přestaví jen z žijících záznamů
+        if expired:
+            self._ids = {}
+            for message_id, record in self._records.items():
+                self._records[message_id] = record._replace(
+                    guild_id=self._intern(record.guild_id),
+                    channel_id=self._intern(record.channel_id),
+                    author_id=self._intern(record.author_id)
+                )
+        return expired
+
+    # ====================
+    # ODKLÁDÁNÍ NA DISK
+    # ====================
+
+    def _spill_get(self, message_id: int) -> Optional[CachedMessage]:
+        if self.conn is None:
+            return None
+        record = self._spill_pending.get(message_id)
+        if record is not None:
+            return record
+        if message_id in self._spill_deleted:
+            return None
+        row = self.conn.execute(
+            "SELECT guild_id, channel_id, author_id, created_ts, content, stored_at FROM content WHERE message_id = ?",
+            (message_id,)
+        ).fetchone()
+        return CachedMessage(*row) if row else None
+
+    def flush(self) -> int:
+        """
+        Zapíše odložené záznamy na disk jednou transakcí a smaže staré a smazané zprávy.
+
+        Returns:
+            Počet zapsaných záznamů
+        """
+        if self.conn is None:
+            return 0
+        pending, self._spill_pending = self._spill_pending, {}
+        deleted, self._spill_deleted = self._spill_deleted, set()
+        with self.conn:
+            # Mazání před zápisem - znovu odložená zpráva se stejným ID zůstane
+            if deleted:
+                self.conn.executemany("DELETE FROM content WHERE message_id = ?", ((message_id,) for message_id in deleted))
+            if pending:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO content (message_id, guild_id, channel_id, author_id, created_ts, content, stored_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((message_id, *record) for message_id, record in pending.items())
+                )
+            self.conn.execute("DELETE FROM content WHERE stored_at < ?", (time.time() - self.spill_ttl,))
+        return len(pending)
@@ -0,0 +1,142 @@
+"""
+Flight recorder - kruhový buffer posledních událostí v souboru mapovaném do paměti
+Bot zapisuje záznamy pevné délky (typ, ID, handler, doba trvání), po pádu je Manager
+přečte ze souboru a vypíše co bot dělal těsně před pádem.
+Pod Managerem má každá instance bota vlastní soubor - při předávce běží dva procesy současně.
+"""
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterator, List, Optional
+
+MAGIC = b'BDCFR001'
+# magic, velikost záznamu, kapacita, PID zapisovatele, pořadové číslo dalšího záznamu
+HEADER = struct.Struct('<8sIIIxxxxQ')
+# čas, pořadí, guild, kanál, uživatel, trvání ms, druh, stav, název události, handler/příkaz
+RECORD = struct.Struct('<dQQQQfBB2x32s48s')
+
+KIND_EVENT = 0  # Událost rozeslaná přes dispatch
+KIND_HANDLER = 1  # Doběhnutý handler události
+KIND_ERROR = 2  # Výjimka v handleru
+KIND_MARK = 3  # Značka (start, ukončení)
+
+KIND_NAMES = {KIND_EVENT: 'EVENT', KIND_HANDLER: 'HANDLER', KIND_ERROR: 'ERROR', KIND_MARK: 'MARK'}
+
+
+class FlightRecorder:
+    """
+    Zapisovač do kruhového bufferu. Záznam = jeden struct.pack_into do mmap,
+    žádné systémové volání ani alokace souboru za běhu.
+    """
+
+    def __init__(self, path: str, capacity: int = 4096):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.capacity = capacity
+        size = HEADER.size + capacity * RECORD.size
+        # Soubor se při každém startu založí znovu (předchozí obsah vypsal Manager)
+        self.path = path
+        self._file = open(path, 'w+b')
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._seq = 0
+        HEADER.pack_into(self._map, 0, MAGIC, RECORD.size, capacity, os.getpid(), 0)
+
+    def close(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def record(
+        self,
+        kind: int,
+        name: str,
+        detail: str = "",
+        guild_id: int = 0,
+        channel_id: int = 0,
+        user_id: int = 0,
+        duration_ms: float = 0.0,
+        status: int = 0
+    ):
+        """Zapíše jeden záznam (nejstarší se přepíše)"""
+        if self._map is None:
+            return
+        seq = self._seq
+        RECORD.pack_into(
+            self._map, HEADER.size + (seq % self.capacity) * RECORD.size,
+            time.time(), seq, guild_id, channel_id, user_id, duration_ms, kind, status,
+            name.encode('utf-8')[:32], detail.encode('utf-8')[:48]
+        )
+        self._seq = seq + 1
+        # Pořadové číslo jako poslední - čtenář pozná kde buffer končí
+        struct.pack_into('<Q', self._map, HEADER.size - 8, seq + 1)
+
+
+def recorder_path(path: str, instance: Optional[str]) -> str:
+    """Soubor bufferu instance bota (bez Manageru přímo `path`)"""
+    if not instance:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}_{instance}{ext}"
+
+
+def read_records(path: str) -> Optional[Dict]:
+    """
+    Přečte buffer ze souboru.
+
+    Returns:
+        Slovník s 'pid' a 'records' (seřazené od nejstaršího), None pokud soubor není platný
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, record_size, capacity, pid, next_seq = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or record_size != RECORD.size:
+        return None
+
+    records = []
+    for seq in range(max(0, next_seq - capacity), next_seq):
+        fields = RECORD.unpack_from(data, HEADER.size + (seq % capacity) * RECORD.size)
+        timestamp, record_seq, guild_id, channel_id, user_id, duration_ms, kind, status, name, detail = fields
+        if record_seq != seq:
+            continue  # Záznam rozepsaný v okamžiku pádu
+        records.append({
+            'time': timestamp, 'seq': record_seq, 'guild_id': guild_id, 'channel_id': channel_id,
+            'user_id': user_id, 'duration_ms': duration_ms, 'kind': kind, 'status': status,
+            'name': name.rstrip(b'\0').decode('utf-8', errors='replace'),
+            'detail': detail.rstrip(b'\0').decode('utf-8', errors='replace'),
+        })
+    return {'pid': pid, 'records': records}
+
+
+def format_record(record: Dict) -> str:
+    """Jeden řádek výpisu"""
+    stamp = time.strftime('%H:%M:%S', time.localtime(record['time'])) + f".{int(record['time'] * 1000) % 1000:03d}"
+    parts = [f"{stamp} #{record['seq']:<8} {KIND_NAMES.get(record['kind'], '?'):<7} {record['name']}"]
+    if record['detail']:
+        parts.append(record['detail'])
+    if record['kind'] in (KIND_HANDLER, KIND_ERROR):
+        parts.append(f"{record['duration_ms']:.1f} ms")
+    ids = [f"{key[0]}={record[key]}" for key in ('guild_id', 'channel_id', 'user_id') if record[key]]
+    if ids:
+        parts.append(" ".join(ids))
+    return " | ".join(parts)
+
+
+def format_dump(path: str, last: Optional[int] = None) -> Iterator[str]:
+    """Řádky výpisu bufferu (posledních `last` záznamů)"""
+    dump = read_records(path)
+    if dump is None:
+        return
+    records: List[Dict] = dump['records']
+    if last is not None:
+        records = records[-last:]
+    yield f"Flight recorder PID {dump['pid']}: {len(records)} záznamů"
+    for record in records:
+        yield format_record(record)
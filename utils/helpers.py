@@ -2,8 +2,12 @@
 Utility funkce pro formátování a pomocné operace
 """
 from datetime import datetime
+import time
 import discord
 
+# Poslední naformátovaná sekunda - v rámci jedné sekundy se strftime nevolá znovu
+_timestamp_memo = (None, "")
+
 
 def format_timestamp(dt: datetime = None) -> str:
     """
@@ -15,8 +19,14 @@ def format_timestamp(dt: datetime = None) -> str:
     Returns:
         Formátovaný timestamp string
     """
+    global _timestamp_memo
     if dt is None:
-        dt = datetime.now()
+        second = int(time.time())
+        if _timestamp_memo[0] == second:
+            return _timestamp_memo[1]
+        text = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+        _timestamp_memo = (second, text)
+        return text
     return dt.strftime('%Y-%m-%d %H:%M:%S')
 
 
@@ -39,6 +49,7 @@ def truncate_text(text: str, max_length: int = 100) -> str:
 def get_user_display_name(user: discord.User | discord.Member) -> str:
     """
     Vrátí display jméno uživatele ve formátu username#discriminator.
+    Účty s novými uživatelskými jmény mají discriminator "0" - u nich jen username.
     
     Args:
         user: Discord User nebo Member objekt
@@ -46,6 +57,8 @@ def get_user_display_name(user: discord.User | discord.Member) -> str:
     Returns:
         Formátované jméno
     """
+    if user.discriminator == "0":
+        return user.name
     return f"{user.name}#{user.discriminator}"
 
 
@@ -0,0 +1,170 @@
+"""
+Trvalé úložiště hromadných operací (SQLite ve WAL módu)
+Cíle a průběh se ukládají po dávkách, takže přerušenou operaci lze po restartu dokončit.
+"""
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Stavy jednotlivých cílů
+TARGET_PENDING = 0
+TARGET_DONE = 1
+TARGET_FAILED = 2
+
+# Stavy operací
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER,
+    author_id INTEGER NOT NULL,
+    author_name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_targets (
+    job_id INTEGER NOT NULL,
+    thread_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    PRIMARY KEY (job_id, thread_id, member_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_job_targets_state ON job_targets (job_id, state);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+"""
+
+
+class JobStore:
+    """
+    SQLite úložiště operací a jejich cílů (thread_id, member_id).
+    Zápisy jsou malé dávky v jedné transakci, WAL drží čtení i zápis levné.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def create_job(
+        self,
+        kind: str,
+        guild_id: int,
+        channel_id: int,
+        author_id: int,
+        author_name: str,
+        title: str,
+        targets: Iterable[Tuple[int, int]],
+        message_id: Optional[int] = None
+    ) -> int:
+        """
+        Založí operaci i se všemi cíli v jedné transakci.
+
+        Args:
+            kind: Typ operace (např. 'remove')
+            guild_id: ID serveru
+            channel_id: Kanál/vlákno se zprávou o průběhu
+            author_id: ID uživatele který operaci spustil
+            author_name: Jméno uživatele pro výpisy
+            title: Titulek operace
+            targets: Páry (thread_id, member_id)
+            message_id: ID zprávy o průběhu
+
+        Returns:
+            ID nové operace
+        """
+        now = time.time()
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (kind, guild_id, channel_id, message_id, author_id, author_name, title, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, guild_id, channel_id, message_id, author_id, author_name, title, JOB_RUNNING, now, now)
+            )
+            job_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO job_targets (job_id, thread_id, member_id) VALUES (?, ?, ?)",
+                ((job_id, thread_id, member_id) for thread_id, member_id in targets)
+            )
+        return job_id
+
+    def checkpoint(self, job_id: int, results: List[Tuple[int, int, int, Optional[str]]]):
+        """
+        Uloží dávku výsledků.
+
+        Args:
+            job_id: ID operace
+            results: Seznam (thread_id, member_id, stav, chyba)
+        """
+        if not results:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE job_targets SET state = ?, error = ? WHERE job_id = ? AND thread_id = ? AND member_id = ?",
+                ((state, error, job_id, thread_id, member_id) for thread_id, member_id, state, error in results)
+            )
+            self.conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def finish(self, job_id: int, status: str = JOB_DONE):
+        with self.conn:
+            self.conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (status, time.time(), job_id))
+
+    def get_job(self, job_id: int) -> Optional[sqlite3.Row]:
+        return self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def unfinished_jobs(self) -> List[sqlite3.Row]:
+        """Operace které ještě nedoběhly (např. přerušené restartem)"""
+        return self.conn.execute(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY id", (JOB_RUNNING,)
+        ).fetchall()
+
+    def pending_targets(self, job_id: int) -> List[Tuple[int, int]]:
+        """Cíle které ještě nebyly zpracované"""
+        return [
+            (row[0], row[1]) for row in self.conn.execute(
+                "SELECT thread_id, member_id FROM job_targets WHERE job_id = ? AND state = ?",
+                (job_id, TARGET_PENDING)
+            )
+        ]
+
+    def counts(self, job_id: int) -> Dict[int, int]:
+        """Počty cílů podle stavu"""
+        counts = {TARGET_PENDING: 0, TARGET_DONE: 0, TARGET_FAILED: 0}
+        for state, count in self.conn.execute(
+            "SELECT state, COUNT(*) FROM job_targets WHERE job_id = ? GROUP BY state", (job_id,)
+        ):
+            counts[state] = count
+        return counts
+
+    def results(self, job_id: int) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int, str]]]:
+        """
+        Vrátí výsledky operace.
+
+        Returns:
+            Tuple ([(thread_id, member_id)] úspěšné, [(thread_id, member_id, chyba)] neúspěšné)
+        """
+        done = []
+        failed = []
+        for thread_id, member_id, state, error in self.conn.execute(
+            "SELECT thread_id, member_id, state, error FROM job_targets WHERE job_id = ? AND state != ?",
+            (job_id, TARGET_PENDING)
+        ):
+            if state == TARGET_DONE:
+                done.append((thread_id, member_id))
+            else:
+                failed.append((thread_id, member_id, error or ""))
+        return done, failed
@@ -0,0 +1,46 @@
+"""
+Cache popisků (názvů serverů, kanálů, autorů) pro formátování logů
+"""
+from typing import Callable, Dict, Hashable, Optional
+
+
+class LabelCache:
+    """
+    Popisky podle klíče (např. ('c', channel_id)) spočítané jednou a držené do invalidace.
+    Při překročení max_size se cache vyprázdní - popisky se levně dopočítají znovu.
+    """
+
+    def __init__(self, max_size: int = 50000):
+        self.max_size = max_size
+        self._labels: Dict[Hashable, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def get(self, key: Hashable, factory: Callable[[], Optional[str]], default: str = "") -> str:
+        """
+        Vrátí popisek, při chybějícím ho spočítá přes factory.
+
+        Args:
+            key: Klíč popisku
+            factory: Funkce vracející popisek (None = objekt není v cache, neukládá se)
+            default: Popisek pokud factory vrátí None
+
+        Returns:
+            Popisek
+        """
+        label = self._labels.get(key)
+        if label is None:
+            label = factory()
+            if label is None:
+                return default
+            if len(self._labels) >= self.max_size:
+                self._labels.clear()
+            self._labels[key] = label
+        return label
+
+    def invalidate(self, key: Hashable):
+        self._labels.pop(key, None)
+
+    def clear(self):
+        self._labels.clear()
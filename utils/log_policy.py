@@ -0,0 +1,185 @@
+"""
+Pravidla logování podle serveru a kanálu
+Načítají se z JSON souboru a při jeho změně se za běhu znovu načtou.
+
+Formát souboru:
+    {
+        "default": "log",
+        "dedup_window": 60,
+        "guilds": {
+            "123": {"default": "log", "channels": {"456": "skip", "789": "sample:10"}}
+        }
+    }
+Akce: "log" (vše), "skip" (nic), "sample:N" (každá N-tá zpráva).
+"""
+import json
+import logging
+import os
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger('discord_bot')
+
+ACTION_LOG = 0
+ACTION_SKIP = 1
+ACTION_SAMPLE = 2
+
+DEDUP_MAX_ENTRIES = 10000  # Nad tento počet se staré záznamy deduplikace pročistí
+
+
+class Rule(NamedTuple):
+    action: int
+    every: int = 1  # U ACTION_SAMPLE: logovat každou N-tou zprávu
+
+
+RULE_LOG = Rule(ACTION_LOG)
+
+
+def parse_rule(text: str) -> Rule:
+    """
+    Převede zápis akce na pravidlo.
+
+    Args:
+        text: "log", "skip" nebo "sample:N"
+
+    Returns:
+        Pravidlo
+    """
+    if not isinstance(text, str):
+        raise ValueError(f"Akce logování musí být text, ne {text!r}")
+    text = text.strip().lower()
+    if text == 'log':
+        return RULE_LOG
+    if text == 'skip':
+        return Rule(ACTION_SKIP)
+    if text.startswith('sample:'):
+        every = int(text.split(':', 1)[1])
+        if every < 1:
+            raise ValueError(f"Neplatný vzorek: {text}")
+        return Rule(ACTION_SAMPLE, every)
+    raise ValueError(f"Neznámá akce logování: {text}")
+
+
+class LogPolicy:
+    """
+    Pravidla zploštělá do slovníků podle ID - rozhodnutí je jeden až tři dotazy do dict.
+    Opakované stejné zprávy autora v kanálu se v okně dedup_window sloučí.
+    """
+
+    def __init__(self, path: Optional[str], check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.default = RULE_LOG
+        self.dedup_window = 0.0
+        self._channels: Dict[int, Rule] = {}
+        self._guilds: Dict[int, Rule] = {}
+        self._sample_counters: Dict[int, int] = {}
+        self._last_seen: Dict[Tuple[int, int], Tuple[int, float, int]] = {}  # (kanál, autor) -> (hash, čas, opakování)
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        Načte pravidla ze souboru (chybějící soubor = vše se loguje).
+
+        Returns:
+            True pokud se pravidla načetla, False při chybě (zůstanou předchozí)
+        """
+        if not self.path or not os.path.exists(self.path):
+            self._mtime = None
+            self._apply({})
+            return True
+        try:
+            # Čas změny se uloží i při chybě - vadný soubor se nezkouší znovu dokud se neupraví
+            self._mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._apply(data)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.error(f"❌ Chyba v pravidlech logování {self.path}: {e}")
+            return False
+        logger.info(
+            f"✅ Pravidla logování načtena ({len(self._guilds)} serverů, {len(self._channels)} kanálů)"
+        )
+        return True
+
+    @staticmethod
+    def _section(value, name: str) -> dict:
+        """Ověří že část souboru je objekt (jinak ValueError - zůstanou předchozí pravidla)"""
+        if not isinstance(value, dict):
+            raise ValueError(f"{name} musí být objekt, ne {value!r}")
+        return value
+
+    def _apply(self, data: dict):
+        channels = {}
+        guilds = {}
+        data = self._section(data, "Soubor pravidel")
+        for guild_id, guild_data in self._section(data.get('guilds', {}), "guilds").items():
+            guild_data = self._section(guild_data, f"Server {guild_id}")
+            if 'default' in guild_data:
+                guilds[int(guild_id)] = parse_rule(guild_data['default'])
+            for channel_id, rule in self._section(guild_data.get('channels', {}), f"channels serveru {guild_id}").items():
+                channels[int(channel_id)] = parse_rule(rule)
+        # Vše se nejdřív naparsuje, pravidla se vymění až když je soubor v pořádku
+        self.default = parse_rule(data.get('default', 'log'))
+        self.dedup_window = float(data.get('dedup_window', 0))
+        self._channels = channels
+        self._guilds = guilds
+        self._sample_counters.clear()
+        self._last_seen.clear()
+
+    def maybe_reload(self):
+        """Znovu načte soubor pokud se změnil (kontrola nejvýš jednou za check_interval)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.path.getmtime(self.path) if self.path else None
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.reload()
+
+    def rule(self, guild_id: Optional[int], channel_id: int, parent_id: Optional[int] = None) -> Rule:
+        """Pravidlo pro kanál (vlákno dědí od nadřazeného kanálu, pak server, pak výchozí)"""
+        rule = self._channels.get(channel_id)
+        if rule is None and parent_id is not None:
+            rule = self._channels.get(parent_id)
+        if rule is None and guild_id is not None:
+            rule = self._guilds.get(guild_id)
+        return rule or self.default
+
+    def should_log(self, guild_id: Optional[int], channel_id: int, parent_id: Optional[int] = None) -> bool:
+        """Rozhodnutí pro novou zprávu (u vzorkovaných kanálů posune počítadlo)"""
+        rule = self.rule(guild_id, channel_id, parent_id)
+        if rule.action == ACTION_LOG:
+            return True
+        if rule.action == ACTION_SKIP:
+            return False
+        count = self._sample_counters.get(channel_id, 0)
+        self._sample_counters[channel_id] = count + 1
+        return count % rule.every == 0
+
+    def dedup(self, channel_id: int, author_id: int, content: str, timestamp: float) -> Tuple[bool, int]:
+        """
+        Sloučí opakovanou zprávu.
+
+        Returns:
+            Tuple (je to opakování - nelogovat, kolikrát se zopakovala předchozí zpráva)
+        """
+        if self.dedup_window <= 0:
+            return False, 0
+        key = (channel_id, author_id)
+        content_hash = hash(content)
+        previous = self._last_seen.get(key)
+        if previous is not None and previous[0] == content_hash and timestamp - previous[1] <= self.dedup_window:
+            self._last_seen[key] = (content_hash, timestamp, previous[2] + 1)
+            return True, 0
+        repeats = previous[2] if previous is not None else 0
+        if len(self._last_seen) >= DEDUP_MAX_ENTRIES:
+            cutoff = timestamp - self.dedup_window
+            self._last_seen = {k: v for k, v in self._last_seen.items() if v[1] >= cutoff}
+        self._last_seen[key] = (content_hash, timestamp, 0)
+        return False, repeats
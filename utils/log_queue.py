@@ -0,0 +1,190 @@
+"""
+Neblokující logování přes frontu
+Handlery volané z event loopu jen vloží záznam do omezené fronty,
+zápis na disk a do terminálu dělá samostatné vlákno po dávkách.
+"""
+import copy
+import logging
+import threading
+from collections import deque
+from typing import List, Optional
+
+
+class DropOldestQueue:
+    """
+    Omezená fronta pro vlákna. Při zaplnění zahodí nejstarší záznam
+    a zvýší počítadlo - vkládání nikdy neblokuje.
+    """
+
+    def __init__(self, maxsize: int):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1  # deque s maxlen nejstarší prvek zahodí sám
+            self._items.append(item)
+            self._cond.notify()
+
+    def get_batch(self, max_items: int, timeout: float) -> List:
+        """Počká na první položku (nejdéle timeout) a vrátí až max_items položek"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            batch = []
+            while self._items and len(batch) < max_items:
+                batch.append(self._items.popleft())
+            return batch
+
+
+class QueueLogHandler(logging.Handler):
+    """
+    Handler který záznam připraví a vloží do fronty. Text zprávy a traceback se skládají hned
+    (argumenty jsou živé objekty event loopu), formátování řádku až ve vlákně zapisovače.
+    """
+
+    def __init__(self, queue: DropOldestQueue):
+        super().__init__()
+        self.queue = queue
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Kopie záznamu bez odkazů na argumenty a výjimku (jako logging.handlers.QueueHandler.prepare)"""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.queue.put(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+
+class BatchQueueListener:
+    """
+    Vlákno které vybírá záznamy z fronty po dávkách a předává je handlerům.
+    StreamHandlery (soubor, terminál) dostanou celou dávku a flush jen jednou.
+    """
+
+    def __init__(
+        self,
+        queue: DropOldestQueue,
+        handlers: List[logging.Handler],
+        batch_size: int = 256,
+        flush_interval: float = 0.5
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._reported_drops = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Zastaví vlákno a zapíše co zbylo ve frontě"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        for handler in self.handlers:
+            handler.close()
+
+    def _run(self):
+        while not self._stop.is_set() or len(self.queue):
+            batch = self.queue.get_batch(self.batch_size, self.flush_interval)
+            dropped = self.queue.dropped
+            if dropped != self._reported_drops:
+                batch.insert(0, self._drop_record(dropped - self._reported_drops))
+                self._reported_drops = dropped
+            if batch:
+                self._write(batch)
+
+    def _drop_record(self, count: int) -> logging.LogRecord:
+        return logging.LogRecord(
+            'discord_bot', logging.WARNING, __file__, 0,
+            "⚠️ Logovací fronta přetekla - zahozeno %d nejstarších záznamů (celkem %d)",
+            (count, self.queue.dropped), None
+        )
+
+    def _write(self, batch: List[logging.LogRecord]):
+        for handler in self.handlers:
+            try:
+                if isinstance(handler, logging.StreamHandler):
+                    self._write_stream(handler, batch)
+                else:
+                    for record in batch:
+                        if record.levelno >= handler.level:
+                            handler.handle(record)
+            except Exception:
+                # Chyba jednoho handleru nesmí zastavit zapisovač
+                handler.handleError(batch[-1])
+
+    @staticmethod
+    def _write_stream(handler: logging.StreamHandler, batch: List[logging.LogRecord]):
+        lines = []
+        for record in batch:
+            if record.levelno >= handler.level and handler.filter(record):
+                try:
+                    lines.append(handler.format(record) + handler.terminator)
+                except Exception:
+                    handler.handleError(record)
+        if not lines:
+            return
+        with handler.lock:
+            if handler.stream is None:  # FileHandler s delay=True
+                handler.stream = handler._open()
+            handler.stream.write("".join(lines))
+            handler.flush()
+
+
+def setup_queue_logging(
+    level: int,
+    fmt: str,
+    handlers: List[logging.Handler],
+    maxsize: int = 10000,
+    batch_size: int = 256,
+    flush_interval: float = 0.5
+) -> BatchQueueListener:
+    """
+    Nastaví root logger tak, aby jen vkládal do fronty, a spustí zapisovač.
+
+    Args:
+        level: Úroveň logování
+        fmt: Formát řádku logu
+        handlers: Cílové handlery (soubor, terminál)
+        maxsize: Maximální počet záznamů ve frontě
+        batch_size: Maximální počet záznamů zapsaných najednou
+        flush_interval: Nejdelší čekání (s) na další záznam
+
+    Returns:
+        Spuštěný listener (při ukončení zavolat stop())
+    """
+    formatter = logging.Formatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue = DropOldestQueue(maxsize)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueLogHandler(queue))
+
+    listener = BatchQueueListener(queue, handlers, batch_size, flush_interval)
+    listener.start()
+    return listener
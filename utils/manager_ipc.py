@@ -0,0 +1,183 @@
+"""
+Lokální kanál mezi Managerem a procesem bota
+TCP na 127.0.0.1 (funguje i na Windows), zprávy jsou JSON po řádcích: {"type": "...", ...}.
+Manager předá botovi port, token a ID instance v proměnných prostředí.
+První zpráva bota je "hello" s tokenem - jiné lokální procesy se nepřipojí.
+"""
+import asyncio
+import json
+import logging
+import secrets
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger('discord_bot')
+manager_logger = logging.getLogger('bot_manager')
+
+ENV_PORT = 'BOT_MANAGER_PORT'
+ENV_TOKEN = 'BOT_MANAGER_TOKEN'
+ENV_INSTANCE = 'BOT_INSTANCE'
+ENV_STANDBY = 'BOT_STANDBY'  # "1" = nový proces při předávce, nezpracovává události dokud ho Manager neaktivuje
+
+MessageHandler = Callable[[str, dict], Awaitable[None]]
+
+
+def encode(message: dict) -> bytes:
+    return (json.dumps(message, separators=(',', ':')) + "\n").encode('utf-8')
+
+
+class ManagerServer:
+    """
+    Strana Manageru. Drží spojení podle ID instance a poslední přijatou zprávu
+    každého typu - wait_for() tak nepromešká zprávu která přišla dřív než se na ni začalo čekat.
+    """
+
+    def __init__(self, on_message: Optional[MessageHandler] = None):
+        self.token = secrets.token_hex(16)
+        self.port: Optional[int] = None
+        self.on_message = on_message
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Dict[str, asyncio.StreamWriter] = {}
+        self._received: Dict[Tuple[str, str], dict] = {}
+        self._events: Dict[Tuple[str, str], asyncio.Event] = {}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers.values()):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def env(self, instance: str, standby: bool = False) -> Dict[str, str]:
+        """Proměnné prostředí pro proces bota"""
+        return {
+            ENV_PORT: str(self.port),
+            ENV_TOKEN: self.token,
+            ENV_INSTANCE: instance,
+            ENV_STANDBY: '1' if standby else '0',
+        }
+
+    def is_connected(self, instance: str) -> bool:
+        return instance in self._writers
+
+    def forget(self, instance: str):
+        """Zahodí přijaté zprávy ukončené instance"""
+        for key in [key for key in self._received if key[0] == instance]:
+            del self._received[key]
+        for key in [key for key in self._events if key[0] == instance]:
+            del self._events[key]
+
+    async def send(self, instance: str, message_type: str, **fields) -> bool:
+        """Pošle zprávu instanci. Vrací False pokud není připojená."""
+        writer = self._writers.get(instance)
+        if writer is None:
+            return False
+        try:
+            writer.write(encode({'type': message_type, **fields}))
+            await writer.drain()
+            return True
+        except (ConnectionError, OSError):
+            return False
+
+    async def wait_for(self, instance: str, message_type: str, timeout: float) -> Optional[dict]:
+        """Počká na zprávu daného typu od instance (None po timeoutu)"""
+        key = (instance, message_type)
+        event = self._events.setdefault(key, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self._received.get(key)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        instance = None
+        try:
+            hello = json.loads(await reader.readline() or b'{}')
+            if hello.get('type') != 'hello' or not secrets.compare_digest(str(hello.get('token', '')), self.token):
+                return
+            instance = str(hello.get('instance', ''))
+            self._writers[instance] = writer
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                message_type = message.get('type', '')
+                key = (instance, message_type)
+                self._received[key] = message
+                self._events.setdefault(key, asyncio.Event()).set()
+                if self.on_message is not None:
+                    await self.on_message(instance, message)
+        except (ConnectionError, ValueError) as e:
+            manager_logger.warning(f"⚠️ Spojení s botem ({instance or 'neznámá instance'}) přerušeno: {e}")
+        finally:
+            if instance is not None and self._writers.get(instance) is writer:
+                del self._writers[instance]
+            writer.close()
+
+
+class ManagerClient:
+    """Strana bota. Zprávy od Manageru předává handleru, odesílá stav."""
+
+    def __init__(self, port: int, token: str, instance: str, standby: bool):
+        self.port = port
+        self.token = token
+        self.instance = instance
+        self.standby = standby
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, environ) -> Optional['ManagerClient']:
+        """Klient podle proměnných prostředí (None pokud bot neběží pod Managerem)"""
+        if not environ.get(ENV_PORT):
+            return None
+        return cls(
+            int(environ[ENV_PORT]), environ.get(ENV_TOKEN, ''),
+            environ.get(ENV_INSTANCE, ''), environ.get(ENV_STANDBY) == '1'
+        )
+
+    async def connect(self, on_message: Callable[[dict], Awaitable[None]]) -> bool:
+        try:
+            reader, self._writer = await asyncio.open_connection('127.0.0.1', self.port)
+        except OSError as e:
+            logger.warning(f"⚠️ Nepodařilo se připojit k Manageru: {e}")
+            return False
+        self._reader_task = asyncio.create_task(self._read(reader, on_message))
+        return await self.send('hello', token=self.token, instance=self.instance)
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def send(self, message_type: str, **fields) -> bool:
+        if self._writer is None:
+            return False
+        try:
+            self._writer.write(encode({'type': message_type, **fields}))
+            await self._writer.drain()
+            return True
+        except (ConnectionError, OSError):
+            return False
+
+    async def _read(self, reader: asyncio.StreamReader, on_message: Callable[[dict], Awaitable[None]]):
+        while True:
+            line = await reader.readline()
+            if not line:
+                logger.warning("⚠️ Spojení s Managerem ukončeno")
+                return
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            try:
+                await on_message(message)
+            except Exception as e:
+                logger.error(f"❌ Chyba při zpracování zprávy od Manageru {message.get('type')}: {e}", exc_info=True)
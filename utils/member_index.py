@@ -0,0 +1,54 @@
+"""
+Index rolí a členů pro rychlé statistiky nad seznamem členů
+"""
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class RoleIndex:
+    """
+    Mapování role_id -> množina member_id postavené jedním průchodem.
+    Počty, sjednocení i průniky rolí pak nevyžadují procházet členy znovu.
+    """
+
+    def __init__(self, memberships: Iterable[Tuple[int, Iterable[int]]]):
+        """
+        Args:
+            memberships: Páry (member_id, ID rolí člena)
+        """
+        self._members: Dict[int, Set[int]] = {}
+        for member_id, role_ids in memberships:
+            for role_id in role_ids:
+                self._members.setdefault(role_id, set()).add(member_id)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def role_ids(self) -> List[int]:
+        """Vrátí ID všech rolí které má alespoň jeden člen"""
+        return list(self._members)
+
+    def count(self, role_id: int) -> int:
+        """Počet členů s danou rolí"""
+        return len(self._members.get(role_id, ()))
+
+    def counts(self) -> Dict[int, int]:
+        """Počty členů pro všechny role"""
+        return {role_id: len(members) for role_id, members in self._members.items()}
+
+    def members(self, role_id: int) -> Set[int]:
+        """ID členů s danou rolí (nekopíruje - neupravovat)"""
+        return self._members.get(role_id, set())
+
+    def union(self, role_ids: Iterable[int]) -> Set[int]:
+        """ID členů kteří mají alespoň jednu z rolí"""
+        result = set()
+        for role_id in role_ids:
+            result |= self._members.get(role_id, set())
+        return result
+
+    def intersection(self, role_ids: Iterable[int]) -> Set[int]:
+        """ID členů kteří mají všechny zadané role"""
+        sets = sorted((self._members.get(role_id, set()) for role_id in role_ids), key=len)
+        if not sets:
+            return set()
+        return set(sets[0]).intersection(*sets[1:])
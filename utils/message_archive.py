@@ -0,0 +1,307 @@
+"""
+Strukturovaný archiv zpráv
+Záznamy (JSONL, ID jako čísla) se zapisují do segmentů rotovaných podle velikosti a stáří.
+Uzavřené segmenty se komprimují na pozadí (gzip, nebo zstd pokud je nainstalovaný balíček zstandard)
+a ke každému vzniká malý index s časovým rozsahem a kanály.
+"""
+import gzip
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set
+
+from utils.log_queue import DropOldestQueue
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows - otevřený segment nejde smazat, komprese selže a zkusí se při dalším startu
+
+logger = logging.getLogger('discord_bot')
+
+SEGMENT_PREFIX = 'messages-'
+SEGMENT_SUFFIX = '.jsonl'
+INDEX_SUFFIX = '.idx.json'
+
+
+def _segment_index(count: int, start: float, end: float, channels: Dict[int, int]) -> dict:
+    return {
+        'start': start,
+        'end': end,
+        'count': count,
+        'channels': {str(channel_id): n for channel_id, n in channels.items()},
+    }
+
+
+def _lock(f) -> bool:
+    """
+    Zamkne segment pro tento proces (zámek zmizí s procesem).
+
+    Returns:
+        False pokud segment drží jiný běžící proces
+    """
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _open_segment(path: str):
+    """Otevře segment pro čtení podle přípony (text)"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"Segment {path} je zstd, ale balíček zstandard není nainstalovaný")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+class MessageArchive:
+    """
+    Zapisovač archivu. record() jen vloží záznam do fronty,
+    zápis, rotaci i kompresi dělají vlákna na pozadí.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age: float = 86400,
+        compression: str = 'gzip',
+        queue_size: int = 50000
+    ):
+        """
+        Args:
+            directory: Složka archivu
+            max_bytes: Velikost segmentu po které se rotuje
+            max_age: Stáří segmentu (s) po kterém se rotuje
+            compression: 'gzip' nebo 'zstd' (bez balíčku zstandard se použije gzip s varováním)
+            queue_size: Max. počet záznamů čekajících na zápis
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        if compression == 'zstd' and zstandard is None:
+            logger.warning("⚠️ ARCHIVE_COMPRESSION = 'zstd', ale balíček zstandard není nainstalovaný - archiv se komprimuje gzipem")
+            compression = 'gzip'
+        self.compression = compression
+        self.queue = DropOldestQueue(queue_size)
+
+        self._file = None
+        self._path: Optional[str] = None
+        self._opened_at = 0.0
+        self._size = 0
+        self._count = 0
+        self._start = 0.0
+        self._end = 0.0
+        self._channels: Dict[int, int] = {}
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='archive-compress')
+
+    # ====================
+    # ZÁPIS
+    # ====================
+
+    def start(self):
+        # Segmenty které zůstaly otevřené po pádu se rovnou zkomprimují.
+        # Segment zamčený jiným procesem (starý bot při předávce) ještě žije a přeskočí se.
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                path = os.path.join(self.directory, name)
+                with open(path, 'rb') as f:
+                    if not _lock(f):
+                        continue
+                self._compressor.submit(self._compress, path, None)
+        self._thread = threading.Thread(target=self._run, name='archive-writer', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Zapíše frontu, uzavře segment a počká na dokončení komprese"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._rotate()
+        self._compressor.shutdown(wait=True)
+
+    def record(self, event: str, timestamp: float, guild_id: Optional[int], channel_id: int, author_id: int, message_id: int, **fields):
+        """
+        Vloží záznam do fronty (neblokuje).
+
+        Args:
+            event: Typ události ('msg', 'edit', 'del')
+            timestamp: Unix čas události
+            guild_id: ID serveru (None pro DM)
+            channel_id: ID kanálu
+            author_id: ID autora
+            message_id: ID zprávy
+            **fields: Další data (obsah zprávy apod.)
+        """
+        self.queue.put({
+            't': round(timestamp, 3), 'e': event, 'g': guild_id,
+            'c': channel_id, 'a': author_id, 'm': message_id, **fields
+        })
+
+    def _run(self):
+        while not self._stop.is_set() or len(self.queue):
+            batch = self.queue.get_batch(1000, 1.0)
+            if self._file is not None and time.time() - self._opened_at >= self.max_age:
+                self._rotate()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[dict]):
+        if self._file is None:
+            self._open_new()
+        lines = []
+        for item in batch:
+            lines.append(json.dumps(item, ensure_ascii=False, separators=(',', ':')))
+            self._count += 1
+            self._start = min(self._start, item['t']) if self._count > 1 else item['t']
+            self._end = max(self._end, item['t'])
+            self._channels[item['c']] = self._channels.get(item['c'], 0) + 1
+        data = ("\n".join(lines) + "\n").encode('utf-8')
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+        if self._size >= self.max_bytes:
+            self._rotate()
+
+    def _open_new(self):
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{stamp}{SEGMENT_SUFFIX}")
+        n = 1
+        while os.path.exists(path) or os.path.exists(path + '.gz') or os.path.exists(path + '.zst'):
+            path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{stamp}-{n}{SEGMENT_SUFFIX}")
+            n += 1
+        self._file = open(path, 'ab')
+        _lock(self._file)
+        self._path = path
+        self._opened_at = time.time()
+        self._size = 0
+        self._count = 0
+        self._channels = {}
+
+    def _rotate(self):
+        """Uzavře aktuální segment a předá ho kompresi"""
+        if self._file is None:
+            return
+        self._file.close()
+        index = _segment_index(self._count, self._start, self._end, self._channels)
+        self._compressor.submit(self._compress, self._path, index)
+        self._file = None
+        self._path = None
+
+    # ====================
+    # KOMPRESE
+    # ====================
+
+    def _compress(self, path: str, index: Optional[dict]):
+        try:
+            self._compress_segment(path, index)
+        except Exception as e:
+            # Nezkomprimovaný segment zůstane na disku a zkusí se znovu při dalším startu
+            logger.error(f"❌ Chyba při kompresi segmentu archivu {path}: {e}", exc_info=True)
+
+    def _compress_segment(self, path: str, index: Optional[dict]):
+        if index is None:
+            index = self._scan_index(path)
+        if not index['count']:
+            os.remove(path)
+            return
+        target = path + ('.zst' if self.compression == 'zstd' else '.gz')
+        tmp = target + '.tmp'
+        with open(path, 'rb') as src, open(tmp, 'wb') as raw:
+            if self.compression == 'zstd':
+                zstandard.ZstdCompressor(level=10).copy_stream(src, raw)
+            else:
+                with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp, target)
+        index['segment'] = os.path.basename(target)
+        with open(target + INDEX_SUFFIX, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.remove(path)
+
+    @staticmethod
+    def _scan_index(path: str) -> dict:
+        """Index pro segment bez záznamů v paměti (nedokončený před pádem)"""
+        count, start, end = 0, 0.0, 0.0
+        channels: Dict[int, int] = {}
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue  # Useknutý poslední řádek
+                count += 1
+                start = min(start, item['t']) if count > 1 else item['t']
+                end = max(end, item['t'])
+                channels[item['c']] = channels.get(item['c'], 0) + 1
+        return _segment_index(count, start, end, channels)
+
+
+def load_indexes(directory: str) -> List[dict]:
+    """Načte indexy všech uzavřených segmentů seřazené podle času"""
+    indexes = []
+    for name in os.listdir(directory):
+        if name.endswith(INDEX_SUFFIX):
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                indexes.append(json.load(f))
+    return sorted(indexes, key=lambda index: index['start'])
+
+
+def read_archive(
+    directory: str,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    channel_ids: Optional[Set[int]] = None
+) -> Iterator[dict]:
+    """
+    Projde záznamy archivu v časovém okně.
+    Segmenty mimo okno nebo bez hledaných kanálů se podle indexu vůbec nerozbalují.
+
+    Args:
+        directory: Složka archivu
+        since: Od (unix čas)
+        until: Do (unix čas)
+        channel_ids: Jen tyto kanály
+
+    Yields:
+        Záznamy jako slovníky
+    """
+    wanted = {str(channel_id) for channel_id in channel_ids} if channel_ids else None
+    for index in load_indexes(directory):
+        if since is not None and index['end'] < since:
+            continue
+        if until is not None and index['start'] > until:
+            continue
+        if wanted is not None and not wanted.intersection(index['channels']):
+            continue
+        with _open_segment(os.path.join(directory, index['segment'])) as f:
+            for line in f:
+                item = json.loads(line)
+                if since is not None and item['t'] < since:
+                    continue
+                if until is not None and item['t'] > until:
+                    continue
+                if channel_ids and item['c'] not in channel_ids:
+                    continue
+                yield item
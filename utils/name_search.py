@@ -0,0 +1,96 @@
+"""
+Index pro vyhledávání členů podle jména (prefixy + trigramy)
+"""
+import unicodedata
+from typing import Dict, Iterable, List, Set, Tuple
+
+PREFIX_MAX = 8  # Delší prefixy se dohledají přes PREFIX_MAX znaků a ověří
+
+
+def normalize_name(text: str) -> str:
+    """
+    Převede jméno na tvar pro vyhledávání (malá písmena, bez diakritiky).
+
+    Args:
+        text: Jméno nebo dotaz
+
+    Returns:
+        Normalizovaný text
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).strip()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameSearchIndex:
+    """
+    Vyhledávání členů podle display name a username.
+    Index se staví jednou, dotaz pak jen sáhne do slovníku prefixů
+    (krátké dotazy) nebo protne trigramy (hledání uprostřed jména).
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, Iterable[str]]]):
+        """
+        Args:
+            entries: Páry (member_id, jména člena)
+        """
+        self._names: Dict[int, Tuple[str, ...]] = {}
+        self._prefixes: Dict[str, Set[int]] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+
+        for member_id, names in entries:
+            normalized = tuple({normalize_name(name) for name in names if name} - {""})
+            if not normalized:
+                continue
+            self._names[member_id] = normalized
+            for name in normalized:
+                # Prefixy celého jména i jednotlivých slov ("jan novak" -> "jan", "nov")
+                for token in {name, *name.split()}:
+                    for length in range(1, min(len(token), PREFIX_MAX) + 1):
+                        self._prefixes.setdefault(token[:length], set()).add(member_id)
+                for trigram in _trigrams(name):
+                    self._trigrams.setdefault(trigram, set()).add(member_id)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _matches_prefix(self, member_id: int, query: str) -> bool:
+        return any(
+            token.startswith(query)
+            for name in self._names[member_id]
+            for token in (name, *name.split())
+        )
+
+    def search(self, query: str, limit: int = 25) -> List[int]:
+        """
+        Najde členy jejichž jméno začíná dotazem nebo ho obsahuje.
+
+        Args:
+            query: Hledaný text
+            limit: Maximální počet výsledků
+
+        Returns:
+            ID členů - nejdřív shody na začátku jména/slova, pak shody uvnitř
+        """
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        prefix_hits = self._prefixes.get(query[:PREFIX_MAX], set())
+        if len(query) > PREFIX_MAX:
+            prefix_hits = {mid for mid in prefix_hits if self._matches_prefix(mid, query)}
+        results = sorted(prefix_hits, key=lambda mid: min(self._names[mid]))
+
+        if len(results) < limit and len(query) >= 3:
+            postings = sorted((self._trigrams.get(t, set()) for t in _trigrams(query)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:]) - prefix_hits
+            substring_hits = [
+                mid for mid in candidates
+                if any(query in name for name in self._names[mid])
+            ]
+            results.extend(sorted(substring_hits, key=lambda mid: min(self._names[mid])))
+
+        return results[:limit]
@@ -0,0 +1,184 @@
+"""
+Zachycení výstupu bota v Manageru
+Pumpa průběžně čte stdout i stderr procesu bota (roura se nikdy nezaplní a bot se nezasekne na zápisu),
+posledních N KB drží v paměti pro výpis po pádu a vše předává vláknu které zapisuje do souboru
+rotovaného podle velikosti. Rotované soubory se na pozadí komprimují gzipem.
+"""
+import asyncio
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from utils.log_queue import DropOldestQueue
+
+logger = logging.getLogger('bot_manager')
+
+READ_CHUNK = 64 * 1024  # Kolik bajtů se čte z roury najednou
+MAX_LINE = 64 * 1024  # Delší řádek (bez \n) se rozdělí
+
+
+class OutputRing:
+    """Posledních max_bytes výstupu po řádcích"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lines = deque()
+        self._size = 0
+
+    def append(self, line: str):
+        self._lines.append(line)
+        self._size += len(line) + 1
+        while self._size > self.max_bytes and len(self._lines) > 1:
+            self._size -= len(self._lines.popleft()) + 1
+
+    def clear(self):
+        self._lines.clear()
+        self._size = 0
+
+    def lines(self) -> List[str]:
+        return list(self._lines)
+
+
+class RotatingOutputWriter:
+    """
+    Zapisovač výstupu do souboru. write() jen vloží řádek do fronty,
+    zápis a rotaci dělá vlákno, kompresi další vlákno.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int, queue_size: int = 50000):
+        """
+        Args:
+            path: Aktuální soubor (rotované: <název>-<čas>.log.gz vedle něj)
+            max_bytes: Velikost po které se rotuje
+            backups: Kolik rotovaných souborů se ponechá
+            queue_size: Max. počet řádků čekajících na zápis
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue = DropOldestQueue(queue_size)
+        self._file = None
+        self._size = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='output-compress')
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='output-writer', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Zapíše frontu a počká na dokončení komprese"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._compressor.shutdown(wait=True)
+
+    def write(self, line: str):
+        """Vloží řádek do fronty (neblokuje)"""
+        self.queue.put(line)
+
+    def _run(self):
+        while not self._stop.is_set() or len(self.queue):
+            batch = self.queue.get_batch(1000, 1.0)
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    logger.error(f"❌ Chyba při zápisu výstupu bota do {self.path}: {e}")
+
+    def _write(self, batch: List[str]):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            self._size = self._file.tell()
+        data = ("\n".join(batch) + "\n").encode('utf-8', errors='replace')
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+        if self._size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """Přejmenuje aktuální soubor a předá ho kompresi"""
+        self._file.close()
+        self._file = None
+        base, ext = os.path.splitext(self.path)
+        target = f"{base}-{time.strftime('%Y%m%d-%H%M%S')}{ext}"
+        n = 1
+        while os.path.exists(target) or os.path.exists(target + '.gz'):
+            target = f"{base}-{time.strftime('%Y%m%d-%H%M%S')}-{n}{ext}"
+            n += 1
+        os.replace(self.path, target)
+        self._compressor.submit(self._compress, target)
+
+    def _compress(self, path: str):
+        try:
+            with open(path, 'rb') as src, gzip.open(path + '.gz.tmp', 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(path + '.gz.tmp', path + '.gz')
+            os.remove(path)
+            self._prune()
+        except OSError as e:
+            logger.error(f"❌ Chyba při kompresi výstupu bota {path}: {e}")
+
+    def _prune(self):
+        """Smaže nejstarší rotované soubory nad limit backups"""
+        directory = os.path.dirname(self.path) or '.'
+        base, ext = os.path.splitext(os.path.basename(self.path))
+        rotated = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith(base + '-') and name.endswith(ext + '.gz')
+        )
+        for name in rotated[:max(0, len(rotated) - self.backups)]:
+            os.remove(os.path.join(directory, name))
+
+
+class OutputPump:
+    """Čte výstup procesu do paměťového bufferu a do rotovaného souboru"""
+
+    def __init__(self, path: str, tail_bytes: int, max_bytes: int, backups: int):
+        self.ring = OutputRing(tail_bytes)
+        self.writer = RotatingOutputWriter(path, max_bytes, backups)
+
+    def start(self):
+        self.writer.start()
+
+    def close(self):
+        self.writer.close()
+
+    def tail(self) -> List[str]:
+        """Poslední řádky výstupu (pro výpis po pádu)"""
+        return self.ring.lines()
+
+    async def pump(self, stream: asyncio.StreamReader):
+        """Čte stream po blocích až do EOF (ukončení procesu)"""
+        pending = b''
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if not chunk:
+                break
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            if len(pending) > MAX_LINE:
+                lines.append(pending)
+                pending = b''
+            for line in lines:
+                self._line(line)
+        if pending:
+            self._line(pending)
+
+    def _line(self, line: bytes):
+        text = line.rstrip(b'\r').decode('utf-8', errors='replace')
+        self.ring.append(text)
+        self.writer.write(text)
@@ -0,0 +1,112 @@
+"""
+Utility pro souběžné REST operace s ohledem na rate limity Discordu
+"""
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Zjistí doporučenou pauzu z rate limit chyby.
+
+    Args:
+        error: Výjimka z REST volání (discord.RateLimited nebo HTTPException se statusem 429)
+
+    Returns:
+        Počet sekund do dalšího pokusu, nebo None pokud nejde o rate limit
+    """
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is not None:
+        return float(retry_after)
+
+    if getattr(error, 'status', None) != 429:
+        return None
+
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+        try:
+            return float(headers[header])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 1.0
+
+
+class RateLimitedRunner:
+    """
+    Spouští async operace s omezenou souběžností.
+    Při 429 pozastaví všechny své workery na dobu kterou Discord doporučil
+    (operace sdílí stejný route bucket) a operaci zopakuje.
+    """
+
+    def __init__(self, concurrency: int = 5, max_retries: int = 3):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._resume_at = 0.0  # loop.time() do kdy je runner pozastavený
+
+    async def _wait_for_bucket(self):
+        """Počká pokud jiný worker narazil na rate limit"""
+        delay = self._resume_at - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """
+        Zavolá jednu operaci v rámci limitu souběžnosti.
+
+        Args:
+            func: Async funkce (např. thread.add_user)
+            *args: Argumenty funkce
+
+        Returns:
+            Výsledek funkce
+        """
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                await self._wait_for_bucket()
+                try:
+                    return await func(*args)
+                except Exception as e:
+                    retry_after = get_retry_after(e)
+                    if retry_after is None or attempt >= self.max_retries:
+                        raise
+                    attempt += 1
+                    # Malý jitter aby se workery po pauze nerozběhly všechny naráz
+                    resume_at = asyncio.get_running_loop().time() + retry_after + random.uniform(0, 0.25)
+                    self._resume_at = max(self._resume_at, resume_at)
+
+    async def map(
+        self,
+        func: Callable[[Any], Awaitable[Any]],
+        items: Iterable[Any],
+        on_done: Optional[Callable[[Any, Optional[Exception]], None]] = None
+    ) -> Tuple[List[Any], List[Tuple[Any, Exception]]]:
+        """
+        Zavolá funkci pro každou položku souběžně.
+
+        Args:
+            func: Async funkce s jedním argumentem
+            items: Položky ke zpracování
+            on_done: Volitelný callback (položka, chyba nebo None) po každé položce
+
+        Returns:
+            Tuple (úspěšné položky, [(položka, chyba)])
+        """
+        succeeded = []
+        failed = []
+
+        async def run(item):
+            error = None
+            try:
+                await self.call(func, item)
+                succeeded.append(item)
+            except Exception as e:
+                error = e
+                failed.append((item, e))
+            if on_done:
+                on_done(item, error)
+
+        await asyncio.gather(*(run(item) for item in items))
+        return succeeded, failed
@@ -0,0 +1,134 @@
+"""
+Sledování zdrojů procesu bota
+Vzorky RSS, spotřebovaného času CPU a počtu otevřených souborů z /proc (jen Linux),
+klouzavá časová řada s trendem (lineární regrese) a report z tracemalloc pro hledání úniku paměti.
+"""
+import os
+import time
+import tracemalloc
+from collections import deque
+from typing import List, NamedTuple, Optional
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+class Sample(NamedTuple):
+    t: float  # time.monotonic()
+    rss_mb: float
+    cpu_s: float  # user + system
+    fds: int
+
+
+def proc_available() -> bool:
+    return os.path.isdir('/proc/self/fd')
+
+
+def read_sample(pid: int) -> Optional[Sample]:
+    """
+    Přečte vzorek procesu z /proc.
+
+    Returns:
+        Vzorek, None pokud proces neexistuje nebo /proc není k dispozici
+    """
+    try:
+        with open(f'/proc/{pid}/statm', 'rb') as f:
+            rss_pages = int(f.read().split()[1])
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            # Název procesu (2. pole) může obsahovat mezery - pole se počítají od poslední závorky
+            fields = f.read().rsplit(b')', 1)[1].split()
+        utime, stime = int(fields[11]), int(fields[12])
+        fds = len(os.listdir(f'/proc/{pid}/fd'))
+    except (OSError, IndexError, ValueError):
+        return None
+    return Sample(time.monotonic(), rss_pages * PAGE_SIZE / (1024 * 1024), (utime + stime) / CLOCK_TICKS, fds)
+
+
+class ResourceSeries:
+    """Vzorky za posledních `window` sekund"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self.samples: deque = deque()
+
+    def add(self, sample: Sample):
+        self.samples.append(sample)
+        while self.samples and sample.t - self.samples[0].t > self.window:
+            self.samples.popleft()
+
+    def clear(self):
+        self.samples.clear()
+
+    def span(self) -> float:
+        """Časový rozsah řady (s)"""
+        if len(self.samples) < 2:
+            return 0.0
+        return self.samples[-1].t - self.samples[0].t
+
+    def slope(self, field: str) -> Optional[float]:
+        """
+        Trend veličiny za hodinu (metoda nejmenších čtverců přes celou řadu).
+
+        Args:
+            field: 'rss_mb' nebo 'fds'
+        """
+        n = len(self.samples)
+        if n < 3:
+            return None
+        t0 = self.samples[0].t
+        xs = [(sample.t - t0) / 3600 for sample in self.samples]
+        ys = [getattr(sample, field) for sample in self.samples]
+        mean_x = sum(xs) / n
+        mean_y = sum(ys) / n
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        if var_x == 0:
+            return None
+        return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+    def cpu_percent(self, span: float) -> Optional[float]:
+        """Průměrné vytížení CPU (% jednoho jádra) za posledních `span` sekund"""
+        if len(self.samples) < 2:
+            return None
+        last = self.samples[-1]
+        first = next((sample for sample in self.samples if last.t - sample.t <= span), None)
+        if first is None or last.t - first.t < span / 2:
+            return None
+        return (last.cpu_s - first.cpu_s) / (last.t - first.t) * 100
+
+
+def write_tracemalloc_report(
+    snapshot: tracemalloc.Snapshot,
+    baseline: Optional[tracemalloc.Snapshot],
+    path: str,
+    top: int = 30
+) -> str:
+    """
+    Zapíše místa alokací s největším nárůstem od začátku sledování (bez baseline největší alokace).
+
+    Returns:
+        Cesta k reportu
+    """
+    filters = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    )
+    snapshot = snapshot.filter_traces(filters)
+    if baseline is not None:
+        baseline = baseline.filter_traces(filters)
+    lines: List[str] = []
+    if baseline is not None:
+        stats = snapshot.compare_to(baseline, 'traceback')
+        lines.append(f"Nárůst alokací od začátku sledování (top {top}):")
+        for stat in stats[:top]:
+            lines.append(f"+{stat.size_diff / 1024:.1f} KiB ({stat.count_diff:+d} bloků), celkem {stat.size / 1024:.1f} KiB")
+            lines.extend(f"    {line}" for line in stat.traceback.format(most_recent_first=True))
+    else:
+        stats = snapshot.statistics('traceback')
+        lines.append(f"Největší alokace (top {top}):")
+        for stat in stats[:top]:
+            lines.append(f"{stat.size / 1024:.1f} KiB ({stat.count} bloků)")
+            lines.extend(f"    {line}" for line in stat.traceback.format(most_recent_first=True))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return path
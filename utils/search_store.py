@@ -0,0 +1,247 @@
+"""
+Fulltextový archiv zpráv (SQLite FTS5)
+Zápis dělá vlákno na pozadí po dávkách (jedna transakce na N zpráv nebo T ms),
+vyhledávání používá samostatné čtecí spojení.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from utils.log_queue import DropOldestQueue
+
+logger = logging.getLogger('discord_bot')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    parent_id INTEGER,
+    author_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    content TEXT NOT NULL,
+    edited_ts REAL,
+    deleted_ts REAL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_guild_ts ON messages (guild_id, ts);
+CREATE INDEX IF NOT EXISTS idx_messages_channel_ts ON messages (channel_id, ts);
+CREATE INDEX IF NOT EXISTS idx_messages_author_ts ON messages (author_id, ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE OF content ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+# Sloupce přidané po prvním vydání - starší archiv se doplní ALTER TABLE (sloupec, index)
+MIGRATIONS = [
+    ('parent_id', "ALTER TABLE messages ADD COLUMN parent_id INTEGER",
+     "CREATE INDEX IF NOT EXISTS idx_messages_parent_ts ON messages (parent_id, ts)"),
+]
+
+# Operace ve frontě zapisovače
+OP_INSERT = 0
+OP_EDIT = 1
+OP_DELETE = 2
+
+
+class SearchIndexWriter:
+    """
+    Zapisovač fulltextového archivu. add/edit/delete jen vloží operaci do fronty,
+    vlákno je zapisuje po dávkách - jedna transakce na batch_size operací nebo flush_ms.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_ms: int = 250, queue_size: int = 50000):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.queue = DropOldestQueue(queue_size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='search-writer', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Zapíše zbytek fronty a ukončí vlákno"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def add(
+        self, message_id: int, guild_id: int, channel_id: int, parent_id: Optional[int],
+        author_id: int, timestamp: float, content: str
+    ):
+        """parent_id je nadřazený kanál vlákna (u běžných kanálů None)"""
+        self.queue.put((OP_INSERT, message_id, guild_id, channel_id, parent_id, author_id, timestamp, content))
+
+    def edit(
+        self, message_id: int, guild_id: int, channel_id: int, parent_id: Optional[int],
+        author_id: int, timestamp: float, content: str, edited_at: float
+    ):
+        self.queue.put((OP_EDIT, message_id, guild_id, channel_id, parent_id, author_id, timestamp, content, edited_at))
+
+    def delete(self, message_id: int, deleted_at: float):
+        """Zpráva zůstává v archivu, jen se označí jako smazaná"""
+        self.queue.put((OP_DELETE, message_id, deleted_at))
+
+    def _next_batch(self) -> List[tuple]:
+        """Čeká na první operaci, pak sbírá další dokud není batch_size nebo neuplyne flush_interval"""
+        batch = self.queue.get_batch(self.batch_size, self.flush_interval)
+        if not batch:
+            return batch
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            batch.extend(self.queue.get_batch(self.batch_size - len(batch), remaining))
+        return batch
+
+    def _run(self):
+        # Spojení patří vláknu zapisovače
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        migrate(conn)
+        try:
+            while not self._stop.is_set() or len(self.queue):
+                batch = self._next_batch()
+                if not batch:
+                    continue
+                try:
+                    self._write(conn, batch)
+                except sqlite3.Error as e:
+                    logger.error(f"❌ Chyba při zápisu do fulltextového archivu ({len(batch)} operací): {e}")
+            dropped = self.queue.dropped
+            if dropped:
+                logger.warning(f"⚠️ Fulltextový archiv zahodil {dropped} operací kvůli přetečení fronty")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, batch: List[tuple]):
+        inserts = [op[1:] for op in batch if op[0] == OP_INSERT]
+        with conn:
+            if inserts:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO messages (id, guild_id, channel_id, parent_id, author_id, ts, content) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    inserts
+                )
+            # Úpravy a mazání v pořadí v jakém přišly (mohou navazovat na vložení ze stejné dávky)
+            for op in batch:
+                if op[0] == OP_EDIT:
+                    conn.execute(
+                        "INSERT INTO messages (id, guild_id, channel_id, parent_id, author_id, ts, content, edited_ts) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (id) DO UPDATE SET content = excluded.content, edited_ts = excluded.edited_ts",
+                        op[1:]
+                    )
+                elif op[0] == OP_DELETE:
+                    conn.execute("UPDATE messages SET deleted_ts = ? WHERE id = ?", (op[2], op[1]))
+
+
+def migrate(conn: sqlite3.Connection):
+    """Doplní do archivu sloupce z MIGRATIONS které v něm ještě nejsou"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+    with conn:
+        for column, alter, index in MIGRATIONS:
+            if column not in columns:
+                conn.execute(alter)
+            conn.execute(index)
+
+
+def build_match_query(text: str) -> str:
+    """
+    Převede dotaz uživatele na bezpečný FTS5 výraz (každé slovo v uvozovkách, 'slov*' = prefix).
+
+    Args:
+        text: Dotaz uživatele
+
+    Returns:
+        FTS5 MATCH výraz (prázdný pokud dotaz neobsahuje slova)
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+def open_reader(path: str) -> sqlite3.Connection:
+    """Otevře čtecí spojení (jen pro čtení, použitelné z vlákna executoru)"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def search_messages(
+    conn: sqlite3.Connection,
+    guild_id: int,
+    query: str,
+    channel_id: Optional[int] = None,
+    author_id: Optional[int] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 10
+) -> List[sqlite3.Row]:
+    """
+    Vyhledá zprávy seřazené podle relevance (bm25).
+
+    Args:
+        conn: Čtecí spojení
+        guild_id: ID serveru
+        query: Dotaz uživatele
+        channel_id: Jen tento kanál nebo vlákno (u kanálu včetně jeho vláken)
+        author_id: Jen tento autor
+        since: Od (unix čas)
+        until: Do (unix čas)
+        limit: Maximální počet výsledků
+
+    Returns:
+        Řádky s id, channel_id, author_id, ts, deleted_ts a snippet
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+    sql = [
+        "SELECT m.id, m.channel_id, m.author_id, m.ts, m.deleted_ts, "
+        "snippet(messages_fts, 0, '**', '**', '…', 16) AS snippet "
+        "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+        "WHERE messages_fts MATCH ? AND m.guild_id = ?"
+    ]
+    params: list = [match, guild_id]
+    if channel_id is not None:
+        sql.append("AND (m.channel_id = ? OR m.parent_id = ?)")
+        params.extend((channel_id, channel_id))
+    if author_id is not None:
+        sql.append("AND m.author_id = ?")
+        params.append(author_id)
+    if since is not None:
+        sql.append("AND m.ts >= ?")
+        params.append(since)
+    if until is not None:
+        sql.append("AND m.ts <= ?")
+        params.append(until)
+    sql.append("ORDER BY bm25(messages_fts) LIMIT ?")
+    params.append(limit)
+    return conn.execute(" ".join(sql), params).fetchall()
@@ -0,0 +1,81 @@
+"""
+Profilování startu bota
+Zaznamenává časy fází startu a načítání jednotlivých rozšíření a skládá z nich report.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class StartupProfiler:
+    """
+    Časové značky fází startu (každá jen poprvé - reconnect je nepřepíše)
+    a časy načtení rozšíření rozdělené na import a setup.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self.extensions: Dict[str, Dict] = {}
+        self.counters: Dict[str, int] = {}
+        self.finished = False
+
+    def elapsed(self) -> float:
+        """Sekundy od začátku startu"""
+        return time.perf_counter() - self.started
+
+    def mark(self, phase: str) -> bool:
+        """
+        Zaznamená konec fáze.
+
+        Returns:
+            True pokud byla fáze zaznamenána poprvé
+        """
+        if self.finished or any(name == phase for name, _ in self.marks):
+            return False
+        self.marks.append((phase, time.perf_counter()))
+        return True
+
+    def count(self, name: str):
+        """Počítadlo událostí během startu (např. dostupné servery)"""
+        if not self.finished:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def extension(self, name: str, total: float, setup: float, error: Optional[str] = None):
+        """
+        Args:
+            name: Název rozšíření
+            total: Celkový čas načtení (s)
+            setup: Z toho setup - add_cog a cog_load (s)
+            error: Chyba při načtení
+        """
+        self.extensions[name] = {'total': total, 'setup': setup, 'error': error}
+
+    def finish(self):
+        self.finished = True
+
+    def report(self, labels: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        Řádky reportu - fáze s trváním a časem od startu, pak rozšíření od nejpomalejšího.
+
+        Args:
+            labels: Čitelné názvy fází
+        """
+        labels = labels or {}
+        lines = [f"⏱️ Start bota trval {(self.marks[-1][1] - self.started) if self.marks else 0:.2f}s"]
+        previous = self.started
+        for phase, at in self.marks:
+            lines.append(
+                f"  {labels.get(phase, phase):<28} {(at - previous) * 1000:>8.0f} ms   (od startu {at - self.started:.2f}s)"
+            )
+            previous = at
+        if self.extensions:
+            lines.append("  Rozšíření (import + setup):")
+            for name, data in sorted(self.extensions.items(), key=lambda item: item[1]['total'], reverse=True):
+                import_ms = (data['total'] - data['setup']) * 1000
+                status = f"  ❌ {data['error']}" if data['error'] else ""
+                lines.append(
+                    f"    {name:<26} {data['total'] * 1000:>8.0f} ms = {import_ms:.0f} + {data['setup'] * 1000:.0f}{status}"
+                )
+        for name, value in self.counters.items():
+            lines.append(f"  {labels.get(name, name):<28} {value:>8}")
+        return lines